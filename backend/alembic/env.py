@@ -56,7 +56,15 @@ def run_migrations_online() -> None:
     In this scenario we need to create an Engine
     and associate a connection with the context.
 
+    Each revision commits on its own so helpers in app.core.migrations can
+    step outside the transaction (CREATE INDEX CONCURRENTLY, batched
+    backfills). DDL waits at most migration_lock_timeout_ms for a table
+    lock. With -x dry_run=true everything is rolled back.
+
     """
+    from app.core.config import settings
+    from app.core.migrations import is_dry_run
+
     connectable = engine_from_config(
         config.get_section(config.config_ini_section, {}),
         prefix="sqlalchemy.",
@@ -64,12 +72,24 @@ def run_migrations_online() -> None:
     )
 
     with connectable.connect() as connection:
+        if connection.dialect.name == "postgresql":
+            connection.exec_driver_sql(f"SET lock_timeout = {int(settings.migration_lock_timeout_ms)}")
+            connection.commit()
+
+        # Begun before configure() so alembic treats it as external and leaves it open
+        dry_run = connection.begin() if is_dry_run() else None
+
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection, target_metadata=target_metadata,
+            transaction_per_migration=True,
         )
 
-        with context.begin_transaction():
+        if dry_run is not None:
             context.run_migrations()
+            dry_run.rollback()
+        else:
+            with context.begin_transaction():
+                context.run_migrations()
 
 
 if context.is_offline_mode():
@@ -0,0 +1,32 @@
+"""Add covering indexes for the customer wallet query
+
+Revision ID: 003_add_wallet_indexes
+Revises: 002_add_token_revocation
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+from app.core.migrations import create_index_concurrently, drop_index_concurrently
+
+# revision identifiers, used by Alembic.
+revision = '003_add_wallet_indexes'
+down_revision = '002_add_token_revocation'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # user_loyalty_points is a large ledger table: build without blocking balance updates
+    create_index_concurrently(
+        'ix_user_loyalty_points_wallet', 'user_loyalty_points', ['user_id', 'last_activity_date'],
+        postgresql_include=['establishment_id', 'current_balance', 'total_points_earned', 'total_visits'],
+    )
+    op.create_index(
+        'ix_loyalty_programs_establishment_active', 'loyalty_programs', ['establishment_id', 'is_active'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_loyalty_programs_establishment_active', table_name='loyalty_programs')
+    drop_index_concurrently('ix_user_loyalty_points_wallet', 'user_loyalty_points')
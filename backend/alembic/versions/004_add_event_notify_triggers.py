@@ -0,0 +1,76 @@
+"""Add NOTIFY triggers feeding the live establishment event feed
+
+Revision ID: 004_add_event_notify_triggers
+Revises: 003_add_wallet_indexes
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '004_add_event_notify_triggers'
+down_revision = '003_add_wallet_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Payloads stay well under the 8000 byte NOTIFY limit; channel matches app.core.events.EVENTS_CHANNEL
+    op.execute("""
+        CREATE OR REPLACE FUNCTION notify_point_activity()
+        RETURNS TRIGGER AS $$
+        BEGIN
+            PERFORM pg_notify('establishment_events', json_build_object(
+                'type', 'point_activity',
+                'establishment_id', NEW.establishment_id,
+                'id', NEW.id,
+                'user_id', NEW.user_id,
+                'program_id', NEW.program_id,
+                'activity_type', NEW.activity_type,
+                'points_change', NEW.points_change,
+                'qr_code_id', NEW.qr_code_id,
+                'processed_by_user_id', NEW.processed_by_user_id,
+                'created_at', NEW.created_at
+            )::text);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
+    op.execute("""
+        CREATE TRIGGER point_activities_notify
+            AFTER INSERT ON point_activities
+            FOR EACH ROW
+            EXECUTE FUNCTION notify_point_activity();
+    """)
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION notify_qr_code_used()
+        RETURNS TRIGGER AS $$
+        BEGIN
+            PERFORM pg_notify('establishment_events', json_build_object(
+                'type', 'qr_code_used',
+                'establishment_id', NEW.establishment_id,
+                'id', NEW.id,
+                'code_type', NEW.code_type,
+                'points_value', NEW.points_value,
+                'used_by_user_id', NEW.used_by_user_id,
+                'used_at', NEW.used_at
+            )::text);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
+    op.execute("""
+        CREATE TRIGGER qr_codes_notify_used
+            AFTER UPDATE OF is_used ON qr_codes
+            FOR EACH ROW
+            WHEN (NEW.is_used AND NOT OLD.is_used)
+            EXECUTE FUNCTION notify_qr_code_used();
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS qr_codes_notify_used ON qr_codes")
+    op.execute("DROP FUNCTION IF EXISTS notify_qr_code_used()")
+    op.execute("DROP TRIGGER IF EXISTS point_activities_notify ON point_activities")
+    op.execute("DROP FUNCTION IF EXISTS notify_point_activity()")
@@ -0,0 +1,67 @@
+"""Add qr_codes_archive for used and expired codes
+
+Revision ID: 005_add_qr_code_archive
+Revises: 004_add_event_notify_triggers
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+from app.core.migrations import create_index_concurrently, drop_index_concurrently
+
+# revision identifiers, used by Alembic.
+revision = '005_add_qr_code_archive'
+down_revision = '004_add_event_notify_triggers'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('qr_codes_archive',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.Column('establishment_id', sa.Integer(), nullable=False),
+    sa.Column('program_id', sa.Integer(), nullable=True),
+    sa.Column('qr_code_hash', sa.String(length=255), nullable=False),
+    sa.Column('qr_code_url', sa.String(length=500), nullable=True),
+    sa.Column('code_type', sa.String(length=20), nullable=False),
+    sa.Column('points_value', sa.Integer(), nullable=False),
+    sa.Column('amount_spent', sa.Numeric(precision=10, scale=2), nullable=True),
+    sa.Column('is_used', sa.Boolean(), nullable=False),
+    sa.Column('used_by_user_id', sa.Integer(), nullable=True),
+    sa.Column('used_at', sa.TIMESTAMP(), nullable=True),
+    sa.Column('expires_at', sa.TIMESTAMP(), nullable=False),
+    sa.Column('created_by_user_id', sa.Integer(), nullable=True),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('extra_data', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.Column('archived_at', sa.TIMESTAMP(), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['establishment_id'], ['establishments.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_qr_codes_archive_qr_code_hash'), 'qr_codes_archive', ['qr_code_hash'], unique=True)
+    op.create_index(op.f('ix_qr_codes_archive_establishment_id'), 'qr_codes_archive', ['establishment_id'], unique=False)
+
+    # Ledger rows keep pointing at codes after they move to the archive
+    op.drop_constraint('point_activities_qr_code_id_fkey', 'point_activities', type_='foreignkey')
+
+    # qr_codes is the hot table: build without blocking scans and code generation
+    create_index_concurrently('ix_qr_codes_used_at', 'qr_codes', ['used_at'], postgresql_where=sa.text('is_used'))
+
+
+def downgrade() -> None:
+    drop_index_concurrently('ix_qr_codes_used_at', 'qr_codes')
+    # Archived codes return to the hot table so the foreign key can be restored
+    columns = ("id, created_at, updated_at, establishment_id, program_id, qr_code_hash, qr_code_url, code_type, "
+               "points_value, amount_spent, is_used, used_by_user_id, used_at, expires_at, created_by_user_id, "
+               "description, extra_data")
+    op.execute(f"INSERT INTO qr_codes ({columns}) SELECT {columns} FROM qr_codes_archive")
+    op.execute("UPDATE point_activities SET qr_code_id = NULL "
+               "WHERE qr_code_id IS NOT NULL AND qr_code_id NOT IN (SELECT id FROM qr_codes)")
+    op.create_foreign_key(
+        'point_activities_qr_code_id_fkey', 'point_activities', 'qr_codes', ['qr_code_id'], ['id'], ondelete='SET NULL'
+    )
+    op.drop_index(op.f('ix_qr_codes_archive_establishment_id'), table_name='qr_codes_archive')
+    op.drop_index(op.f('ix_qr_codes_archive_qr_code_hash'), table_name='qr_codes_archive')
+    op.drop_table('qr_codes_archive')
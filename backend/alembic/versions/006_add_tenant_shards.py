@@ -0,0 +1,33 @@
+"""Add tenant shard directory
+
+Revision ID: 006_add_tenant_shards
+Revises: 005_add_qr_code_archive
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '006_add_tenant_shards'
+down_revision = '005_add_qr_code_archive'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('tenant_shards',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.Column('business_owner_id', sa.Integer(), nullable=False),
+    sa.Column('shard', sa.String(length=50), nullable=False),
+    sa.Column('is_moving', sa.Boolean(), server_default=sa.text('false'), nullable=False),
+    sa.ForeignKeyConstraint(['business_owner_id'], ['business_owners.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('business_owner_id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('tenant_shards')
@@ -0,0 +1,50 @@
+"""Add NOTIFY trigger for loyalty program changes
+
+Revision ID: 007_add_program_notify_trigger
+Revises: 006_add_tenant_shards
+Create Date: 2026-10-19 20:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '007_add_program_notify_trigger'
+down_revision = '006_add_tenant_shards'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Lets every worker reload the establishment's program schedule (app.services.program_schedule)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION notify_loyalty_program()
+        RETURNS TRIGGER AS $$
+        DECLARE
+            program loyalty_programs%ROWTYPE;
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                program := OLD;
+            ELSE
+                program := NEW;
+            END IF;
+            PERFORM pg_notify('establishment_events', json_build_object(
+                'type', 'loyalty_program',
+                'establishment_id', program.establishment_id,
+                'id', program.id,
+                'operation', lower(TG_OP)
+            )::text);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
+    op.execute("""
+        CREATE TRIGGER loyalty_programs_notify
+            AFTER INSERT OR UPDATE OR DELETE ON loyalty_programs
+            FOR EACH ROW
+            EXECUTE FUNCTION notify_loyalty_program();
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS loyalty_programs_notify ON loyalty_programs")
+    op.execute("DROP FUNCTION IF EXISTS notify_loyalty_program()")
@@ -0,0 +1,36 @@
+"""Add booked receipts for POS receipt deduplication
+
+Revision ID: 008_add_booked_receipts
+Revises: 007_add_program_notify_trigger
+Create Date: 2026-10-19 22:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '008_add_booked_receipts'
+down_revision = '007_add_program_notify_trigger'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('booked_receipts',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.Column('establishment_id', sa.Integer(), nullable=False),
+    sa.Column('receipt_id', sa.String(length=64), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['establishment_id'], ['establishments.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('establishment_id', 'receipt_id', name='uq_booked_receipts_establishment_receipt')
+    )
+    op.create_index(op.f('ix_booked_receipts_id'), 'booked_receipts', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_booked_receipts_id'), table_name='booked_receipts')
+    op.drop_table('booked_receipts')
@@ -1,10 +1,17 @@
 """API routes package."""
 
 from fastapi import APIRouter
-from app.api import auth
+from app.api import auth, activity, establishments, events, qr, receipts, scans, wallet
 
 # Create main API router
 api_router = APIRouter()
 
 # Include all route modules
 api_router.include_router(auth.router)
+api_router.include_router(activity.router)
+api_router.include_router(establishments.router)
+api_router.include_router(wallet.router)
+api_router.include_router(events.router)
+api_router.include_router(qr.router)
+api_router.include_router(scans.router)
+api_router.include_router(receipts.router)
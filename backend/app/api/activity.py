@@ -0,0 +1,47 @@
+"""
+Point activity API endpoints.
+"""
+
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.core.database import get_read_db, shard_registry
+from app.core.auth import get_current_user_id
+from app.core.responses import rows_response
+from app.core.tenancy import query_all_shards
+from app.models.point_activity import PointActivity
+from app.schemas.activity import PointActivityResponse
+
+router = APIRouter(prefix="/activity", tags=["Activity"])
+
+
+@router.get("", response_model=List[PointActivityResponse])
+async def list_my_activity(
+    limit: int = Query(100, ge=1, le=1000),
+    before_id: Optional[int] = Query(None, description="Return entries older than this activity id"),
+    current_user_id: int = Depends(get_current_user_id),
+    db: Session = Depends(get_read_db)
+):
+    """List the current user's point activity, newest first (keyset paginated)."""
+    query = select(
+        PointActivity.id,
+        PointActivity.establishment_id,
+        PointActivity.program_id,
+        PointActivity.activity_type,
+        PointActivity.points_change,
+        PointActivity.description,
+        PointActivity.qr_code_id,
+        PointActivity.amount_spent,
+        PointActivity.created_at,
+    ).where(PointActivity.user_id == current_user_id)
+
+    if before_id is not None:
+        query = query.where(PointActivity.id < before_id)
+
+    # Merged across tenant shards (ids are unique across them); each returns at most `limit` rows
+    rows = query_all_shards(db, query.order_by(PointActivity.id.desc()).limit(limit))
+    if shard_registry.engines:
+        rows = sorted(rows, key=lambda row: row.id, reverse=True)[:limit]
+
+    return rows_response(PointActivityResponse, rows)
@@ -2,13 +2,16 @@
 Authentication API endpoints.
 """
 
-from datetime import timedelta
 from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, status
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from app.core.database import get_db
-from app.core.auth import create_access_token, verify_password, get_password_hash, get_current_user_id
-from app.core.config import settings
+from starlette.concurrency import run_in_threadpool
+from app.core.database import get_db, get_read_db
+from app.core.auth import verify_password, get_password_hash, get_current_user_id, get_token_payload
+from app.core.conditional import CACHE_PRIVATE, conditional_response, make_etag
+from app.core.passwords import password_hasher, rehash_password
+from app.core.responses import json_response
 from app.models.user import User
 from app.schemas.auth import (
     UserLogin, 
@@ -18,14 +21,32 @@ from app.schemas.auth import (
     PhoneOTPRequest,
     PhoneOTPVerify,
     EmailPasswordLogin,
-    OTPResponse
+    OTPResponse,
+    GoogleAuthURLResponse,
+    UserResponse,
+    RefreshTokenRequest,
+    LogoutRequest
 )
+from app.schemas.base import MessageResponse
 from app.services.google_oauth import google_oauth
 from app.services.otp_service import OTPService
+from app.services.token_service import TokenService
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
 
+async def _check_password(user: User, password: str, background_tasks: BackgroundTasks) -> bool:
+    """
+    Verify off the event loop; a hash made under an older policy is upgraded
+    after the response is sent.
+    """
+    if not await run_in_threadpool(verify_password, password, user.password_hash):
+        return False
+    if password_hasher.needs_update(user.password_hash):
+        background_tasks.add_task(rehash_password, user.id, password, user.password_hash)
+    return True
+
+
 @router.post("/register", response_model=TokenResponse)
 async def register_user(
     user_data: UserRegister,
@@ -57,7 +78,7 @@ async def register_user(
         phone_number=user_data.phone_number,
         email=user_data.email,
         full_name=user_data.full_name,
-        password_hash=get_password_hash(user_data.password) if user_data.password else None,
+        password_hash=await run_in_threadpool(get_password_hash, user_data.password) if user_data.password else None,
         role="customer"
     )
     
@@ -65,20 +86,7 @@ async def register_user(
     db.commit()
     db.refresh(user)
     
-    # Create access token
-    access_token_expires = timedelta(minutes=settings.access_token_expire_minutes)
-    access_token = create_access_token(
-        data={"sub": str(user.id), "role": user.role},
-        expires_delta=access_token_expires
-    )
-    
-    return TokenResponse(
-        access_token=access_token,
-        token_type="bearer",
-        expires_in=settings.access_token_expire_minutes * 60,
-        user_id=user.id,
-        role=user.role
-    )
+    return TokenService.issue_tokens(db, user)
 
 
 # === Phone Number + OTP Authentication ===
@@ -153,26 +161,14 @@ async def verify_phone_otp(
             detail="Account is deactivated"
         )
     
-    # Create access token
-    access_token_expires = timedelta(minutes=settings.access_token_expire_minutes)
-    access_token = create_access_token(
-        data={"sub": str(user.id), "role": user.role},
-        expires_delta=access_token_expires
-    )
-    
-    return TokenResponse(
-        access_token=access_token,
-        token_type="bearer",
-        expires_in=settings.access_token_expire_minutes * 60,
-        user_id=user.id,
-        role=user.role
-    )
+    return TokenService.issue_tokens(db, user)
 
 
 # === Email + Password Authentication ===
 @router.post("/email/login", response_model=TokenResponse)
 async def login_with_email(
     login_data: EmailPasswordLogin,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db)
 ):
     """Login user with email and password."""
@@ -192,7 +188,7 @@ async def login_with_email(
             detail="This account was created with OAuth. Please use Google login or phone number authentication."
         )
     
-    if not verify_password(login_data.password, user.password_hash):
+    if not await _check_password(user, login_data.password, background_tasks):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password"
@@ -205,25 +201,13 @@ async def login_with_email(
             detail="Account is deactivated"
         )
     
-    # Create access token
-    access_token_expires = timedelta(minutes=settings.access_token_expire_minutes)
-    access_token = create_access_token(
-        data={"sub": str(user.id), "role": user.role},
-        expires_delta=access_token_expires
-    )
-    
-    return TokenResponse(
-        access_token=access_token,
-        token_type="bearer",
-        expires_in=settings.access_token_expire_minutes * 60,
-        user_id=user.id,
-        role=user.role
-    )
+    return TokenService.issue_tokens(db, user)
 
 
 @router.post("/login", response_model=TokenResponse)
 async def login_user(
     user_data: UserLogin,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db)
 ):
     """
@@ -245,7 +229,7 @@ async def login_user(
     
     # Verify password (if user has one)
     if user.password_hash and user_data.password:
-        if not verify_password(user_data.password, user.password_hash):
+        if not await _check_password(user, user_data.password, background_tasks):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid phone number or password"
@@ -267,28 +251,15 @@ async def login_user(
             detail="Account is deactivated"
         )
     
-    # Create access token
-    access_token_expires = timedelta(minutes=settings.access_token_expire_minutes)
-    access_token = create_access_token(
-        data={"sub": str(user.id), "role": user.role},
-        expires_delta=access_token_expires
-    )
-    
-    return TokenResponse(
-        access_token=access_token,
-        token_type="bearer",
-        expires_in=settings.access_token_expire_minutes * 60,
-        user_id=user.id,
-        role=user.role
-    )
+    return TokenService.issue_tokens(db, user)
 
 
-@router.get("/google/url")
+@router.get("/google/url", response_model=GoogleAuthURLResponse)
 async def get_google_auth_url():
     """Get Google OAuth authorization URL."""
     try:
         auth_url = google_oauth.get_authorization_url()
-        return {"auth_url": auth_url}
+        return GoogleAuthURLResponse(auth_url=auth_url)
     except HTTPException as e:
         raise e
     except Exception as e:
@@ -334,20 +305,7 @@ async def google_auth_callback(
             user.email_verified = user_info.verified_email
             db.commit()
         
-        # Create access token
-        access_token_expires = timedelta(minutes=settings.access_token_expire_minutes)
-        access_token = create_access_token(
-            data={"sub": str(user.id), "role": user.role},
-            expires_delta=access_token_expires
-        )
-        
-        return TokenResponse(
-            access_token=access_token,
-            token_type="bearer",
-            expires_in=settings.access_token_expire_minutes * 60,
-            user_id=user.id,
-            role=user.role
-        )
+        return TokenService.issue_tokens(db, user)
         
     except HTTPException as e:
         raise e
@@ -358,29 +316,59 @@ async def google_auth_callback(
         )
 
 
-@router.get("/me")
-async def get_current_user(
+@router.post("/refresh", response_model=TokenResponse)
+async def refresh_tokens(
+    refresh_data: RefreshTokenRequest,
+    db: Session = Depends(get_db)
+):
+    """Exchange a refresh token for a new access/refresh token pair."""
+    return TokenService.rotate_refresh_token(db, refresh_data.refresh_token)
+
+
+@router.post("/logout", response_model=MessageResponse)
+async def logout(
+    logout_data: LogoutRequest,
+    payload: dict = Depends(get_token_payload),
+    db: Session = Depends(get_db)
+):
+    """Revoke the current access token and, if given, the refresh token."""
+    TokenService.logout(db, payload, logout_data.refresh_token)
+    return MessageResponse(message="Logged out successfully")
+
+
+@router.post("/logout-all", response_model=MessageResponse)
+async def logout_all(
     current_user_id: int = Depends(get_current_user_id),
     db: Session = Depends(get_db)
 ):
-    """Get current user information."""
-    user = db.query(User).filter(User.id == current_user_id).first()
+    """Revoke every access and refresh token issued to the current user."""
+    TokenService.revoke_all_user_tokens(db, current_user_id)
+    return MessageResponse(message="Logged out from all sessions")
+
+
+@router.get("/me", response_model=UserResponse)
+async def get_current_user(
+    request: Request,
+    current_user_id: int = Depends(get_current_user_id),
+    db: Session = Depends(get_read_db)
+):
+    """Get current user information (supports conditional requests)."""
+    updated_at = db.execute(select(User.updated_at).where(User.id == current_user_id)).scalar()
     
-    if not user:
+    if updated_at is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
     
-    return {
-        "id": user.id,
-        "phone_number": user.phone_number,
-        "email": user.email,
-        "full_name": user.full_name,
-        "role": user.role,
-        "avatar_url": user.avatar_url,
-        "is_active": user.is_active,
-        "phone_verified": user.phone_verified,
-        "email_verified": user.email_verified,
-        "establishment_id": user.establishment_id
-    }
+    def build():
+        user = db.query(User).filter(User.id == current_user_id).first()
+        return json_response(UserResponse, user, from_attributes=True)
+    
+    return conditional_response(
+        request,
+        make_etag("user", current_user_id, updated_at),
+        updated_at,
+        CACHE_PRIVATE,
+        build,
+    )
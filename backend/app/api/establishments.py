@@ -0,0 +1,151 @@
+"""
+Establishment catalog, leaderboard and customer import API endpoints.
+
+Catalog responses carry ETag/Last-Modified validators derived from
+updated_at, and a cheap version query answers conditional requests with 304
+without loading the full rows.
+"""
+
+import io
+from typing import List, Optional
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, UploadFile, status
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from app.core.conditional import CACHE_CATALOG, conditional_response, make_etag
+from app.core.auth import get_current_user_id
+from app.core.config import settings
+from app.core.database import get_read_db
+from app.core.permissions import ROLE_ADMIN, Principal, require_establishment
+from app.core.tenancy import get_tenant_read_db
+from app.core.responses import json_response
+from app.models.establishment import Establishment
+from app.models.loyalty_program import LoyaltyProgram
+from app.schemas.customer_import import CustomerImportReport
+from app.schemas.establishment import EstablishmentResponse, LoyaltyProgramResponse
+from app.schemas.leaderboard import LeaderboardMetric, LeaderboardRankResponse, LeaderboardResponse
+from app.services.customer_import import CustomerImporter
+from app.services.leaderboard import leaderboards
+
+router = APIRouter(prefix="/establishments", tags=["Establishments"])
+
+
+@router.get("/{establishment_id}", response_model=EstablishmentResponse)
+async def get_establishment(
+    establishment_id: int,
+    request: Request,
+    db: Session = Depends(get_read_db)
+):
+    """Get an establishment's public profile."""
+    updated_at = db.execute(
+        select(Establishment.updated_at).where(Establishment.id == establishment_id)
+    ).scalar()
+
+    if updated_at is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Establishment not found"
+        )
+
+    def build():
+        establishment = db.query(Establishment).filter(Establishment.id == establishment_id).first()
+        return json_response(EstablishmentResponse, establishment, from_attributes=True)
+
+    return conditional_response(
+        request,
+        make_etag("establishment", establishment_id, updated_at),
+        updated_at,
+        CACHE_CATALOG,
+        build,
+    )
+
+
+@router.get("/{establishment_id}/programs", response_model=List[LoyaltyProgramResponse])
+async def list_establishment_programs(
+    establishment_id: int,
+    request: Request,
+    db: Session = Depends(get_tenant_read_db)
+):
+    """List an establishment's active loyalty programs."""
+    # Versioned over all of the establishment's programs, so deactivations and deletes change it too
+    last_updated, count = db.execute(
+        select(func.max(LoyaltyProgram.updated_at), func.count(LoyaltyProgram.id))
+        .where(LoyaltyProgram.establishment_id == establishment_id)
+    ).one()
+
+    def build():
+        programs = db.query(LoyaltyProgram).filter(
+            LoyaltyProgram.establishment_id == establishment_id,
+            LoyaltyProgram.is_active.is_(True)
+        ).order_by(LoyaltyProgram.id).all()
+        return json_response(List[LoyaltyProgramResponse], programs, from_attributes=True)
+
+    return conditional_response(
+        request,
+        make_etag("programs", establishment_id, last_updated, count),
+        last_updated,
+        CACHE_CATALOG,
+        build,
+    )
+
+
+@router.get("/{establishment_id}/leaderboard", response_model=LeaderboardResponse)
+async def get_leaderboard(
+    establishment_id: int,
+    metric: LeaderboardMetric = Query(LeaderboardMetric.CURRENT_BALANCE),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    principal: Principal = Depends(require_establishment(ROLE_ADMIN)),
+    db: Session = Depends(get_tenant_read_db)
+):
+    """Top customers of the establishment by the given metric (establishment admins)."""
+    return json_response(LeaderboardResponse, LeaderboardResponse(
+        establishment_id=establishment_id,
+        metric=metric,
+        entries=leaderboards.top(db, establishment_id, metric, offset, limit),
+    ))
+
+
+@router.get("/{establishment_id}/leaderboard/me", response_model=LeaderboardRankResponse)
+async def get_my_leaderboard_rank(
+    establishment_id: int,
+    metric: LeaderboardMetric = Query(LeaderboardMetric.CURRENT_BALANCE),
+    current_user_id: int = Depends(get_current_user_id),
+    db: Session = Depends(get_tenant_read_db)
+):
+    """The current customer's rank at the establishment (null if they have no points there)."""
+    found = leaderboards.rank(db, establishment_id, metric, current_user_id)
+    rank, value = found if found is not None else (None, None)
+    return json_response(LeaderboardRankResponse, LeaderboardRankResponse(
+        establishment_id=establishment_id, metric=metric, rank=rank, value=value
+    ))
+
+
+@router.post("/{establishment_id}/customers/import", response_model=CustomerImportReport)
+async def import_customers(
+    establishment_id: int,
+    file: UploadFile = File(...),
+    default_country_code: Optional[str] = Query(None, pattern=r"^\+?[1-9]\d{0,2}$"),
+    principal: Principal = Depends(require_establishment(ROLE_ADMIN, live=True))
+):
+    """
+    Import customers and their balances from a CSV upload (establishment admins).
+    Customers are matched by phone number; existing balances are left unchanged.
+    """
+    if file.size is not None and file.size > settings.customer_import_max_bytes:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Import files are limited to {settings.customer_import_max_bytes} bytes"
+        )
+    importer = CustomerImporter(establishment_id, default_country_code=default_country_code)
+    stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    try:
+        report = await run_in_threadpool(importer.run, stream)
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(exc)
+        )
+    finally:
+        stream.detach()
+    return json_response(CustomerImportReport, report)
@@ -0,0 +1,66 @@
+"""
+Live event feed API endpoints (Server-Sent Events).
+"""
+
+import asyncio
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
+from app.core.config import settings
+from app.core.events import event_hub
+from app.core.permissions import Principal, require_establishment
+
+router = APIRouter(prefix="/establishments", tags=["Live feed"])
+
+
+async def _event_stream(establishment_id: int):
+    """
+    Subscribe and yield SSE frames, with keepalives while idle. The subscription
+    lives inside the generator so it is only taken once the body starts and is
+    always released by the finally; a client that goes away earlier holds none.
+    """
+    subscription = event_hub.subscribe(establishment_id)
+    try:
+        yield b"retry: 3000\n\n"
+        while True:
+            try:
+                payload = await asyncio.wait_for(subscription.queue.get(), timeout=settings.event_heartbeat_seconds)
+            except asyncio.TimeoutError:
+                yield b": keepalive\n\n"
+                continue
+            if payload is None:
+                return
+            if subscription.dropped:
+                # Client fell behind and missed events; it should refetch its view
+                yield b"event: lagged\ndata: " + orjson.dumps({"dropped": subscription.dropped}) + b"\n\n"
+                subscription.dropped = 0
+            yield b"data: " + payload + b"\n\n"
+    finally:
+        event_hub.unsubscribe(subscription)
+
+
+@router.get("/{establishment_id}/events")
+async def stream_establishment_events(
+    establishment_id: int,
+    principal: Principal = Depends(require_establishment())
+):
+    """
+    Stream new point activity and QR code redemptions for the establishment
+    (workers and admins). Each SSE `data` field is one JSON event.
+    """
+    if not event_hub.enabled:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Live events are not available on this deployment"
+        )
+    if event_hub.subscriber_count >= settings.event_max_subscribers:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many live connections, try again later"
+        )
+
+    return StreamingResponse(
+        _event_stream(establishment_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
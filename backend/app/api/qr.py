@@ -0,0 +1,193 @@
+"""
+QR code API endpoints.
+"""
+
+import io
+import zipfile
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import Response
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from app.core.conditional import CACHE_IMAGE, is_not_modified
+from app.core.config import settings
+from app.core.events import event_hub
+from app.core.database import get_primary_read_db, get_read_db
+from app.core.permissions import (
+    ROLE_ADMIN,
+    ROLE_WORKER,
+    Principal,
+    get_current_principal,
+    require_establishment,
+)
+from app.core.tenancy import get_tenant_read_db
+from app.models.qr_code import QRCode
+from app.models.qr_code_archive import QRCodeArchive
+from app.schemas.qr import QRCodeStatus, QRCodeStatusResponse, QRImageBatchRequest, QRImageFormat
+from app.services.qr_archive import find_code_on_shards
+from app.services.qr_renderer import MEDIA_TYPES, image_etag, image_key, qr_renderer
+from app.services.qr_waiters import code_waiters
+
+router = APIRouter(prefix="/qr", tags=["QR Codes"])
+
+
+def _can_view(principal: Principal, code) -> bool:
+    """The customer the code was issued for, or staff of its establishment."""
+    is_staff = principal.role in (ROLE_WORKER, ROLE_ADMIN) and principal.establishment_id == code.establishment_id
+    return code.created_by_user_id == principal.user_id or is_staff
+
+
+def _payload(code) -> str:
+    """What the QR image encodes: the app link, or the bare hash when none is stored."""
+    return code.qr_code_url or code.qr_code_hash
+
+
+@router.get("/{qr_code_id}/status", response_model=QRCodeStatusResponse)
+async def get_qr_code_status(
+    qr_code_id: int,
+    wait: float = Query(0, ge=0, le=60, description="Seconds to wait for the code to be used"),
+    principal: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_primary_read_db)
+):
+    """
+    Get a QR code's status. With `wait`, a pending code holds the request
+    until the code is scanned or the wait times out (long polling).
+    """
+    # Primary, not a replica: a lagging read could miss a redemption whose event already fired
+    code = find_code_on_shards(db, qr_code_id, (
+        "is_used", "used_at", "used_by_user_id", "expires_at", "created_by_user_id", "establishment_id",
+    ))
+    # Release the connection before parking the request
+    db.close()
+
+    not_found = HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail="QR code not found"
+    )
+    if code is None:
+        raise not_found
+
+    if not _can_view(principal, code):
+        raise not_found
+
+    if code.is_used:
+        return QRCodeStatusResponse(
+            qr_code_id=qr_code_id, status=QRCodeStatus.USED,
+            used_at=code.used_at, used_by_user_id=code.used_by_user_id
+        )
+
+    now = datetime.utcnow()
+    if code.expires_at <= now:
+        return QRCodeStatusResponse(qr_code_id=qr_code_id, status=QRCodeStatus.EXPIRED)
+
+    timeout = min(wait, (code.expires_at - now).total_seconds())
+    # Without the event feed (SQLite) nothing would wake the waiter: answer at once
+    if timeout > 0 and event_hub.enabled and code_waiters.count < settings.qr_wait_max_waiters:
+        event = await code_waiters.wait(qr_code_id, timeout)
+        if event is not None:
+            return QRCodeStatusResponse(
+                qr_code_id=qr_code_id, status=QRCodeStatus.USED,
+                used_at=event["used_at"], used_by_user_id=event["used_by_user_id"]
+            )
+
+    expired = code.expires_at <= datetime.utcnow()
+    return QRCodeStatusResponse(
+        qr_code_id=qr_code_id, status=QRCodeStatus.EXPIRED if expired else QRCodeStatus.PENDING
+    )
+
+
+@router.get("/{qr_code_id}/image", response_class=Response)
+async def get_qr_code_image(
+    qr_code_id: int,
+    request: Request,
+    format: QRImageFormat = QRImageFormat.PNG,
+    scale: int = Query(8, ge=1, le=50, description="Pixels per module"),
+    border: int = Query(4, ge=0, le=20, description="Quiet zone in modules"),
+    principal: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Render a QR code as PNG or SVG. Images are content-addressed, so the
+    strong ETag is known before rendering and revalidation never renders.
+    """
+    code = find_code_on_shards(
+        db, qr_code_id, ("qr_code_url", "qr_code_hash", "created_by_user_id", "establishment_id")
+    )
+    db.close()
+
+    if code is None or not _can_view(principal, code):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="QR code not found"
+        )
+
+    fmt = format.value
+    payload = _payload(code)
+    headers = {"ETag": image_etag(image_key(payload, fmt, scale, border)), "Cache-Control": CACHE_IMAGE}
+    if is_not_modified(request, headers["ETag"], None):
+        return Response(status_code=304, headers=headers)
+
+    _, image = await qr_renderer.render(payload, fmt, scale, border)
+    return Response(content=image, media_type=MEDIA_TYPES[fmt], headers=headers)
+
+
+def _zip_images(names, images, compress: bool) -> bytes:
+    buffer = io.BytesIO()
+    method = zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED
+    with zipfile.ZipFile(buffer, "w", method) as archive:
+        for name, image in zip(names, images):
+            archive.writestr(name, image)
+    return buffer.getvalue()
+
+
+@router.post("/images", response_class=Response)
+async def render_qr_code_images(
+    batch: QRImageBatchRequest,
+    establishment_id: int,
+    principal: Principal = Depends(require_establishment()),
+    db: Session = Depends(get_tenant_read_db)
+):
+    """
+    Render many of an establishment's QR codes at once (e.g. for print) and
+    return them as a ZIP archive of `<id>.<format>` files.
+    """
+    if len(batch.qr_code_ids) > settings.qr_render_batch_max:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.qr_render_batch_max} codes per batch"
+        )
+
+    ids = list(dict.fromkeys(batch.qr_code_ids))
+    codes = {}
+    for model in (QRCode, QRCodeArchive):
+        missing = [qr_code_id for qr_code_id in ids if qr_code_id not in codes]
+        if not missing:
+            break
+        codes.update((row.id, row) for row in db.execute(
+            select(model.id, model.qr_code_url, model.qr_code_hash).where(
+                model.id.in_(missing),
+                model.establishment_id == establishment_id,
+            )
+        ))
+    db.close()
+
+    missing = [qr_code_id for qr_code_id in ids if qr_code_id not in codes]
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"QR codes not found: {missing[:20]}"
+        )
+
+    fmt = batch.format.value
+    specs = [(_payload(codes[qr_code_id]), fmt, batch.scale, batch.border) for qr_code_id in ids]
+    images = await run_in_threadpool(qr_renderer.render_batch, specs)
+    # PNG is already compressed; SVG text deflates well
+    archive = await run_in_threadpool(
+        _zip_images, [f"{qr_code_id}.{fmt}" for qr_code_id in ids], images, batch.format == QRImageFormat.SVG
+    )
+    return Response(
+        content=archive,
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="qr-codes-{establishment_id}.zip"'}
+    )
@@ -0,0 +1,50 @@
+"""
+POS receipt API endpoints.
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.core.permissions import ROLE_ADMIN, ROLE_WORKER, Principal, require_role
+from app.core.tenancy import open_tenant_session
+from app.schemas.receipt import ReceiptBatchRequest, ReceiptBatchResponse, ReceiptStatus
+from app.services.receipts import ReceiptService
+
+router = APIRouter(prefix="/receipts", tags=["Receipts"])
+
+
+@router.post("/batch", response_model=ReceiptBatchResponse)
+async def book_receipts(
+    batch: ReceiptBatchRequest,
+    request: Request,
+    principal: Principal = Depends(require_role(ROLE_WORKER, ROLE_ADMIN, live=True))
+):
+    """
+    Credit points for a batch of purchases from the establishment's
+    point-of-sale system, at each program's points_per_euro as of the
+    purchase time. Send an Idempotency-Key to retry a batch safely.
+    """
+    if principal.establishment_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not assigned to an establishment"
+        )
+    if len(batch.receipts) > settings.receipt_batch_max:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.receipt_batch_max} receipts per batch"
+        )
+
+    db = await run_in_threadpool(open_tenant_session, principal.establishment_id, request)
+    try:
+        results = await run_in_threadpool(
+            ReceiptService.book, db, principal.establishment_id, principal.user_id, batch.receipts
+        )
+    finally:
+        db.close()
+    accepted = [result for result in results if result.status == ReceiptStatus.ACCEPTED]
+    return ReceiptBatchResponse(
+        accepted=len(accepted),
+        points_awarded=sum(result.points for result in accepted),
+        results=results
+    )
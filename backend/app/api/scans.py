@@ -0,0 +1,48 @@
+"""
+Offline scan sync API endpoints.
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.core.permissions import ROLE_ADMIN, ROLE_WORKER, Principal, require_role
+from app.core.tenancy import open_tenant_session
+from app.schemas.scan import ScanStatus, ScanSyncRequest, ScanSyncResponse
+from app.services.scan_sync import ScanSyncService
+
+router = APIRouter(prefix="/scans", tags=["Scans"])
+
+
+@router.post("/sync", response_model=ScanSyncResponse)
+async def sync_offline_scans(
+    batch: ScanSyncRequest,
+    request: Request,
+    principal: Principal = Depends(require_role(ROLE_WORKER, ROLE_ADMIN, live=True))
+):
+    """
+    Upload scans a worker device collected offline, for the worker's
+    establishment (on its tenant's shard). Each scan gets its own result;
+    re-uploading a batch is safe (already booked scans come back as duplicates).
+    """
+    if principal.establishment_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not assigned to an establishment"
+        )
+    if len(batch.scans) > settings.scan_sync_max_batch:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.scan_sync_max_batch} scans per batch"
+        )
+
+    db = await run_in_threadpool(open_tenant_session, principal.establishment_id, request)
+    try:
+        results = await run_in_threadpool(
+            ScanSyncService.sync, db, principal.establishment_id, principal.user_id, batch.scans
+        )
+    finally:
+        db.close()
+    return ScanSyncResponse(
+        accepted=sum(result.status == ScanStatus.ACCEPTED for result in results),
+        results=results
+    )
@@ -0,0 +1,28 @@
+"""
+Customer wallet API endpoints.
+"""
+
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import Response
+from sqlalchemy.orm import Session
+from app.core.auth import get_current_user_id
+from app.core.database import get_read_db, wrote_recently
+from app.schemas.wallet import WalletResponse
+from app.services.wallet_service import WalletService
+
+router = APIRouter(prefix="/wallet", tags=["Wallet"])
+
+
+@router.get("", response_model=WalletResponse)
+async def get_wallet(
+    request: Request,
+    current_user_id: int = Depends(get_current_user_id),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Get the customer's balances at every establishment, with branding and
+    progress toward each active program's reward.
+    """
+    # Skip the cache right after the client's own writes (read-your-writes)
+    body = WalletService.get_wallet(db, current_user_id, use_cache=not wrote_recently(request))
+    return Response(content=body, media_type="application/json")
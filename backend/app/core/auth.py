@@ -2,16 +2,17 @@
 Authentication utilities for JWT and OAuth.
 """
 
-from datetime import datetime, timedelta
+import uuid
+from datetime import datetime, timedelta, timezone
 from typing import Optional
-from jose import JWTError, jwt
-from passlib.context import CryptContext
 from fastapi import HTTPException, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from app.core.config import settings
+from app.core.passwords import password_hasher
+from app.core.revocation import revocation_list
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+ACCESS_TOKEN_TYPE = "access"
+REFRESH_TOKEN_TYPE = "refresh"
 
 # JWT token bearer
 security = HTTPBearer()
@@ -19,32 +20,57 @@ security = HTTPBearer()
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash."""
-    return pwd_context.verify(plain_password, hashed_password)
+    return password_hasher.verify(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
-    """Generate password hash."""
-    return pwd_context.hash(password)
+    """Generate password hash under the current hashing policy."""
+    return password_hasher.hash(password)
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
-    """Create JWT access token."""
+    """Create JWT access token with a unique jti so it can be revoked."""
+    from jose import jwt
+
     to_encode = data.copy()
+    now = datetime.utcnow()
     if expires_delta:
-        expire = datetime.utcnow() + expires_delta
+        expire = now + expires_delta
     else:
-        expire = datetime.utcnow() + timedelta(minutes=settings.access_token_expire_minutes)
+        expire = now + timedelta(minutes=settings.access_token_expire_minutes)
     
-    to_encode.update({"exp": expire})
+    to_encode.update({
+        "exp": expire,
+        # Sub-second issue time (NumericDate may be fractional), so a token issued right
+        # after a user-wide revocation is never mistaken for one issued before it
+        "iat": now.replace(tzinfo=timezone.utc).timestamp(),
+        "jti": uuid.uuid4().hex,
+        "type": ACCESS_TOKEN_TYPE,
+    })
     encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
     return encoded_jwt
 
 
-def verify_token(token: str) -> dict:
-    """Verify and decode JWT token."""
+def create_refresh_token(user_id: int, jti: str, family_id: str, expires_at: datetime) -> str:
+    """Create JWT refresh token; its jti is tracked in the refresh_tokens table."""
+    from jose import jwt
+
+    to_encode = {
+        "sub": str(user_id),
+        "exp": expires_at,
+        "jti": jti,
+        "fam": family_id,
+        "type": REFRESH_TOKEN_TYPE,
+    }
+    return jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
+
+
+def verify_token(token: str, token_type: str = ACCESS_TOKEN_TYPE) -> dict:
+    """Verify and decode JWT token of the expected type."""
+    from jose import JWTError, jwt
+
     try:
         payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
-        return payload
     except JWTError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -52,18 +78,30 @@ def verify_token(token: str) -> dict:
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    # Tokens issued before refresh tokens existed carry no type and are access tokens
+    if payload.get("type", ACCESS_TOKEN_TYPE) != token_type:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return payload
+
 
-def get_current_user_id(credentials: HTTPAuthorizationCredentials = Depends(security)) -> int:
-    """Extract current user ID from JWT token."""
-    token = credentials.credentials
-    payload = verify_token(token)
-    
-    user_id: int = payload.get("sub")
-    if user_id is None:
+def get_token_payload(credentials: HTTPAuthorizationCredentials = Depends(security)) -> dict:
+    """Verify the bearer access token and check it against the in-memory revocation list."""
+    payload = verify_token(credentials.credentials)
+
+    user_id = payload.get("sub")
+    if user_id is None or revocation_list.is_revoked(payload.get("jti"), int(user_id), payload.get("iat")):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    
-    return int(user_id)
+    return payload
+
+
+def get_current_user_id(payload: dict = Depends(get_token_payload)) -> int:
+    """Extract current user ID from JWT token."""
+    return int(payload["sub"])
@@ -0,0 +1,79 @@
+"""
+Conditional GET support (ETag / Last-Modified / 304 Not Modified).
+
+Endpoints first run a cheap version query (typically max(updated_at) and a
+row count), and only load and serialize the full resource when the client's
+cached copy is stale.
+"""
+
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Callable, Dict, Optional
+from fastapi import Request
+from fastapi.responses import Response
+
+# Cache-Control policies per resource kind
+CACHE_PRIVATE = "private, no-cache"                  # per-user data: always revalidate
+CACHE_CATALOG = "public, max-age=60, must-revalidate"  # shared catalog data
+CACHE_IMAGE = "private, max-age=300"                 # rendered images (strong ETag)
+
+
+def make_etag(*version: Any) -> str:
+    """Weak ETag derived from the resource's version parts (e.g. kind, id, updated_at, count)."""
+    digest = hashlib.blake2b(repr(version).encode(), digest_size=12).hexdigest()
+    return f'W/"{digest}"'
+
+
+def _http_date(value: datetime) -> str:
+    """Format a naive UTC timestamp (as stored in the DB) as an HTTP date."""
+    return format_datetime(value.replace(tzinfo=timezone.utc, microsecond=0), usegmt=True)
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison: ignore W/ prefixes
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag.removeprefix("W/") in tags
+
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime]) -> bool:
+    """Evaluate If-None-Match, falling back to If-Modified-Since when it is absent."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is None or last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return last_modified.replace(tzinfo=timezone.utc, microsecond=0) <= since
+
+
+def conditional_response(
+    request: Request,
+    etag: str,
+    last_modified: Optional[datetime],
+    cache_control: str,
+    build: Callable[..., Response],
+) -> Response:
+    """
+    Return 304 if the client's copy is current, otherwise call build() for the
+    full response. Validators are set on both.
+    """
+    headers: Dict[str, str] = {"ETag": etag, "Cache-Control": cache_control}
+    if last_modified is not None:
+        headers["Last-Modified"] = _http_date(last_modified)
+
+    if is_not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+
+    response = build()
+    response.headers.update(headers)
+    return response
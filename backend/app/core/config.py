@@ -3,42 +3,242 @@ Configuration settings for the FastAPI application.
 """
 
 import os
-from typing import List
-from dotenv import load_dotenv
+import tempfile
+from functools import lru_cache
+from typing import Any, Dict, List
 
-# Load environment variables from .env file
-load_dotenv(override=True)
+# Relative paths in settings resolve against the backend directory
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Cold import budget for main:app: about 1.5x the measured baseline (~1.2 s), so regressions fail CI
+DEFAULT_STARTUP_IMPORT_BUDGET_MS = 1800
 
 
 class Settings:
     """Application settings."""
-    
-    # Basic app info
-    app_name: str = os.getenv("APP_NAME")
-    debug: bool = os.getenv("DEBUG", "false").lower() == "true"
-    environment: str = os.getenv("ENVIRONMENT")
-    
-    # Security
-    secret_key: str = os.getenv("SECRET_KEY")
-    algorithm: str = os.getenv("ALGORITHM")
-    access_token_expire_minutes: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES"))
-    
-    # Google OAuth
-    google_client_id: str = os.getenv("GOOGLE_CLIENT_ID")
-    google_client_secret: str = os.getenv("GOOGLE_CLIENT_SECRET")
-    google_redirect_uri: str = os.getenv("GOOGLE_REDIRECT_URI")
-    
-    # Database
-    database_url: str = os.getenv("DATABASE_URL")
-    
-    # CORS
-    allowed_origins: str = os.getenv("ALLOWED_ORIGINS")
-    
+
+    def __init__(self):
+        # Basic app info
+        self.app_name: str = os.getenv("APP_NAME")
+        self.debug: bool = os.getenv("DEBUG", "false").lower() == "true"
+        self.environment: str = os.getenv("ENVIRONMENT")
+
+        # Security
+        self.secret_key: str = os.getenv("SECRET_KEY")
+        self.algorithm: str = os.getenv("ALGORITHM")
+        self.access_token_expire_minutes: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES"))
+        self.refresh_token_expire_days: int = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "30"))
+        # How often each worker pulls new entries into its in-memory revocation list
+        self.revocation_sync_seconds: float = float(os.getenv("REVOCATION_SYNC_SECONDS", "5"))
+        # Live role checks (require_role(..., live=True)) reuse a DB lookup for this long
+        self.permission_cache_ttl_seconds: float = float(os.getenv("PERMISSION_CACHE_TTL_SECONDS", "30"))
+        self.permission_cache_max_entries: int = int(os.getenv("PERMISSION_CACHE_MAX_ENTRIES", "10000"))
+        # Password hashing policy (see scripts/calibrate_password_hash.py): scheme is bcrypt or argon2
+        # (needs argon2-cffi). Hashes made under another scheme or cost are upgraded on login.
+        self.password_hash_scheme: str = os.getenv("PASSWORD_HASH_SCHEME", "bcrypt")
+        self.password_hash_target_ms: float = float(os.getenv("PASSWORD_HASH_TARGET_MS", "250"))
+        self.password_bcrypt_rounds: int = int(os.getenv("PASSWORD_BCRYPT_ROUNDS", "12"))
+        self.password_argon2_time_cost: int = int(os.getenv("PASSWORD_ARGON2_TIME_COST", "3"))
+        self.password_argon2_memory_kib: int = int(os.getenv("PASSWORD_ARGON2_MEMORY_KIB", "65536"))
+        self.password_argon2_parallelism: int = int(os.getenv("PASSWORD_ARGON2_PARALLELISM", "2"))
+
+        # Google OAuth
+        self.google_client_id: str = os.getenv("GOOGLE_CLIENT_ID")
+        self.google_client_secret: str = os.getenv("GOOGLE_CLIENT_SECRET")
+        self.google_redirect_uri: str = os.getenv("GOOGLE_REDIRECT_URI")
+
+        # Database
+        self.database_url: str = os.getenv("DATABASE_URL")
+        self.db_pool_size: int = int(os.getenv("DB_POOL_SIZE", "10"))
+        self.db_max_overflow: int = int(os.getenv("DB_MAX_OVERFLOW", "5"))
+        self.db_pool_timeout: int = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+        # Postgres max_connections, and connections kept free for admin/migrations
+        self.db_max_connections: int = int(os.getenv("DB_MAX_CONNECTIONS", "100"))
+        self.db_reserved_connections: int = int(os.getenv("DB_RESERVED_CONNECTIONS", "10"))
+        # SQLite (DATABASE_URL=sqlite:///path.db): wait for the write lock, page cache and mmap sizes per connection
+        self.sqlite_busy_timeout_seconds: float = float(os.getenv("SQLITE_BUSY_TIMEOUT_SECONDS", "5"))
+        self.sqlite_cache_kib: int = int(os.getenv("SQLITE_CACHE_KIB", "65536"))
+        self.sqlite_mmap_bytes: int = int(os.getenv("SQLITE_MMAP_BYTES", str(256 * 1024 * 1024)))
+
+        # Migrations (alembic): how long DDL may wait for a table lock before it fails (and is
+        # retried by with_lock_retry), backfill batch size and pause, see app.core.migrations
+        self.migration_lock_timeout_ms: int = int(os.getenv("MIGRATION_LOCK_TIMEOUT_MS", "3000"))
+        self.migration_lock_retries: int = int(os.getenv("MIGRATION_LOCK_RETRIES", "5"))
+        self.migration_backfill_batch_size: int = int(os.getenv("MIGRATION_BACKFILL_BATCH_SIZE", "5000"))
+        self.migration_backfill_pause_seconds: float = float(os.getenv("MIGRATION_BACKFILL_PAUSE_SECONDS", "0.1"))
+
+        # Read replicas (comma-separated URLs; empty = all reads on the primary)
+        self.database_replica_urls: str = os.getenv("DATABASE_REPLICA_URLS", "")
+        self.replica_health_check_seconds: float = float(os.getenv("REPLICA_HEALTH_CHECK_SECONDS", "5"))
+        # Bounded staleness: max replica lag, and read-your-writes window after a write
+        self.replica_max_lag_seconds: float = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "5"))
+
+        # Tenant shards ("name=url" pairs, comma-separated); tenants without a
+        # directory entry live on the primary. Directory lookups are cached per process.
+        self.database_shard_urls: str = os.getenv("DATABASE_SHARD_URLS", "")
+        self.tenant_directory_ttl_seconds: float = float(os.getenv("TENANT_DIRECTORY_TTL_SECONDS", "30"))
+        self.tenant_directory_max_entries: int = int(os.getenv("TENANT_DIRECTORY_MAX_ENTRIES", "100000"))
+        # Ledger ids are unique across databases: the n-th shard in DATABASE_SHARD_URLS
+        # allocates from the n-th block of this many ids counted down from the top of the
+        # integer range, the primary from 1 up to the lowest block (append new shards)
+        self.shard_id_block_size: int = int(os.getenv("SHARD_ID_BLOCK_SIZE", "100000000"))
+
+        # Idempotency-Key store (per process)
+        self.idempotency_ttl_seconds: float = float(os.getenv("IDEMPOTENCY_TTL_SECONDS", "3600"))
+        self.idempotency_max_entries: int = int(os.getenv("IDEMPOTENCY_MAX_ENTRIES", "10000"))
+        # How long a duplicate waits for the in-flight original before getting 409
+        self.idempotency_wait_seconds: float = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", "10"))
+
+        # Customer wallet cache (per process; invalidated on the user's ledger writes)
+        self.wallet_cache_ttl_seconds: float = float(os.getenv("WALLET_CACHE_TTL_SECONDS", "30"))
+        self.wallet_cache_max_entries: int = int(os.getenv("WALLET_CACHE_MAX_ENTRIES", "10000"))
+
+        # Leaderboards (per process): customers kept per board, pending-update and full resync intervals
+        self.leaderboard_size: int = int(os.getenv("LEADERBOARD_SIZE", "1000"))
+        self.leaderboard_refresh_seconds: float = float(os.getenv("LEADERBOARD_REFRESH_SECONDS", "1"))
+        self.leaderboard_resync_seconds: float = float(os.getenv("LEADERBOARD_RESYNC_SECONDS", "300"))
+
+        # Live event feed (SSE): per-client buffer, keepalive and LISTEN connection ping intervals
+        self.event_queue_size: int = int(os.getenv("EVENT_QUEUE_SIZE", "100"))
+        self.event_heartbeat_seconds: float = float(os.getenv("EVENT_HEARTBEAT_SECONDS", "15"))
+        self.event_ping_seconds: float = float(os.getenv("EVENT_PING_SECONDS", "30"))
+        self.event_max_subscribers: int = int(os.getenv("EVENT_MAX_SUBSCRIBERS", "10000"))
+
+        # QR status long polling: parked requests per process before falling back to plain polling
+        self.qr_wait_max_waiters: int = int(os.getenv("QR_WAIT_MAX_WAITERS", "10000"))
+
+        # QR image rendering: on-disk cache and its size cap, in-memory LRU budget, batch pool size (0 = auto)
+        self.qr_image_cache_dir: str = os.path.join(
+            BACKEND_DIR, os.getenv("QR_IMAGE_CACHE_DIR") or os.path.join(tempfile.gettempdir(), "qr-images")
+        )
+        self.qr_image_disk_cache_bytes: int = int(os.getenv("QR_IMAGE_DISK_CACHE_BYTES", str(1024 * 1024 * 1024)))
+        self.qr_image_cache_bytes: int = int(os.getenv("QR_IMAGE_CACHE_BYTES", str(64 * 1024 * 1024)))
+        self.qr_render_processes: int = int(os.getenv("QR_RENDER_PROCESSES", "0"))
+        self.qr_render_batch_max: int = int(os.getenv("QR_RENDER_BATCH_MAX", "5000"))
+
+        # Offline scan sync: scans accepted per batch upload, oldest scan time accepted
+        self.scan_sync_max_batch: int = int(os.getenv("SCAN_SYNC_MAX_BATCH", "1000"))
+        self.scan_sync_max_offline_seconds: int = int(os.getenv("SCAN_SYNC_MAX_OFFLINE_SECONDS", "259200"))
+
+        # Bulk customer import (CSV): rows per batch/transaction, upload size limit
+        self.customer_import_batch_size: int = int(os.getenv("CUSTOMER_IMPORT_BATCH_SIZE", "5000"))
+        self.customer_import_max_bytes: int = int(os.getenv("CUSTOMER_IMPORT_MAX_BYTES", str(100 * 1024 * 1024)))
+
+        # Program schedule (per process): boundary timer tick, incremental refresh and full resync intervals
+        self.program_schedule_tick_seconds: float = float(os.getenv("PROGRAM_SCHEDULE_TICK_SECONDS", "1"))
+        self.program_schedule_refresh_seconds: float = float(os.getenv("PROGRAM_SCHEDULE_REFRESH_SECONDS", "5"))
+        self.program_schedule_resync_seconds: float = float(os.getenv("PROGRAM_SCHEDULE_RESYNC_SECONDS", "600"))
+        # Each refresh re-reads programs updated this long before its watermark: updated_at is set
+        # by the application before commit, so the window must cover the longest program write
+        # transaction and clock skew between web hosts
+        self.program_schedule_refresh_overlap_seconds: float = float(
+            os.getenv("PROGRAM_SCHEDULE_REFRESH_OVERLAP_SECONDS", "60")
+        )
+
+        # POS receipt batches: receipts per batch, points rounding (down, half_up or up)
+        self.receipt_batch_max: int = int(os.getenv("RECEIPT_BATCH_MAX", "10000"))
+        self.accrual_rounding: str = os.getenv("ACCRUAL_ROUNDING", "down")
+
+        # Velocity checks on scans (per-process counters): rules as comma-separated
+        # name=scope:activity:limit/window_seconds, see app.services.velocity.parse_rules.
+        # With enforce off, broken rules are only logged.
+        self.velocity_rules: str = os.getenv("VELOCITY_RULES", (
+            "worker_user_earn=worker_user:earned:20/3600,"
+            "user_redeem_spread=user_establishments:redeemed:3/600,"
+            "worker_scans=worker:any:600/3600"
+        ))
+        self.velocity_enforce: bool = os.getenv("VELOCITY_ENFORCE", "true").lower() == "true"
+        self.velocity_bucket_seconds: int = int(os.getenv("VELOCITY_BUCKET_SECONDS", "60"))
+        self.velocity_resync_seconds: float = float(os.getenv("VELOCITY_RESYNC_SECONDS", "300"))
+
+        # QR code archival: age threshold, chunk size, pause between chunks, chunks per run, run interval
+        self.qr_archive_after_days: int = int(os.getenv("QR_ARCHIVE_AFTER_DAYS", "30"))
+        self.qr_archive_chunk_size: int = int(os.getenv("QR_ARCHIVE_CHUNK_SIZE", "1000"))
+        self.qr_archive_pause_seconds: float = float(os.getenv("QR_ARCHIVE_PAUSE_SECONDS", "0.5"))
+        self.qr_archive_max_chunks: int = int(os.getenv("QR_ARCHIVE_MAX_CHUNKS", "100"))
+        self.qr_archive_interval_seconds: float = float(os.getenv("QR_ARCHIVE_INTERVAL_SECONDS", "3600"))
+
+        # Maintenance job scheduler (one leader per cluster, see app.core.scheduler): how often
+        # other workers try to take over, and how long running jobs get on shutdown
+        self.scheduler_enabled: bool = os.getenv("SCHEDULER_ENABLED", "true").lower() == "true"
+        self.scheduler_election_seconds: float = float(os.getenv("SCHEDULER_ELECTION_SECONDS", "15"))
+        self.scheduler_shutdown_seconds: float = float(os.getenv("SCHEDULER_SHUTDOWN_SECONDS", "20"))
+        self.otp_cleanup_interval_seconds: float = float(os.getenv("OTP_CLEANUP_INTERVAL_SECONDS", "3600"))
+        self.token_purge_interval_seconds: float = float(os.getenv("TOKEN_PURGE_INTERVAL_SECONDS", "3600"))
+        # Point expiry (LoyaltyProgram.point_expiry_days): cron schedule (UTC) and balances per transaction
+        self.point_expiry_cron: str = os.getenv("POINT_EXPIRY_CRON", "15 3 * * *")
+        self.point_expiry_chunk_size: int = int(os.getenv("POINT_EXPIRY_CHUNK_SIZE", "1000"))
+
+        # CORS
+        self.allowed_origins: str = os.getenv("ALLOWED_ORIGINS")
+
+        # Server (production launcher, see application.py)
+        self.host: str = os.getenv("HOST", "0.0.0.0")
+        self.port: int = int(os.getenv("PORT", "8000"))
+        self.web_concurrency: int = int(os.getenv("WEB_CONCURRENCY", "0"))  # 0 = one worker per CPU
+        self.keepalive_seconds: int = int(os.getenv("KEEPALIVE_SECONDS", "75"))
+        self.backlog: int = int(os.getenv("BACKLOG", "2048"))
+        self.graceful_timeout_seconds: int = int(os.getenv("GRACEFUL_TIMEOUT_SECONDS", "30"))
+
+        # Logging: level, json or text records, optional file next to stdout; records buffered for the
+        # writer thread (below WARNING they are dropped when it is full). Access log sampled per path
+        # prefix ("prefix=rate", comma-separated); 5xx and slow requests are always logged.
+        self.log_level: str = os.getenv("LOG_LEVEL", "INFO").upper()
+        self.log_format: str = os.getenv("LOG_FORMAT", "json")
+        self.log_file: str = os.getenv("LOG_FILE", "")
+        self.log_queue_size: int = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+        self.access_log: bool = os.getenv("ACCESS_LOG", "true").lower() == "true"
+        self.access_log_sample_rates: str = os.getenv(
+            "ACCESS_LOG_SAMPLE_RATES", "/health=0,/api/v1/wallet=0.1,/api/v1/qr/=0.1"
+        )
+        self.access_log_slow_ms: float = float(os.getenv("ACCESS_LOG_SLOW_MS", "1000"))
+
+        # Startup
+        self.startup_import_budget_ms: int = int(
+            os.getenv("STARTUP_IMPORT_BUDGET_MS", str(DEFAULT_STARTUP_IMPORT_BUDGET_MS))
+        )
+
     @property
     def allowed_origins_list(self) -> List[str]:
         """Convert comma-separated string to list."""
         return [origin.strip() for origin in self.allowed_origins.split(",")]
 
+    @property
+    def database_is_sqlite(self) -> bool:
+        """True for the embedded single-site mode (DATABASE_URL=sqlite:///...)."""
+        return (self.database_url or "").startswith("sqlite")
+
+    @property
+    def database_replica_urls_list(self) -> List[str]:
+        """Convert comma-separated replica URLs to list."""
+        return [url.strip() for url in self.database_replica_urls.split(",") if url.strip()]
+
+    @property
+    def database_shard_urls_map(self) -> Dict[str, str]:
+        """Convert comma-separated name=url shard pairs to a dict."""
+        pairs = (item.split("=", 1) for item in self.database_shard_urls.split(",") if item.strip())
+        return {name.strip(): url.strip() for name, url in pairs}
+
+
+@lru_cache()
+def get_settings() -> Settings:
+    """
+    Load environment variables from the .env file and build the settings.
+    Runs once, on first use, instead of at import time.
+    """
+    from dotenv import load_dotenv
+
+    # Values already in the environment win, e.g. WEB_CONCURRENCY set by the launcher
+    load_dotenv(override=False)
+    return Settings()
+
+
+class _LazySettings:
+    """Proxy that defers loading settings until an attribute is first read."""
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(get_settings(), name)
+
 
 # Global settings instance
-settings = Settings()
+settings = _LazySettings()
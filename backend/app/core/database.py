@@ -1,32 +1,414 @@
 """
 Database configuration and connection setup.
+
+Writes always go to the primary (get_db). Read-only endpoints can use
+get_read_db, which routes to a healthy read replica unless the client has
+written recently (read-your-writes, see WRITE_TOKEN_HEADER).
+
+The primary is normally PostgreSQL; single-site installs and CI can use an
+embedded SQLite database in WAL mode instead (see _create_sqlite_engine).
 """
 
-from sqlalchemy import create_engine
+import itertools
+import time
+from typing import Dict, List, Optional, Tuple
+from fastapi import Request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 from app.core.config import settings
 
-# Create SQLAlchemy engine
-engine = create_engine(
-    settings.database_url,
-    echo=settings.debug,  # Log SQL queries in debug mode
-    pool_pre_ping=True,   # Verify connections before use
-    pool_recycle=300      # Recycle connections every 5 minutes
-)
+# Response header carrying the time (epoch ms) of the client's last committed
+# write; clients echo it back so their reads skip replicas that may lag behind.
+WRITE_TOKEN_HEADER = "X-Write-Token"
+
+# Engine is created on application startup (see init_engine), not at import
+_engine: Optional[Engine] = None
+# The primary engine for read-only sessions (deferred transactions on SQLite)
+_read_engine: Optional[Engine] = None
+
+# Execution option marking read-only SQLite connections (see _create_sqlite_engine)
+SQLITE_READ_ONLY = "sqlite_read_only"
 
-# Create SessionLocal class
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Create SessionLocal class; bound to the engine by init_engine()
+SessionLocal = sessionmaker(autocommit=False, autoflush=False)
 
 # Create Base class for models
 Base = declarative_base()
 
+
+class ReplicaPool:
+    """
+    Round-robin selection over read replicas that passed the last health check.
+    A replica is unhealthy if it is unreachable or lags the primary by more
+    than replica_max_lag_seconds.
+    """
+
+    # Replication lag in seconds; 0 when fully replayed or not a standby
+    LAG_QUERY = (
+        "SELECT CASE WHEN NOT pg_is_in_recovery() "
+        "OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+        "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+    )
+
+    def __init__(self):
+        self.engines: List[Engine] = []
+        self.healthy: List[Engine] = []
+        self._counter = itertools.count()
+
+    def configure(self, engines: List[Engine]) -> None:
+        """Replace the replica engines; all start out healthy until checked."""
+        self.engines = engines
+        self.healthy = list(engines)
+
+    def choose(self) -> Optional[Engine]:
+        """Pick the next healthy replica, or None if there is none."""
+        healthy = self.healthy
+        if not healthy:
+            return None
+        return healthy[next(self._counter) % len(healthy)]
+
+    def check_health(self) -> None:
+        """Probe every replica and refresh the healthy list (blocking)."""
+        healthy = []
+        for replica in self.engines:
+            try:
+                with replica.connect() as connection:
+                    if replica.dialect.name == "postgresql":
+                        lag = float(connection.exec_driver_sql(self.LAG_QUERY).scalar() or 0)
+                    else:
+                        connection.exec_driver_sql("SELECT 1")
+                        lag = 0.0
+            except Exception:
+                continue
+            if lag <= settings.replica_max_lag_seconds:
+                healthy.append(replica)
+        self.healthy = healthy
+
+    def dispose(self) -> None:
+        for replica in self.engines:
+            replica.dispose()
+        self.configure([])
+
+
+replica_pool = ReplicaPool()
+
+
+# Name of the primary database when used as a tenant shard
+DEFAULT_SHARD = "default"
+
+
+class ShardRegistry:
+    """Engines for the tenant shards, by name; DEFAULT_SHARD is the primary."""
+
+    def __init__(self):
+        self.engines: Dict[str, Engine] = {}
+        self.read_engines: Dict[str, Engine] = {}
+
+    def configure(self, engines: Dict[str, Engine]) -> None:
+        self.engines = engines
+        self.read_engines = {
+            name: shard.execution_options(**{SQLITE_READ_ONLY: True}) if shard.dialect.name == "sqlite" else shard
+            for name, shard in engines.items()
+        }
+
+    @property
+    def names(self) -> List[str]:
+        return [DEFAULT_SHARD, *self.engines]
+
+    def engine(self, name: str) -> Engine:
+        if name == DEFAULT_SHARD:
+            return get_engine()
+        try:
+            return self.engines[name]
+        except KeyError:
+            raise LookupError(f"Unknown database shard {name!r}") from None
+
+    def read_engine(self, name: str) -> Engine:
+        """Engine for read-only sessions on a shard (on SQLite, no write lock)."""
+        if name == DEFAULT_SHARD:
+            return get_read_engine()
+        self.engine(name)
+        return self.read_engines[name]
+
+    def dispose(self) -> None:
+        for shard in self.engines.values():
+            shard.dispose()
+        self.configure({})
+
+
+shard_registry = ShardRegistry()
+
+
+# Connections each worker opens to a database outside its pool: the LISTEN connection
+# (app.core.events, one per shard too) and the scheduler's advisory lock connection
+# (app.core.scheduler, primary only)
+DEDICATED_CONNECTIONS_PER_WORKER = 2
+
+
+def get_pool_limits() -> Tuple[int, int]:
+    """
+    Return (pool_size, max_overflow) for this worker process.
+    Pools are shrunk so that workers x (pool_size + max_overflow + dedicated
+    connections) stays within Postgres max_connections minus the reserved connections.
+    """
+    workers = max(1, settings.web_concurrency)
+    budget = max(1, (settings.db_max_connections - settings.db_reserved_connections) // workers
+                 - DEDICATED_CONNECTIONS_PER_WORKER)
+    pool_size = max(1, min(settings.db_pool_size, budget))
+    max_overflow = max(0, min(settings.db_max_overflow, budget - pool_size))
+    return pool_size, max_overflow
+
+
+def _create_sqlite_engine(url: str) -> Engine:
+    """
+    SQLite in WAL mode: readers never block the writer or each other, and
+    there is one writer at a time. Write transactions start with
+    BEGIN IMMEDIATE, so a writer queues for the lock up front (busy timeout)
+    instead of failing when it upgrades a read; read-only sessions use a
+    deferred BEGIN (see get_read_engine).
+    """
+    from sqlalchemy import create_engine
+    from sqlalchemy.pool import StaticPool
+
+    if make_url(url).database in (None, "", ":memory:"):
+        # A single shared connection; each new one would open its own empty database
+        options = {"poolclass": StaticPool}
+    else:
+        options = {
+            "pool_size": settings.db_pool_size,
+            "max_overflow": settings.db_max_overflow,
+            "pool_timeout": settings.db_pool_timeout,
+        }
+    engine = create_engine(
+        url,
+        echo=settings.debug,
+        connect_args={"check_same_thread": False, "timeout": settings.sqlite_busy_timeout_seconds},
+        **options,
+    )
+
+    @event.listens_for(engine, "connect")
+    def _configure_connection(dbapi_connection, connection_record):
+        # Transactions are begun by _begin below, not implicitly by the driver
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        for pragma in (
+            "journal_mode = WAL",
+            # With WAL, a power loss may drop the last commits but never corrupts the database
+            "synchronous = NORMAL",
+            "foreign_keys = ON",
+            f"busy_timeout = {int(settings.sqlite_busy_timeout_seconds * 1000)}",
+            f"cache_size = -{settings.sqlite_cache_kib}",
+            f"mmap_size = {settings.sqlite_mmap_bytes}",
+            "temp_store = MEMORY",
+        ):
+            cursor.execute(f"PRAGMA {pragma}")
+        cursor.close()
+
+    @event.listens_for(engine, "begin")
+    def _begin(connection):
+        read_only = connection.get_execution_options().get(SQLITE_READ_ONLY, False)
+        connection.exec_driver_sql("BEGIN" if read_only else "BEGIN IMMEDIATE")
+
+    return engine
+
+
+def _create_sqlite_schema(engine: Engine) -> None:
+    """Create missing tables from the models (the Alembic migrations target PostgreSQL)."""
+    import app.models  # noqa: F401  (registers every table)
+
+    Base.metadata.create_all(engine)
+
+
+def _create_engine(url: str) -> Engine:
+    from sqlalchemy import create_engine
+
+    if make_url(url).get_backend_name() == "sqlite":
+        return _create_sqlite_engine(url)
+    pool_size, max_overflow = get_pool_limits()
+    return create_engine(
+        url,
+        echo=settings.debug,  # Log SQL queries in debug mode
+        pool_pre_ping=True,   # Verify connections before use
+        pool_recycle=300,     # Recycle connections every 5 minutes
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+    )
+
+
+def init_engine() -> Engine:
+    """
+    Create the primary, replica and shard engines and bind SessionLocal to the primary.
+    Called from the FastAPI lifespan; safe to call more than once.
+    """
+    global _engine, _read_engine
+    if _engine is None:
+        _engine = _create_engine(settings.database_url)
+        _read_engine = _engine
+        if _engine.dialect.name == "sqlite":
+            _create_sqlite_schema(_engine)
+            _read_engine = _engine.execution_options(**{SQLITE_READ_ONLY: True})
+        SessionLocal.configure(bind=_engine)
+        replica_pool.configure([_create_engine(url) for url in settings.database_replica_urls_list])
+        shard_registry.configure({
+            name: _create_engine(url) for name, url in settings.database_shard_urls_map.items()
+        })
+    return _engine
+
+
+def get_engine() -> Engine:
+    """Return the engine, creating it on first use outside the app lifespan."""
+    return _engine if _engine is not None else init_engine()
+
+
+def get_read_engine() -> Engine:
+    """The primary engine for read-only sessions."""
+    get_engine()
+    return _read_engine
+
+
+def dispose_engine() -> None:
+    """Close all pooled connections on application shutdown."""
+    global _engine, _read_engine
+    if _engine is not None:
+        _engine.dispose()
+        _engine = None
+        _read_engine = None
+    replica_pool.dispose()
+    shard_registry.dispose()
+
+
+def __getattr__(name: str):
+    # Backwards compatible access to `app.core.database.engine`
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def assert_primary_session(db: Session) -> None:
+    """Guard for code paths that must never run on a replica session."""
+    if db.info.get("read_only"):
+        raise RuntimeError("This operation requires a primary database session")
+
+
+@event.listens_for(Session, "before_flush")
+def _block_read_only_flush(session, flush_context, instances):
+    if session.info.get("read_only") and (session.new or session.dirty or session.deleted):
+        raise RuntimeError("Attempted to write through a read-only (replica) session")
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_flush_write(session, flush_context):
+    session.info["has_writes"] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _mark_statement_write(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info["has_writes"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _record_committed_write(session):
+    if session.info.pop("has_writes", False):
+        request_state = session.info.get("request_state")
+        if request_state is not None:
+            request_state.last_write_ms = int(time.time() * 1000)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back_write(session):
+    session.info.pop("has_writes", None)
+
+
+def wrote_recently(request: Request) -> bool:
+    """True if this request or the client's write token is within the staleness bound."""
+    window_ms = settings.replica_max_lag_seconds * 1000
+    now_ms = time.time() * 1000
+    if now_ms - getattr(request.state, "last_write_ms", 0) < window_ms:
+        return True
+    try:
+        token_ms = int(request.headers.get(WRITE_TOKEN_HEADER, "0"))
+    except ValueError:
+        return False
+    return now_ms - token_ms < window_ms
+
+
+class WriteTokenMiddleware:
+    """ASGI middleware that returns WRITE_TOKEN_HEADER after a committed write."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_token(message):
+            if message["type"] == "http.response.start":
+                last_write_ms = scope.get("state", {}).get("last_write_ms")
+                if last_write_ms:
+                    headers = list(message.get("headers", []))
+                    headers.append((WRITE_TOKEN_HEADER.lower().encode(), str(last_write_ms).encode()))
+                    message["headers"] = headers
+            await send(message)
+
+        await self.app(scope, receive, send_with_token)
+
+
 # Dependency to get database session
-def get_db():
+def get_db(request: Request = None):
     """
-    Database session dependency for FastAPI.
+    Database session dependency for FastAPI (primary, read-write).
     """
+    if _engine is None:
+        init_engine()
     db = SessionLocal()
+    if request is not None:
+        db.info["request_state"] = request.state
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def open_read_session(shard: str = DEFAULT_SHARD) -> Session:
+    """
+    Short-lived read-only session on the primary or a shard, for background
+    loaders: on SQLite it starts a deferred transaction instead of taking
+    the write lock.
+    """
+    db = SessionLocal(bind=shard_registry.read_engine(shard))
+    db.info["read_only"] = True
+    return db
+
+
+def get_read_db(request: Request):
+    """
+    Read-only session dependency. Uses a healthy replica, falling back to the
+    primary when none is available or the client wrote within the last
+    replica_max_lag_seconds (read-your-writes).
+    """
+    if _engine is None:
+        init_engine()
+    replica = None if wrote_recently(request) else replica_pool.choose()
+    db = SessionLocal(bind=replica or _read_engine)
+    db.info["read_only"] = True
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def get_primary_read_db():
+    """
+    Read-only session on the primary, never a replica: for reads that must
+    not lag behind events already delivered (see app.core.events).
+    """
+    db = open_read_session()
     try:
         yield db
     finally:
@@ -0,0 +1,27 @@
+"""
+SQL that differs between the PostgreSQL and SQLite backends.
+"""
+
+from sqlalchemy import Table, func
+from sqlalchemy.orm import Session
+
+
+def dialect_name(db: Session) -> str:
+    """Database backend of the session's bind ("postgresql" or "sqlite")."""
+    return db.get_bind().dialect.name
+
+
+def upsert(db: Session, table: Table):
+    """INSERT supporting on_conflict_do_update/on_conflict_do_nothing on the session's backend."""
+    if dialect_name(db) == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        from sqlalchemy.dialects.postgresql import insert
+    return insert(table)
+
+
+def greatest(db: Session, column, value):
+    """GREATEST(column, value), ignoring a NULL column as Postgres does."""
+    if dialect_name(db) == "sqlite":
+        return func.max(func.coalesce(column, value), value)
+    return func.greatest(column, value)
@@ -0,0 +1,173 @@
+"""
+Per-process event hub fed by Postgres LISTEN/NOTIFY.
+
+Database triggers (see migration 004, and app.services.shard_schema for tenant
+shards) publish point activity and QR code redemption events on EVENTS_CHANNEL.
+Each worker process holds one listening connection to the primary and to each
+shard, watched with loop.add_reader so no thread is tied up,
+and fans every payload out in memory to the subscribers of its establishment
+and to internal listeners (cache invalidation, waiters).
+"""
+
+import asyncio
+import logging
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional, Set
+import orjson
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+EVENTS_CHANNEL = "establishment_events"
+
+
+class Subscription:
+    """
+    Bounded queue of raw JSON payloads for one connected client.
+    When the client falls behind, the oldest events are dropped and counted so
+    the stream can tell the client to refetch.
+    """
+
+    def __init__(self, establishment_id: int):
+        self.establishment_id = establishment_id
+        self.queue: "asyncio.Queue[Optional[bytes]]" = asyncio.Queue(maxsize=settings.event_queue_size)
+        self.dropped = 0
+
+    def offer(self, payload: Optional[bytes]) -> None:
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(payload)
+
+
+class EventHub:
+    """One LISTEN connection per database and process, with in-memory fan-out."""
+
+    def __init__(self):
+        self._subscribers: Dict[int, Set[Subscription]] = defaultdict(set)
+        self._listeners: List[Callable[[Dict[str, Any]], None]] = []
+        self._subscriber_count = 0
+        # True while run() is active (PostgreSQL only); otherwise no events ever arrive
+        self.enabled = False
+
+    @property
+    def subscriber_count(self) -> int:
+        return self._subscriber_count
+
+    def add_listener(self, listener: Callable[[Dict[str, Any]], None]) -> None:
+        """Register an in-process callback for every event (runs on the event loop; keep it cheap)."""
+        self._listeners.append(listener)
+
+    def subscribe(self, establishment_id: int) -> Subscription:
+        subscription = Subscription(establishment_id)
+        self._subscribers[establishment_id].add(subscription)
+        self._subscriber_count += 1
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscribers = self._subscribers.get(subscription.establishment_id)
+        if subscribers is not None and subscription in subscribers:
+            subscribers.discard(subscription)
+            self._subscriber_count -= 1
+            if not subscribers:
+                del self._subscribers[subscription.establishment_id]
+
+    def dispatch(self, payload: str) -> None:
+        """Deliver one NOTIFY payload; subscribers get the raw bytes, not a re-serialization."""
+        try:
+            event = orjson.loads(payload)
+            establishment_id = event["establishment_id"]
+        except (orjson.JSONDecodeError, KeyError, TypeError):
+            logger.warning("Ignoring malformed event payload: %.200s", payload)
+            return
+
+        for listener in self._listeners:
+            try:
+                listener(event)
+            except Exception:
+                logger.exception("Event listener %s failed", getattr(listener, "__qualname__", listener))
+
+        data = payload.encode()
+        for subscription in self._subscribers.get(establishment_id, ()):
+            subscription.offer(data)
+
+    def _connect(self, shard: str):
+        """Open a dedicated DBAPI connection (outside the pool) to a shard and LISTEN on it."""
+        from app.core.database import shard_registry
+
+        engine = shard_registry.engine(shard)
+        cargs, cparams = engine.dialect.create_connect_args(engine.url)
+        connection = engine.dialect.dbapi.connect(*cargs, **cparams)
+        connection.autocommit = True
+        with connection.cursor() as cursor:
+            cursor.execute(f"LISTEN {EVENTS_CHANNEL}")
+        return connection
+
+    def _on_readable(self, connection, lost: asyncio.Future) -> None:
+        try:
+            connection.poll()
+        except Exception as exc:
+            if not lost.done():
+                lost.set_exception(exc)
+            return
+        notifies = connection.notifies
+        while notifies:
+            self.dispatch(notifies.pop(0).payload)
+
+    def _ping(self, connection, lost: asyncio.Future) -> None:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+        self._on_readable(connection, lost)
+
+    async def run(self) -> None:
+        """Listen on the primary and every PostgreSQL shard until cancelled."""
+        from app.core.database import shard_registry
+
+        shards = [name for name in shard_registry.names if shard_registry.engine(name).dialect.name == "postgresql"]
+        self.enabled = True
+        try:
+            await asyncio.gather(*(self._listen(shard) for shard in shards))
+        finally:
+            self.enabled = False
+
+    async def _listen(self, shard: str) -> None:
+        """Keep one shard's LISTEN connection alive until cancelled, reconnecting on failure."""
+        from starlette.concurrency import run_in_threadpool
+
+        loop = asyncio.get_running_loop()
+        while True:
+            connection = None
+            try:
+                connection = await run_in_threadpool(self._connect, shard)
+                lost = loop.create_future()
+                loop.add_reader(connection.fileno(), self._on_readable, connection, lost)
+                logger.info("Listening for events on %s (shard %s)", EVENTS_CHANNEL, shard)
+                while True:
+                    try:
+                        await asyncio.wait_for(asyncio.shield(lost), timeout=settings.event_ping_seconds)
+                    except asyncio.TimeoutError:
+                        # Idle: make sure the connection is still alive
+                        self._ping(connection, lost)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Event listener connection to shard %s lost; reconnecting", shard)
+                await asyncio.sleep(1)
+            finally:
+                if connection is not None:
+                    self._close(connection)
+
+    @staticmethod
+    def _close(connection) -> None:
+        try:
+            asyncio.get_running_loop().remove_reader(connection.fileno())
+        except Exception:
+            pass
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+
+# Per-process instance
+event_hub = EventHub()
@@ -0,0 +1,187 @@
+"""
+Idempotency-Key support for retried POST requests.
+
+The first response for a (user, key) pair is kept in a bounded in-process
+store and replayed for retries, so a retry costs a dict lookup instead of
+re-running the endpoint. A duplicate that arrives while the first request is
+still running waits for its result instead of executing again; if the first
+fails with a server error, one of the waiting duplicates runs it again.
+"""
+
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+import orjson
+from starlette.datastructures import Headers
+from app.core.config import settings
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+# Set on responses served from the store
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+MAX_KEY_LENGTH = 255
+
+
+class StoredResponse(NamedTuple):
+    """A completed response and the fingerprint of the request that produced it."""
+    fingerprint: str
+    status: int
+    headers: List[Tuple[bytes, bytes]]
+    body: bytes
+
+
+class IdempotencyStore:
+    """
+    Bounded LRU of completed responses with a TTL, plus the futures of
+    requests still in flight. Only touched from the event loop, so no locking.
+    """
+
+    def __init__(self):
+        self._responses: "OrderedDict[Tuple[str, str], Tuple[float, StoredResponse]]" = OrderedDict()
+        self.in_flight: Dict[Tuple[str, str], asyncio.Future] = {}
+
+    def get(self, key: Tuple[str, str]) -> Optional[StoredResponse]:
+        entry = self._responses.get(key)
+        if entry is None:
+            return None
+        expires_at, response = entry
+        if expires_at <= time.monotonic():
+            del self._responses[key]
+            return None
+        return response
+
+    def put(self, key: Tuple[str, str], response: StoredResponse) -> None:
+        self._responses[key] = (time.monotonic() + settings.idempotency_ttl_seconds, response)
+        self._responses.move_to_end(key)
+        while len(self._responses) > settings.idempotency_max_entries:
+            self._responses.popitem(last=False)
+
+
+# Per-process instance
+idempotency_store = IdempotencyStore()
+
+
+def _user_scope(headers: Headers) -> Optional[str]:
+    """User id from a valid bearer token, or None for anonymous requests."""
+    authorization = headers.get("authorization", "")
+    if not authorization.lower().startswith("bearer "):
+        return None
+    from fastapi import HTTPException
+    from app.core.auth import verify_token
+
+    try:
+        return verify_token(authorization[7:]).get("sub")
+    except HTTPException:
+        return None
+
+
+async def _read_body(receive) -> bytes:
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            return b"".join(chunks)
+
+
+async def _send_json(send, status: int, detail: str) -> None:
+    body = orjson.dumps({"detail": detail})
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _replay(send, response: StoredResponse) -> None:
+    await send({
+        "type": "http.response.start",
+        "status": response.status,
+        "headers": response.headers + [(REPLAYED_HEADER.lower().encode(), b"true")],
+    })
+    await send({"type": "http.response.body", "body": response.body})
+
+
+class IdempotencyMiddleware:
+    """
+    ASGI middleware applying Idempotency-Key semantics to POSTs on the given paths.
+    Requests without the header are passed through untouched.
+    """
+
+    def __init__(self, app, paths: Iterable[str]):
+        self.app = app
+        self.paths = frozenset(paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        key = headers.get(IDEMPOTENCY_HEADER)
+        if key is None:
+            await self.app(scope, receive, send)
+            return
+        if not key or len(key) > MAX_KEY_LENGTH:
+            await _send_json(send, 400, f"{IDEMPOTENCY_HEADER} must be 1-{MAX_KEY_LENGTH} characters")
+            return
+
+        body = await _read_body(receive)
+        fingerprint = hashlib.sha256(scope["path"].encode() + b"\0" + body).hexdigest()
+        # Anonymous keys are bound to the request body so they can't replay someone else's response
+        store_key = (_user_scope(headers) or f"anon:{fingerprint}", key)
+
+        response = idempotency_store.get(store_key)
+        # An original that failed resolves its waiters with None: the first to wake runs the
+        # request again (registering before its first await), the others wait for that run
+        while response is None and store_key in idempotency_store.in_flight:
+            try:
+                response = await asyncio.wait_for(
+                    asyncio.shield(idempotency_store.in_flight[store_key]),
+                    timeout=settings.idempotency_wait_seconds,
+                )
+            except asyncio.TimeoutError:
+                await _send_json(send, 409, "A request with this Idempotency-Key is still in progress")
+                return
+
+        if response is not None:
+            if response.fingerprint != fingerprint:
+                await _send_json(send, 422, f"{IDEMPOTENCY_HEADER} was already used for a different request")
+            else:
+                await _replay(send, response)
+            return
+
+        await self._run(scope, body, send, store_key, fingerprint)
+
+    async def _run(self, scope, body: bytes, send, store_key: Tuple[str, str], fingerprint: str) -> None:
+        """Run the request once, capturing its response for duplicates and retries."""
+        future = asyncio.get_running_loop().create_future()
+        idempotency_store.in_flight[store_key] = future
+        start = {}
+        chunks = []
+
+        async def receive_body():
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        async def capture(message):
+            if message["type"] == "http.response.start":
+                start.update(message)
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+            await send(message)
+
+        response = None
+        try:
+            await self.app(scope, receive_body, capture)
+            response = StoredResponse(fingerprint, start["status"], list(start.get("headers", [])), b"".join(chunks))
+            # Server errors are neither stored nor handed to waiting duplicates, so they retry
+            if response.status < 500:
+                idempotency_store.put(store_key, response)
+            else:
+                response = None
+        finally:
+            del idempotency_store.in_flight[store_key]
+            future.set_result(response)
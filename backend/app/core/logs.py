@@ -0,0 +1,285 @@
+"""
+Non-blocking structured logging.
+
+Handlers on the request path only enqueue: QueueingHandler stamps the
+record with the current request id, merges its message arguments and
+appends it to a bounded in-memory buffer. A background thread formats the
+records (JSON lines by default, LOG_FORMAT=text for development) and
+writes them in batches to stdout and, with LOG_FILE, a file.
+
+When the buffer is full (log_queue_size records, applied by configure_logging) records below WARNING are
+dropped, and WARNING and above evict the oldest buffered record; the number
+dropped is logged once the writer catches up.
+
+RequestLogMiddleware assigns each request an id (X-Request-ID, taken from
+the client when present), echoes it on the response and writes one access
+record per request, sampled per path prefix (access_log_sample_rates);
+errors and slow requests are always logged.
+
+configure_logging and the writer thread run in the lifespan of each worker
+process, after Gunicorn has forked; importing this module reads no settings.
+"""
+
+import logging
+import os
+import random
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import IO, List, Optional, Tuple
+import orjson
+from app.core.config import settings
+
+REQUEST_ID_HEADER = "X-Request-ID"
+MAX_REQUEST_ID_LENGTH = 64
+_REQUEST_ID_KEY = REQUEST_ID_HEADER.lower().encode()
+
+# Id of the request being handled, for correlating its log records (None outside requests)
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+access_logger = logging.getLogger("app.access")
+
+# Attributes of every LogRecord; anything else came in through extra={...}
+_RECORD_ATTRIBUTES = frozenset(vars(logging.makeLogRecord({}))) | {"message", "asctime", "request_id"}
+
+# Buffer size until configure_logging applies log_queue_size
+DEFAULT_CAPACITY = 10000
+
+_TEXT_FORMAT = "%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s"
+
+
+def format_json(record: logging.LogRecord) -> bytes:
+    """One JSON line: time, level, logger, message, request id, traceback and extra fields."""
+    entry = {
+        "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+        "level": record.levelname,
+        "logger": record.name,
+        "message": record.getMessage(),
+        "request_id": getattr(record, "request_id", None),
+    }
+    for key, value in record.__dict__.items():
+        if key not in _RECORD_ATTRIBUTES:
+            entry[key] = value
+    if record.exc_info:
+        entry["exc"] = "".join(traceback.format_exception(*record.exc_info))
+    elif record.exc_text:
+        entry["exc"] = record.exc_text
+    return orjson.dumps(entry, default=str) + b"\n"
+
+
+class LogPipeline:
+    """Bounded record buffer drained by one writer thread."""
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self._buffer: deque = deque(maxlen=capacity)
+        self._wakeup = threading.Event()
+        self.dropped = 0  # approximate under contention
+        self._dropped_reported = 0
+        self._streams: List[IO[bytes]] = []
+        self._text_formatter: Optional[logging.Formatter] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+
+    def put(self, record: logging.LogRecord) -> None:
+        if len(self._buffer) >= self.capacity:
+            self.dropped += 1
+            if record.levelno < logging.WARNING:
+                return
+        self._buffer.append(record)  # evicts the oldest when full
+        if not self._wakeup.is_set():
+            self._wakeup.set()
+
+    def configure(self, streams: List[IO[bytes]], text_format: bool, capacity: Optional[int] = None) -> None:
+        if capacity is not None and capacity != self.capacity:
+            self.capacity = capacity
+            self._buffer = deque(self._buffer, maxlen=capacity)
+        self._streams = streams
+        self._text_formatter = logging.Formatter(_TEXT_FORMAT) if text_format else None
+
+    def _format(self, record: logging.LogRecord) -> bytes:
+        if self._text_formatter is None:
+            return format_json(record)
+        return (self._text_formatter.format(record) + "\n").encode("utf-8", "replace")
+
+    def _write(self, lines: List[bytes]) -> None:
+        payload = b"".join(lines)
+        for stream in self._streams:
+            try:
+                stream.write(payload)
+                stream.flush()
+            except (OSError, ValueError):
+                pass  # nowhere left to report it
+
+    def drain(self) -> int:
+        """Format and write everything buffered; returns the number of records written."""
+        lines = []
+        while True:
+            try:
+                record = self._buffer.popleft()
+            except IndexError:
+                break
+            try:
+                lines.append(self._format(record))
+            except Exception:
+                lines.append(f"unformattable log record from {record.name}: {record.msg!r}\n".encode())
+        dropped = self.dropped
+        if dropped > self._dropped_reported:
+            notice = logging.makeLogRecord({
+                "name": __name__, "levelno": logging.WARNING, "levelname": "WARNING",
+                "msg": "Log buffer full, dropped %d records",
+                "args": (dropped - self._dropped_reported,),
+            })
+            lines.append(self._format(notice))
+            self._dropped_reported = dropped
+        if lines:
+            self._write(lines)
+        return len(lines)
+
+    def _run(self) -> None:
+        while not self._stopping:
+            self._wakeup.wait(1.0)
+            self._wakeup.clear()
+            self.drain()
+        self.drain()
+
+    def start(self) -> None:
+        """Start the writer thread (once per process)."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Write out what is buffered and stop the writer thread."""
+        if self._thread is None:
+            return
+        self._stopping = True
+        self._wakeup.set()
+        self._thread.join(timeout)
+        self._thread = None
+
+
+class QueueingHandler(logging.Handler):
+    """Hands records to the pipeline; formatting and I/O happen on its thread."""
+
+    def __init__(self, pipeline: LogPipeline):
+        super().__init__()
+        self.pipeline = pipeline
+
+    def handle(self, record: logging.LogRecord) -> bool:
+        # No handler lock: the buffer append is atomic
+        if not self.filter(record):
+            return False
+        self.emit(record)
+        return True
+
+    def emit(self, record: logging.LogRecord) -> None:
+        record.request_id = request_id_var.get()
+        if record.args:
+            # Arguments may change before the writer gets to them
+            try:
+                record.msg, record.args = record.getMessage(), None
+            except Exception:
+                self.handleError(record)
+                return
+        self.pipeline.put(record)
+
+
+# Per-process instance
+log_pipeline = LogPipeline()
+
+
+def configure_logging() -> None:
+    """Route the root logger through the pipeline (call once per process, before starting it)."""
+    streams: List[IO[bytes]] = [sys.stdout.buffer]
+    if settings.log_file:
+        streams.append(open(settings.log_file, "ab"))
+    log_pipeline.configure(streams, text_format=settings.log_format == "text", capacity=settings.log_queue_size)
+
+    root = logging.getLogger()
+    for handler in [handler for handler in root.handlers if isinstance(handler, QueueingHandler)]:
+        root.removeHandler(handler)
+    root.addHandler(QueueingHandler(log_pipeline))
+    root.setLevel(settings.log_level)
+    # Skip collecting record fields no formatter here shows (the caller's frame is the costly one)
+    logging._srcfile = None
+    logging.logThreads = False
+    logging.logMultiprocessing = False
+    # RequestLogMiddleware writes the access log
+    logging.getLogger("uvicorn.access").propagate = False
+
+
+def parse_sample_rates(spec: str) -> List[Tuple[str, float]]:
+    """"/health=0,/api/v1/wallet=0.1" -> [(prefix, rate)], longest prefix first."""
+    rates = []
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        prefix, rate = item.split("=", 1)
+        rates.append((prefix.strip(), float(rate)))
+    rates.sort(key=lambda pair: len(pair[0]), reverse=True)
+    return rates
+
+
+def _request_id(scope) -> str:
+    for name, value in scope["headers"]:
+        if name == _REQUEST_ID_KEY:
+            return value.decode("latin-1")[:MAX_REQUEST_ID_LENGTH]
+    return os.urandom(8).hex()
+
+
+class RequestLogMiddleware:
+    """ASGI middleware: request id for log correlation, and the sampled access log."""
+
+    def __init__(self, app):
+        self.app = app
+        self.sample_rates = parse_sample_rates(settings.access_log_sample_rates)
+        self.slow_seconds = settings.access_log_slow_ms / 1000
+
+    def _sample_rate(self, path: str) -> float:
+        for prefix, rate in self.sample_rates:
+            if path.startswith(prefix):
+                return rate
+        return 1.0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = _request_id(scope)
+        token = request_id_var.set(request_id)
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_with_request_id(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((_REQUEST_ID_KEY, request_id.encode("latin-1")))
+                message["headers"] = headers
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            elapsed = time.perf_counter() - started
+            if settings.access_log and (
+                status_code >= 500 or elapsed >= self.slow_seconds
+                or random.random() < self._sample_rate(scope["path"])
+            ):
+                access_logger.info("%s %s %d", scope["method"], scope["path"], status_code, extra={
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "status": status_code,
+                    "duration_ms": round(elapsed * 1000, 2),
+                    "client": scope["client"][0] if scope.get("client") else None,
+                })
+            request_id_var.reset(token)
@@ -0,0 +1,247 @@
+"""
+Helpers for migrations on large, busy tables (point_activities, qr_codes, ...).
+
+Alembic runs each revision in its own transaction with a lock_timeout
+(migration_lock_timeout_ms, see alembic/env.py), so DDL that cannot get its
+table lock fails fast instead of queueing every other query behind it.
+
+- with_lock_retry: run DDL under a savepoint, retrying on lock timeout.
+- create_index_concurrently / drop_index_concurrently: CREATE/DROP INDEX
+  CONCURRENTLY outside the revision's transaction; an invalid index left by
+  an interrupted build is dropped and rebuilt.
+- backfill: UPDATE in primary key batches, each committed on its own, with a
+  pause between batches. Progress is kept in migration_backfills, so a
+  failed or interrupted run resumes where it stopped. The SET expression
+  must be idempotent; rows inserted after the backfill started are the
+  application's job (e.g. a server default added beforehand). Downgrades
+  call reset_backfill so a later upgrade runs it again.
+
+With `alembic -x dry_run=true upgrade ...` the helpers only log estimated
+rows and durations, and env.py rolls back everything else.
+
+On SQLite the helpers fall back to the plain operations.
+"""
+
+import json
+import logging
+import time
+from typing import Callable, List, Optional
+from alembic import context, op
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from app.core.config import settings
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+# Postgres SQLSTATE for lock_timeout (lock_not_available)
+LOCK_NOT_AVAILABLE = "55P03"
+
+# Rough sequential read rate for dry-run index estimates; CONCURRENTLY scans the table twice
+INDEX_SCAN_BYTES_PER_SECOND = 100 * 1024 * 1024
+
+PROGRESS_TABLE = "migration_backfills"
+
+
+def is_dry_run() -> bool:
+    return context.get_x_argument(as_dictionary=True).get("dry_run", "").lower() in ("1", "true", "yes")
+
+
+def _is_postgres() -> bool:
+    return op.get_bind().dialect.name == "postgresql"
+
+
+def _is_lock_timeout(exc: OperationalError) -> bool:
+    return getattr(exc.orig, "pgcode", None) == LOCK_NOT_AVAILABLE
+
+
+def with_lock_retry(operation: Callable[[], None], attempts: Optional[int] = None,
+                    pause_seconds: float = 1.0) -> None:
+    """
+    Run operation (e.g. lambda: op.add_column(...)) in a savepoint; on lock
+    timeout roll it back and retry with a growing pause.
+    """
+    attempts = attempts or settings.migration_lock_retries
+    bind = op.get_bind()
+    for attempt in range(1, attempts + 1):
+        savepoint = bind.begin_nested()
+        try:
+            operation()
+        except OperationalError as exc:
+            savepoint.rollback()
+            if not _is_lock_timeout(exc) or attempt == attempts:
+                raise
+            logger.warning("Lock timeout (attempt %d/%d), retrying in %.1fs", attempt, attempts,
+                           pause_seconds * attempt)
+            time.sleep(pause_seconds * attempt)
+        else:
+            savepoint.commit()
+            return
+
+
+def _table_size(table: str) -> tuple:
+    """(estimated rows, total bytes) from the planner statistics."""
+    row = op.get_bind().execute(
+        text("SELECT reltuples::bigint, pg_total_relation_size(oid) FROM pg_class WHERE oid = to_regclass(:t)"),
+        {"t": table},
+    ).first()
+    return (max(row[0], 0), row[1]) if row else (0, 0)
+
+
+def _index_state(name: str) -> Optional[bool]:
+    """None if the index does not exist, else whether it is valid."""
+    return op.get_bind().execute(
+        text("SELECT i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid WHERE c.relname = :n"),
+        {"n": name},
+    ).scalar()
+
+
+def create_index_concurrently(name: str, table: str, columns: List[str], unique: bool = False,
+                              **kwargs) -> None:
+    """op.create_index without blocking writes (postgresql_where/include pass through)."""
+    if not _is_postgres():
+        op.create_index(name, table, columns, unique=unique, **kwargs)
+        return
+    if is_dry_run():
+        rows, size = _table_size(table)
+        logger.info(
+            "[dry run] CREATE INDEX CONCURRENTLY %s ON %s: ~%d rows, %.1f MiB, roughly %.0fs or more",
+            name, table, rows, size / 2**20, 2 * size / INDEX_SCAN_BYTES_PER_SECOND,
+        )
+        return
+
+    with op.get_context().autocommit_block():
+        state = _index_state(name)
+        if state is True:
+            logger.info("Index %s already exists", name)
+            return
+        if state is False:
+            logger.warning("Dropping invalid index %s left by an interrupted build", name)
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
+        started = time.monotonic()
+        op.create_index(name, table, columns, unique=unique, postgresql_concurrently=True, **kwargs)
+        logger.info("Built index %s in %.1fs", name, time.monotonic() - started)
+
+
+def drop_index_concurrently(name: str, table: str) -> None:
+    """op.drop_index without blocking reads and writes."""
+    if not _is_postgres():
+        op.drop_index(name, table_name=table)
+        return
+    if is_dry_run():
+        logger.info("[dry run] DROP INDEX CONCURRENTLY %s", name)
+        return
+    with op.get_context().autocommit_block():
+        op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+
+
+def _ensure_progress_table() -> None:
+    op.execute(
+        f"CREATE TABLE IF NOT EXISTS {PROGRESS_TABLE} ("
+        "name VARCHAR(200) PRIMARY KEY, last_key BIGINT NOT NULL, rows_updated BIGINT NOT NULL DEFAULT 0, "
+        "completed_at TIMESTAMP, updated_at TIMESTAMP NOT NULL DEFAULT now())"
+    )
+
+
+def _update_batch(table: str, values: str, where: Optional[str], key: str, last: int, upper: int) -> int:
+    condition = f"{key} > :last AND {key} <= :upper" + (f" AND ({where})" if where else "")
+    return op.get_bind().execute(
+        text(f"UPDATE {table} SET {values} WHERE {condition}"), {"last": last, "upper": upper}
+    ).rowcount
+
+
+def _estimate_backfill(table: str, values: str, where: Optional[str], key: str, start: int, end: int,
+                       batch_size: int, pause_seconds: float) -> None:
+    bind = op.get_bind()
+    plan = bind.execute(
+        text(f"EXPLAIN (FORMAT JSON) SELECT 1 FROM {table}" + (f" WHERE {where}" if where else ""))
+    ).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    rows = plan[0]["Plan"]["Plan Rows"]
+    batches = max(0, -(-(end - start) // batch_size))
+
+    # Time one real batch, then undo it
+    savepoint = bind.begin_nested()
+    started = time.monotonic()
+    sample = _update_batch(table, values, where, key, start, start + batch_size)
+    batch_seconds = time.monotonic() - started
+    savepoint.rollback()
+    logger.info(
+        "[dry run] backfill %s: ~%d rows to update in %d batches of %d keys "
+        "(sample batch: %d rows in %.3fs), roughly %.0fs",
+        table, rows, batches, batch_size, sample, batch_seconds, batches * (batch_seconds + pause_seconds),
+    )
+
+
+def backfill(name: str, table: str, values: str, where: Optional[str] = None, key: str = "id",
+             batch_size: Optional[int] = None, pause_seconds: Optional[float] = None) -> None:
+    """
+    UPDATE table SET values [WHERE where] in batches of batch_size keys,
+    committing each batch. name identifies the backfill for resuming, e.g.
+    "006_point_activities_source".
+    """
+    batch_size = batch_size or settings.migration_backfill_batch_size
+    pause_seconds = settings.migration_backfill_pause_seconds if pause_seconds is None else pause_seconds
+    if not _is_postgres():
+        op.execute(f"UPDATE {table} SET {values}" + (f" WHERE {where}" if where else ""))
+        return
+
+    bind = op.get_bind()
+    bounds = bind.execute(text(f"SELECT min({key}), max({key}) FROM {table}")).first()
+    if bounds[0] is None:
+        return
+    end = bounds[1]
+    if is_dry_run():
+        _estimate_backfill(table, values, where, key, bounds[0] - 1, end, batch_size, pause_seconds)
+        return
+
+    with op.get_context().autocommit_block():
+        _ensure_progress_table()
+        progress = bind.execute(
+            text(f"SELECT last_key, rows_updated, completed_at FROM {PROGRESS_TABLE} WHERE name = :n"), {"n": name}
+        ).first()
+        if progress is not None and progress.completed_at is not None:
+            logger.info("Backfill %s already completed", name)
+            return
+        if progress is None:
+            last, updated = bounds[0] - 1, 0
+            bind.execute(
+                text(f"INSERT INTO {PROGRESS_TABLE} (name, last_key) VALUES (:n, :k)"), {"n": name, "k": last}
+            )
+        else:
+            last, updated = progress.last_key, progress.rows_updated
+            logger.info("Resuming backfill %s after %s %d", name, key, last)
+
+        started = time.monotonic()
+        attempts = 0
+        while last < end:
+            upper = min(last + batch_size, end)
+            try:
+                rows = _update_batch(table, values, where, key, last, upper)
+            except OperationalError as exc:
+                # Rows locked by the application; wait and retry the batch
+                attempts += 1
+                if not _is_lock_timeout(exc) or attempts >= settings.migration_lock_retries:
+                    raise
+                time.sleep(pause_seconds * attempts + 1)
+                continue
+            attempts = 0
+            last, updated = upper, updated + rows
+            bind.execute(
+                text(f"UPDATE {PROGRESS_TABLE} SET last_key = :k, rows_updated = :r, updated_at = now() "
+                     "WHERE name = :n"),
+                {"n": name, "k": last, "r": updated},
+            )
+            if pause_seconds:
+                time.sleep(pause_seconds)
+
+        bind.execute(
+            text(f"UPDATE {PROGRESS_TABLE} SET completed_at = now(), updated_at = now() WHERE name = :n"), {"n": name}
+        )
+        logger.info("Backfill %s: %d rows updated in %.1fs", name, updated, time.monotonic() - started)
+
+
+def reset_backfill(name: str) -> None:
+    """Forget a backfill's progress (in the downgrade of the revision that ran it)."""
+    if _is_postgres() and op.get_bind().execute(text("SELECT to_regclass(:t)"), {"t": PROGRESS_TABLE}).scalar():
+        op.execute(text(f"DELETE FROM {PROGRESS_TABLE} WHERE name = :n").bindparams(n=name))
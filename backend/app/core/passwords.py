@@ -0,0 +1,206 @@
+"""
+Password hashing policy.
+
+The scheme and its cost come from settings; calibrate() measures hash time
+on the current host to pick a cost for password_hash_target_ms. Hashes made
+under another scheme or cost verify as usual and report needs_update, so
+login can upgrade them (in the background, see rehash_password). Hash and
+verify times are kept per process for the metrics endpoint.
+"""
+
+import statistics
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
+from app.core.config import settings
+
+SCHEME_BCRYPT = "bcrypt"
+SCHEME_ARGON2 = "argon2"
+SCHEMES = (SCHEME_BCRYPT, SCHEME_ARGON2)
+
+BCRYPT_MIN_ROUNDS = 10
+BCRYPT_MAX_ROUNDS = 16
+ARGON2_MAX_TIME_COST = 20
+
+# Hash timing samples kept per operation for percentiles
+TIMING_SAMPLES = 1024
+
+
+class HashTimings:
+    """Durations of one hashing operation (hash, verify, rehash)."""
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.recent = deque(maxlen=TIMING_SAMPLES)
+
+    def add(self, ms: float) -> None:
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+        self.recent.append(ms)
+
+    def snapshot(self) -> dict:
+        recent = sorted(self.recent)
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total_ms / self.count, 2) if self.count else None,
+            "p50_ms": round(recent[len(recent) // 2], 2) if recent else None,
+            "p95_ms": round(recent[int(len(recent) * 0.95)], 2) if recent else None,
+            "max_ms": round(self.max_ms, 2) if self.count else None,
+        }
+
+
+def _policy(scheme: str, bcrypt_rounds: int, argon2_time_cost: int) -> Dict[str, object]:
+    """CryptContext keywords pinning the scheme's cost (other costs need an update)."""
+    if scheme == SCHEME_BCRYPT:
+        return {
+            "bcrypt__default_rounds": bcrypt_rounds,
+            "bcrypt__min_rounds": bcrypt_rounds,
+            "bcrypt__max_rounds": bcrypt_rounds,
+        }
+    if scheme == SCHEME_ARGON2:
+        return {
+            "argon2__default_rounds": argon2_time_cost,
+            "argon2__min_rounds": argon2_time_cost,
+            "argon2__max_rounds": argon2_time_cost,
+            "argon2__memory_cost": settings.password_argon2_memory_kib,
+            "argon2__parallelism": settings.password_argon2_parallelism,
+        }
+    raise ValueError(f"Unknown password hash scheme {scheme!r}; expected one of {', '.join(SCHEMES)}")
+
+
+def _context(scheme: str, bcrypt_rounds: int, argon2_time_cost: int):
+    from passlib.context import CryptContext
+
+    # bcrypt stays verifiable after switching to argon2; its hashes are deprecated then
+    schemes = [scheme] + [name for name in (SCHEME_BCRYPT,) if name != scheme]
+    return CryptContext(schemes=schemes, deprecated="auto", **_policy(scheme, bcrypt_rounds, argon2_time_cost))
+
+
+class PasswordHasher:
+    """Per-process hashing context for the configured policy, with timings."""
+
+    def __init__(self):
+        self._context = None
+        self._lock = threading.Lock()
+        self._timings = {"hash": HashTimings(), "verify": HashTimings(), "rehash": HashTimings()}
+
+    @property
+    def context(self):
+        # Built on first use so passlib/bcrypt load lazily
+        if self._context is None:
+            self._context = _context(
+                settings.password_hash_scheme,
+                settings.password_bcrypt_rounds,
+                settings.password_argon2_time_cost,
+            )
+        return self._context
+
+    def _timed(self, operation: str, started: float) -> None:
+        ms = (time.perf_counter() - started) * 1000
+        with self._lock:
+            self._timings[operation].add(ms)
+
+    def hash(self, password: str, operation: str = "hash") -> str:
+        started = time.perf_counter()
+        try:
+            return self.context.hash(password)
+        finally:
+            self._timed(operation, started)
+
+    def verify(self, password: str, password_hash: str) -> bool:
+        started = time.perf_counter()
+        try:
+            return self.context.verify(password, password_hash)
+        finally:
+            self._timed("verify", started)
+
+    def needs_update(self, password_hash: str) -> bool:
+        """Whether the hash was made under another scheme or cost (cheap, no hashing)."""
+        return self.context.needs_update(password_hash)
+
+    def metrics(self) -> dict:
+        with self._lock:
+            timings = {name: timing.snapshot() for name, timing in self._timings.items()}
+        verify_ms = timings["verify"]["mean_ms"]
+        return {
+            "scheme": settings.password_hash_scheme,
+            "bcrypt_rounds": settings.password_bcrypt_rounds,
+            "argon2_time_cost": settings.password_argon2_time_cost,
+            "argon2_memory_kib": settings.password_argon2_memory_kib,
+            "target_ms": settings.password_hash_target_ms,
+            "timings": timings,
+            # Password logins one CPU core can verify per second at the observed cost
+            "verifications_per_core_second": round(1000 / verify_ms, 1) if verify_ms else None,
+        }
+
+
+# Per-process instance
+password_hasher = PasswordHasher()
+
+
+def rehash_password(user_id: int, password: str, old_hash: str) -> bool:
+    """
+    Store a hash of password under the current policy (background task after
+    login). Skipped if the user's hash changed meanwhile.
+    """
+    from sqlalchemy import update
+    from app.core.database import SessionLocal, get_engine
+    from app.models.user import User
+
+    new_hash = password_hasher.hash(password, operation="rehash")
+    get_engine()
+    db = SessionLocal()
+    try:
+        updated = db.execute(
+            update(User)
+            .where(User.id == user_id, User.password_hash == old_hash)
+            .values(password_hash=new_hash)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.commit()
+    finally:
+        db.close()
+    return bool(updated)
+
+
+def _median_ms(context, samples: int) -> float:
+    durations = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        context.hash("calibration password")
+        durations.append((time.perf_counter() - started) * 1000)
+    return statistics.median(durations)
+
+
+def calibrate(target_ms: Optional[float] = None, scheme: Optional[str] = None, samples: int = 3) -> dict:
+    """
+    Measure hash time on this host for increasing cost (bcrypt rounds, or
+    argon2 time cost at the configured memory and parallelism) and pick the
+    highest cost within target_ms, never below the scheme's minimum.
+    """
+    target_ms = target_ms or settings.password_hash_target_ms
+    scheme = scheme or settings.password_hash_scheme
+    if scheme not in SCHEMES:
+        raise ValueError(f"Unknown password hash scheme {scheme!r}; expected one of {', '.join(SCHEMES)}")
+    if scheme == SCHEME_BCRYPT:
+        costs = range(BCRYPT_MIN_ROUNDS, BCRYPT_MAX_ROUNDS + 1)
+    else:
+        costs = range(1, ARGON2_MAX_TIME_COST + 1)
+
+    measured: List[dict] = []
+    chosen = costs[0]
+    for cost in costs:
+        if scheme == SCHEME_BCRYPT:
+            context = _context(scheme, cost, settings.password_argon2_time_cost)
+        else:
+            context = _context(scheme, settings.password_bcrypt_rounds, cost)
+        ms = _median_ms(context, samples)
+        measured.append({"cost": cost, "ms": round(ms, 2)})
+        if ms > target_ms:
+            break
+        chosen = cost
+    return {"scheme": scheme, "target_ms": target_ms, "cost": chosen, "measured": measured}
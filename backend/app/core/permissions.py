@@ -0,0 +1,182 @@
+"""
+Authorization dependencies based on the role and establishment claims in the
+access token.
+
+The hot path (get_current_principal, require_role, require_establishment)
+reads only the verified token. Dependencies created with live=True re-check
+the user against PermissionCache, a per-process TTL cache loaded from the DB
+on a miss. Changes to a user's role, establishment or active flag revoke the
+user's outstanding access tokens and invalidate the cache entry (see the
+session listeners at the bottom of this module).
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Callable, NamedTuple, Optional
+from fastapi import Depends, HTTPException, status
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from app.core.auth import get_token_payload
+from app.core.config import settings
+from app.core.revocation import revocation_list, to_epoch
+
+ROLE_CUSTOMER = "customer"
+ROLE_WORKER = "worker"
+ROLE_ADMIN = "admin"
+
+# Token claim holding the user's establishment id
+ESTABLISHMENT_CLAIM = "est"
+
+# User columns embedded in (or gating) access tokens
+CLAIM_ATTRIBUTES = ("role", "establishment_id", "is_active")
+
+
+class Principal(NamedTuple):
+    """Authenticated caller as described by the access token (or the DB, for live checks)."""
+    user_id: int
+    role: str
+    establishment_id: Optional[int]
+
+
+class PermissionCache:
+    """
+    Bounded TTL cache of user_id -> Principal loaded from the users table.
+    Entries older than the user's latest revocation cutoff are reloaded, so
+    role changes made on other workers apply after the next revocation sync.
+    """
+
+    def __init__(self):
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()  # user_id -> (loaded_at, Principal or None)
+        self._lock = threading.Lock()
+
+    def get(self, user_id: int) -> Optional[Principal]:
+        """Return the user's current principal, or None if missing or inactive (may block on a miss)."""
+        now = time.time()
+        entry = self._entries.get(user_id)
+        if entry is not None:
+            loaded_at, principal = entry
+            cutoff = revocation_list.user_cutoff(user_id)
+            if now - loaded_at < settings.permission_cache_ttl_seconds and (cutoff is None or loaded_at > cutoff):
+                return principal
+
+        principal = self._load(user_id)
+        with self._lock:
+            self._entries[user_id] = (now, principal)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > settings.permission_cache_max_entries:
+                self._entries.popitem(last=False)
+        return principal
+
+    def invalidate(self, user_id: int) -> None:
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    @staticmethod
+    def _load(user_id: int) -> Optional[Principal]:
+        from sqlalchemy import select
+        from app.core.database import open_read_session
+        from app.models.user import User
+
+        db = open_read_session()
+        try:
+            row = db.execute(
+                select(User.role, User.establishment_id, User.is_active).where(User.id == user_id)
+            ).first()
+        finally:
+            db.close()
+
+        if row is None or not row.is_active:
+            return None
+        return Principal(user_id, row.role, row.establishment_id)
+
+
+# Per-process instance
+permission_cache = PermissionCache()
+
+
+def get_current_principal(payload: dict = Depends(get_token_payload)) -> Principal:
+    """Principal from the token claims; no database access."""
+    return Principal(int(payload["sub"]), payload.get("role", ROLE_CUSTOMER), payload.get(ESTABLISHMENT_CLAIM))
+
+
+def get_live_principal(principal: Principal = Depends(get_current_principal)) -> Principal:
+    """Principal re-checked against the permission cache (sync, so a cache miss runs in the threadpool)."""
+    live = permission_cache.get(principal.user_id)
+    if live is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return live
+
+
+def require_role(*roles: str, live: bool = False) -> Callable[..., Principal]:
+    """Dependency factory: the caller must have one of the given roles."""
+    principal_dependency = get_live_principal if live else get_current_principal
+
+    def dependency(principal: Principal = Depends(principal_dependency)) -> Principal:
+        if principal.role not in roles:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Insufficient permissions"
+            )
+        return principal
+
+    return dependency
+
+
+def require_establishment(*roles: str, live: bool = False) -> Callable[..., Principal]:
+    """
+    Dependency factory for establishment-scoped routes: the caller must have one
+    of the given roles (worker and admin by default) and belong to the
+    establishment_id path or query parameter.
+    """
+    role_dependency = require_role(*(roles or (ROLE_WORKER, ROLE_ADMIN)), live=live)
+
+    def dependency(establishment_id: int, principal: Principal = Depends(role_dependency)) -> Principal:
+        if principal.establishment_id != establishment_id:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Not allowed for this establishment"
+            )
+        return principal
+
+    return dependency
+
+
+def _claims_changed(user) -> bool:
+    state = inspect(user)
+    return any(state.attrs[name].history.has_changes() for name in CLAIM_ATTRIBUTES)
+
+
+@event.listens_for(Session, "before_flush")
+def _revoke_stale_claims(session, flush_context, instances):
+    """Add a user-wide revocation, in the same transaction, when token claims change."""
+    from app.models.revoked_token import RevokedToken
+    from app.models.user import User
+
+    changed = [obj for obj in session.dirty if isinstance(obj, User) and _claims_changed(obj)]
+    if not changed:
+        return
+
+    expires_at = datetime.utcnow() + timedelta(minutes=settings.access_token_expire_minutes)
+    user_ids = session.info.setdefault("claims_changed", {})
+    for user in changed:
+        session.add(RevokedToken(jti=None, user_id=user.id, expires_at=expires_at))
+        user_ids[user.id] = expires_at
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_claim_changes(session):
+    # Effective immediately on this worker; others pick it up on their next sync
+    for user_id, expires_at in session.info.pop("claims_changed", {}).items():
+        revocation_list.add(user_id, None, time.time(), to_epoch(expires_at))
+        permission_cache.invalidate(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_claim_changes(session):
+    session.info.pop("claims_changed", None)
@@ -0,0 +1,147 @@
+"""
+Fast JSON response helpers backed by orjson and cached pydantic TypeAdapters.
+"""
+
+from datetime import date, datetime
+from decimal import Decimal
+from functools import lru_cache, partial
+from typing import Any, Dict, Iterable, Optional, Sequence, Tuple, Type, get_args
+
+import orjson
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel, TypeAdapter
+
+
+def _orjson_default(obj: Any) -> Any:
+    """Serialize types orjson does not support natively."""
+    if isinstance(obj, Decimal):
+        # Match pydantic's JSON mode, which renders Decimal as a string
+        return str(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+class ORJSONResponse(JSONResponse):
+    """Default response class rendering content with orjson."""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_orjson_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+@lru_cache(maxsize=None)
+def get_type_adapter(schema: Any) -> TypeAdapter:
+    """Return a cached TypeAdapter so validators and serializers are built once per type."""
+    return TypeAdapter(schema)
+
+
+def dump_json(schema: Any, data: Any, from_attributes: bool = False) -> bytes:
+    """
+    Serialize data to JSON bytes using the compiled pydantic-core serializer.
+    With from_attributes=True, ORM objects or SQLAlchemy Row tuples are read
+    directly by attribute without building intermediate dicts.
+    """
+    adapter = get_type_adapter(schema)
+    if from_attributes:
+        data = adapter.validate_python(data, from_attributes=True)
+    return adapter.dump_json(data)
+
+
+@lru_cache(maxsize=None)
+def get_row_keys(schema: Type[BaseModel]) -> Tuple[str, ...]:
+    """Return the JSON keys of a response schema, in declaration order."""
+    return tuple(schema.model_fields)
+
+
+# How dump_rows encodes a column, by field type: numbers, decimals and dates have
+# no comma in their JSON and strings no unescaped quote, so a whole column of them
+# encodes in one call and is split at the separators
+_COLUMN_SCALAR, _COLUMN_STRING, _COLUMN_ANY = range(3)
+_SCALAR_TYPES = (bool, int, float, Decimal, date, datetime)
+
+_dumps = partial(orjson.dumps, default=_orjson_default)
+_quote = b'"%b"'.__mod__
+
+
+def _column_kind(annotation: Any) -> int:
+    types = [arg for arg in get_args(annotation) if arg is not type(None)] or [annotation]
+    if not all(isinstance(arg, type) for arg in types):
+        return _COLUMN_ANY
+    if all(issubclass(arg, _SCALAR_TYPES) for arg in types):
+        return _COLUMN_SCALAR
+    if all(issubclass(arg, str) for arg in types):
+        return _COLUMN_STRING
+    return _COLUMN_ANY
+
+
+@lru_cache(maxsize=None)
+def get_row_template(schema: Type[BaseModel]) -> Tuple[bytes, Tuple[int, ...]]:
+    """The '{"key":%b,...}' template of a response schema's objects, and how to encode each column."""
+    template = b"{" + b",".join(
+        orjson.dumps(key).replace(b"%", b"%%") + b":%b" for key in get_row_keys(schema)
+    ) + b"}"
+    return template, tuple(_column_kind(field.annotation) for field in schema.model_fields.values())
+
+
+def _encode_column(values: Sequence[Any], kind: int) -> Iterable[bytes]:
+    """The JSON of each value of a column."""
+    if kind == _COLUMN_SCALAR:
+        encoded = orjson.dumps(values, default=_orjson_default)[1:-1].split(b",")
+        if len(encoded) == len(values):
+            return encoded
+    elif kind == _COLUMN_STRING and None not in values:
+        return map(_quote, orjson.dumps(values)[2:-2].split(b'","'))
+    return map(_dumps, values)
+
+
+def dump_rows(schema: Type[BaseModel], rows: Sequence[Any]) -> bytes:
+    """
+    Serialize SQLAlchemy Row tuples straight to a JSON array of objects.
+    The query must select columns in the same order as the schema fields;
+    rows are already typed by the database, so model validation is skipped.
+    Values are encoded column by column and spliced into the schema's object
+    template, without building a dict per row.
+    """
+    keys = get_row_keys(schema)
+    if not rows:
+        return b"[]"
+    if tuple(rows[0]._fields) != keys:
+        raise ValueError(f"Selected columns do not match {schema.__name__} fields")
+    template, kinds = get_row_template(schema)
+    columns = [_encode_column(values, kind) for values, kind in zip(zip(*rows), kinds)]
+    return b"[" + b",".join(map(template.__mod__, zip(*columns))) + b"]"
+
+
+def rows_response(
+    schema: Type[BaseModel],
+    rows: Sequence[Any],
+    status_code: int = 200,
+    headers: Optional[Dict[str, str]] = None,
+) -> Response:
+    """Build a JSON list response from Row tuples using dump_rows."""
+    return Response(
+        content=dump_rows(schema, rows),
+        status_code=status_code,
+        headers=headers,
+        media_type="application/json",
+    )
+
+
+def json_response(
+    schema: Any,
+    data: Any,
+    from_attributes: bool = False,
+    status_code: int = 200,
+    headers: Optional[Dict[str, str]] = None,
+) -> Response:
+    """
+    Build a JSON response from pre-serialized bytes.
+    Returning a Response skips FastAPI's response_model re-validation and
+    jsonable_encoder pass; declare response_model on the route for the docs.
+    """
+    return Response(
+        content=dump_json(schema, data, from_attributes=from_attributes),
+        status_code=status_code,
+        headers=headers,
+        media_type="application/json",
+    )
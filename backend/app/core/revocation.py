@@ -0,0 +1,106 @@
+"""
+In-memory access token revocation list.
+
+Each worker keeps revoked jtis and per-user cutoffs in memory and pulls new
+rows from the revoked_tokens table incrementally (by id), so authenticated
+requests check revocation with two dict lookups and no query.
+"""
+
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+from sqlalchemy.orm import Session
+
+
+def to_epoch(value: datetime) -> float:
+    """Convert a naive UTC timestamp (as stored in the DB) to epoch seconds."""
+    return value.replace(tzinfo=timezone.utc).timestamp()
+
+
+class RevocationList:
+    """Revoked token ids and per-user "issued before" cutoffs, pruned at expiry."""
+
+    LOOKBACK_SECONDS = 30
+
+    def __init__(self):
+        self._jtis: Dict[str, float] = {}          # jti -> expiry (epoch)
+        self._user_cutoffs: Dict[int, float] = {}  # user_id -> tokens issued before are revoked
+        self._cutoff_expiry: Dict[int, float] = {}
+        self._last_id = 0
+        self._lock = threading.Lock()
+
+    def is_revoked(self, jti: Optional[str], user_id: int, issued_at: Optional[float]) -> bool:
+        """O(1) check used on every authenticated request."""
+        if jti is not None and jti in self._jtis:
+            return True
+        cutoff = self._user_cutoffs.get(user_id)
+        return cutoff is not None and (issued_at is None or issued_at < cutoff)
+
+    def user_cutoff(self, user_id: int) -> Optional[float]:
+        """Latest user-wide revocation time (epoch seconds), if any."""
+        return self._user_cutoffs.get(user_id)
+
+    def add(self, user_id: int, jti: Optional[str], revoked_at: float, expires_at: float) -> None:
+        """Apply one revocation locally (also used right after this worker revokes)."""
+        with self._lock:
+            if jti is not None:
+                self._jtis[jti] = expires_at
+            else:
+                # Tokens carry sub-second iat; those issued before revoked_at are revoked
+                if revoked_at > self._user_cutoffs.get(user_id, 0.0):
+                    self._user_cutoffs[user_id] = revoked_at
+                self._cutoff_expiry[user_id] = max(expires_at, self._cutoff_expiry.get(user_id, 0.0))
+
+    def prune(self, now: Optional[float] = None) -> None:
+        """Drop entries whose tokens have all expired."""
+        now = now or time.time()
+        with self._lock:
+            self._jtis = {jti: exp for jti, exp in self._jtis.items() if exp > now}
+            for user_id in [uid for uid, exp in self._cutoff_expiry.items() if exp <= now]:
+                self._cutoff_expiry.pop(user_id, None)
+                self._user_cutoffs.pop(user_id, None)
+
+    def sync(self, db: Session) -> int:
+        """Pull revocations added since the last sync. Returns the number applied."""
+        from sqlalchemy import select
+        from app.models.revoked_token import RevokedToken
+
+        now = datetime.utcnow()
+        rows = db.execute(
+            select(
+                RevokedToken.id,
+                RevokedToken.user_id,
+                RevokedToken.jti,
+                RevokedToken.created_at,
+                RevokedToken.expires_at,
+            )
+            .where(
+                # Re-read a short window as well: ids from transactions that
+                # committed out of order would otherwise be skipped
+                (RevokedToken.id > self._last_id)
+                | (RevokedToken.created_at > now - timedelta(seconds=self.LOOKBACK_SECONDS)),
+                RevokedToken.expires_at > now,
+            )
+            .order_by(RevokedToken.id)
+        ).all()
+
+        for row in rows:
+            self.add(row.user_id, row.jti, to_epoch(row.created_at), to_epoch(row.expires_at))
+            self._last_id = max(self._last_id, row.id)
+        self.prune()
+        return len(rows)
+
+    def sync_from_db(self) -> int:
+        """Run sync with a short-lived read-only primary session (for the periodic task)."""
+        from app.core.database import open_read_session
+
+        db = open_read_session()
+        try:
+            return self.sync(db)
+        finally:
+            db.close()
+
+
+# Per-process instance
+revocation_list = RevocationList()
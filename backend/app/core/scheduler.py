@@ -0,0 +1,376 @@
+"""
+Cluster-wide scheduler for maintenance jobs (OTP cleanup, point expiry, ...).
+
+Every worker process runs the scheduler from the FastAPI lifespan, but only
+the leader runs jobs. Leadership is a Postgres session-level advisory lock
+held on a dedicated connection (outside the pool): whoever holds it leads,
+the others retry every scheduler_election_seconds, and when the leader's
+process or connection dies Postgres releases the lock and another worker
+takes over. Before each run the leader also takes the job's own advisory
+lock on that connection, which doubles as a liveness check: if it fails,
+the worker steps down instead of running the job.
+
+Jobs are blocking callables run in the threadpool on an IntervalTrigger or
+a CronTrigger (UTC), each run delayed by up to jitter_seconds. A run still
+in progress when the next is due is skipped, not overlapped. Duration and
+outcome of each job's runs are kept per process (see metrics).
+
+On shutdown no new runs start, running ones get up to
+scheduler_shutdown_seconds, and long jobs can check `stopping` between
+chunks. On SQLite (single worker) the process is always the leader.
+"""
+
+import asyncio
+import hashlib
+import logging
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import NullPool
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _lock_key(name: str) -> int:
+    """Signed 64-bit advisory lock key for a name."""
+    return int.from_bytes(hashlib.blake2b(name.encode(), digest_size=8).digest(), "big", signed=True)
+
+
+LEADER_LOCK_KEY = _lock_key("app.core.scheduler:leader")
+
+
+class IntervalTrigger:
+    """Every `seconds`, starting right after the worker becomes leader."""
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+
+    def first(self, now: datetime) -> datetime:
+        return now
+
+    def next_after(self, previous: datetime) -> datetime:
+        return previous + timedelta(seconds=self.seconds)
+
+    def __str__(self) -> str:
+        return f"every {self.seconds:g}s"
+
+
+def _parse_field(field: str, low: int, high: int) -> List[int]:
+    values = set()
+    for part in field.split(","):
+        spec, _, step = part.partition("/")
+        if spec == "*":
+            start, end = low, high
+        elif "-" in spec:
+            start, end = (int(value) for value in spec.split("-", 1))
+        else:
+            start = end = int(spec)
+            if step:
+                end = high
+        if not low <= start <= end <= high:
+            raise ValueError(f"Cron field {field!r} out of range {low}-{high}")
+        values.update(range(start, end + 1, int(step) if step else 1))
+    return sorted(values)
+
+
+class CronTrigger:
+    """
+    Standard 5-field cron expression (minute hour day-of-month month
+    day-of-week, Sunday = 0 or 7), evaluated in UTC.
+    """
+
+    def __init__(self, expression: str):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression {expression!r} must have 5 fields")
+        self.expression = expression
+        self.minutes = _parse_field(fields[0], 0, 59)
+        self.hours = _parse_field(fields[1], 0, 23)
+        self.days = set(_parse_field(fields[2], 1, 31))
+        self.months = set(_parse_field(fields[3], 1, 12))
+        self.weekdays = {day % 7 for day in _parse_field(fields[4], 0, 7)}
+        self.day_restricted, self.weekday_restricted = fields[2] != "*", fields[4] != "*"
+
+    def _day_matches(self, at: datetime) -> bool:
+        day = at.day in self.days
+        weekday = (at.weekday() + 1) % 7 in self.weekdays
+        if self.day_restricted and self.weekday_restricted:
+            return day or weekday  # cron: either day field matching is enough
+        return day and weekday
+
+    def first(self, now: datetime) -> datetime:
+        return self.next_after(now)
+
+    def next_after(self, previous: datetime) -> datetime:
+        at = previous.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        # Bounded: a few years of day skips covers any satisfiable expression
+        for _ in range(5000):
+            if at.month not in self.months or not self._day_matches(at):
+                at = at.replace(hour=0, minute=0) + timedelta(days=1)
+                continue
+            hour = next((hour for hour in self.hours if hour >= at.hour), None)
+            if hour is None:
+                at = at.replace(hour=0, minute=0) + timedelta(days=1)
+                continue
+            if hour != at.hour:
+                at = at.replace(hour=hour, minute=0)
+            minute = next((minute for minute in self.minutes if minute >= at.minute), None)
+            if minute is None:
+                at = at.replace(minute=0) + timedelta(hours=1)
+                continue
+            return at.replace(minute=minute)
+        raise ValueError(f"Cron expression {self.expression!r} never matches")
+
+    def __str__(self) -> str:
+        return f"cron {self.expression}"
+
+
+class JobStats:
+    """Runs of one job in this process."""
+
+    __slots__ = ("runs", "failures", "skipped", "last_started_at", "last_duration_ms", "max_duration_ms",
+                 "total_duration_ms", "last_result", "last_error", "next_run_at")
+
+    def __init__(self):
+        self.runs = 0
+        self.failures = 0
+        self.skipped = 0  # still running, or its lock was held elsewhere
+        self.last_started_at: Optional[datetime] = None
+        self.last_duration_ms: Optional[float] = None
+        self.max_duration_ms = 0.0
+        self.total_duration_ms = 0.0
+        self.last_result: object = None
+        self.last_error: Optional[str] = None
+        self.next_run_at: Optional[datetime] = None
+
+    def as_dict(self) -> dict:
+        data = {name: getattr(self, name) for name in self.__slots__}
+        data["avg_duration_ms"] = round(self.total_duration_ms / self.runs, 2) if self.runs else None
+        return data
+
+
+class Job:
+    """A named blocking callable and its trigger."""
+
+    def __init__(self, name: str, func: Callable[[], object], trigger, jitter_seconds: float = 0):
+        self.name = name
+        self.func = func
+        self.trigger = trigger
+        self.jitter_seconds = jitter_seconds
+        self.lock_key = _lock_key(f"app.core.scheduler:job:{name}")
+        self.stats = JobStats()
+        self.due_at: Optional[datetime] = None  # trigger time, before jitter
+
+    def plan(self, due_at: datetime) -> None:
+        self.due_at = due_at
+        self.stats.next_run_at = due_at + timedelta(seconds=random.uniform(0, self.jitter_seconds))
+
+
+class JobScheduler:
+    """Per-process scheduler; jobs only run in the process holding the leader lock."""
+
+    def __init__(self):
+        self.jobs: Dict[str, Job] = {}
+        self.is_leader = False
+        self._engine = None
+        self._connection = None
+        self._connection_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._running: Dict[str, asyncio.Task] = {}
+
+    def add_job(self, name: str, func: Callable[[], object], trigger, jitter_seconds: float = 0) -> Job:
+        """Register (or replace) a job; call before run()."""
+        job = self.jobs[name] = Job(name, func, trigger, jitter_seconds)
+        return job
+
+    @property
+    def stopping(self) -> bool:
+        """True once shutdown started; long jobs should return between chunks."""
+        return self._stop.is_set()
+
+    # Advisory locks, on one connection outside the pool (blocking; run in the threadpool)
+
+    def _try_lock(self, key: int) -> bool:
+        return bool(self._connection.execute(text("SELECT pg_try_advisory_lock(:k)"), {"k": key}).scalar())
+
+    def _elect(self) -> bool:
+        from app.core.database import get_engine
+
+        engine = get_engine()
+        if engine.dialect.name != "postgresql":
+            return True
+        with self._connection_lock:
+            if self._engine is None:
+                self._engine = create_engine(engine.url, poolclass=NullPool, isolation_level="AUTOCOMMIT")
+            try:
+                self._connection = self._engine.connect()
+                if self._try_lock(LEADER_LOCK_KEY):
+                    return True
+            except Exception:
+                logger.exception("Scheduler leader election failed")
+            self._close()
+            return False
+
+    def _close(self) -> None:
+        if self._connection is not None:
+            try:
+                self._connection.close()  # releases every advisory lock it held
+            except Exception:
+                pass
+            self._connection = None
+
+    def _lock_job(self, job: Job) -> Optional[bool]:
+        """True if locked, False if held elsewhere, None if leadership was lost."""
+        with self._connection_lock:
+            if self._connection is None:
+                return True  # SQLite
+            try:
+                return self._try_lock(job.lock_key)
+            except Exception:
+                logger.exception("Scheduler lost its lock connection")
+                self._close()
+                return None
+
+    def _unlock_job(self, job: Job) -> None:
+        with self._connection_lock:
+            if self._connection is None:
+                return
+            try:
+                self._connection.execute(text("SELECT pg_advisory_unlock(:k)"), {"k": job.lock_key})
+            except Exception:
+                logger.exception("Scheduler lost its lock connection")
+                self._close()
+
+    def _step_down(self) -> None:
+        with self._connection_lock:
+            self._close()
+        if self.is_leader:
+            logger.warning("Scheduler leadership lost")
+        self.is_leader = False
+
+    # Runs
+
+    async def _run_job(self, job: Job) -> None:
+        stats = job.stats
+        locked = await run_in_threadpool(self._lock_job, job)
+        if locked is None:
+            self._step_down()
+            return
+        if not locked:
+            stats.skipped += 1
+            return
+        stats.last_started_at = datetime.utcnow()
+        started = time.perf_counter()
+        try:
+            stats.last_result = await run_in_threadpool(job.func)
+            stats.last_error = None
+        except Exception as exc:
+            stats.failures += 1
+            stats.last_error = repr(exc)
+            logger.exception("Job %s failed", job.name)
+        finally:
+            await run_in_threadpool(self._unlock_job, job)
+            duration_ms = (time.perf_counter() - started) * 1000
+            stats.runs += 1
+            stats.last_duration_ms = round(duration_ms, 2)
+            stats.max_duration_ms = max(stats.max_duration_ms, stats.last_duration_ms)
+            stats.total_duration_ms += duration_ms
+            logger.info("Job %s finished in %.1f ms", job.name, duration_ms,
+                        extra={"job": job.name, "duration_ms": round(duration_ms, 2)})
+
+    def _start_due(self, now: datetime) -> None:
+        for job in self.jobs.values():
+            if job.stats.next_run_at > now:
+                continue
+            running = self._running.get(job.name)
+            if running is not None and not running.done():
+                job.stats.skipped += 1
+                logger.warning("Job %s still running, skipping this run", job.name)
+            else:
+                self._running[job.name] = asyncio.create_task(self._run_job(job))
+            # Plan from the trigger time, so jitter does not drift interval jobs
+            due_at = job.trigger.next_after(job.due_at)
+            if due_at <= now:
+                due_at = job.trigger.next_after(now) if isinstance(job.trigger, CronTrigger) else now
+            job.plan(due_at)
+
+    async def _sleep(self, seconds: float) -> None:
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), max(0.0, seconds))
+        except asyncio.TimeoutError:
+            pass
+
+    async def run(self) -> None:
+        """Elect, then run jobs as they come due, until shutdown (a lifespan task)."""
+        self._stop.clear()
+        self._wakeup = asyncio.Event()
+        while not self.stopping:
+            if not self.is_leader:
+                self.is_leader = await run_in_threadpool(self._elect)
+                if not self.is_leader:
+                    await self._sleep(settings.scheduler_election_seconds)
+                    continue
+                logger.info("Scheduler leader in this process, %d jobs", len(self.jobs))
+                now = datetime.utcnow()
+                for job in self.jobs.values():
+                    job.plan(job.trigger.first(now))
+
+            self._start_due(datetime.utcnow())
+            if not self.jobs:
+                await self._sleep(settings.scheduler_election_seconds)
+                continue
+            next_run_at = min(job.stats.next_run_at for job in self.jobs.values())
+            await self._sleep((next_run_at - datetime.utcnow()).total_seconds())
+
+    async def shutdown(self) -> None:
+        """Stop starting runs, give running jobs scheduler_shutdown_seconds, then release leadership."""
+        self._stop.set()
+        if self._wakeup is not None:
+            self._wakeup.set()
+        running = {task: name for name, task in self._running.items() if not task.done()}
+        if running:
+            _, pending = await asyncio.wait(running, timeout=settings.scheduler_shutdown_seconds)
+            for task in pending:
+                # The thread keeps going; its lock goes with the connection
+                logger.warning("Job %s did not finish before shutdown", running[task])
+                task.cancel()
+        self.is_leader = False
+        await run_in_threadpool(self._step_down)
+        if self._engine is not None:
+            self._engine.dispose()
+            self._engine = None
+
+    def metrics(self) -> dict:
+        return {
+            "leader": self.is_leader,
+            "jobs": {
+                name: {"trigger": str(job.trigger), "jitter_seconds": job.jitter_seconds, **job.stats.as_dict()}
+                for name, job in self.jobs.items()
+            },
+        }
+
+
+# Per-process instance
+job_scheduler = JobScheduler()
+
+
+def with_primary_session(func: Callable) -> Callable[[], object]:
+    """Job calling func(db) with a session on the primary, e.g. OTPService.cleanup_expired_otps."""
+    def job():
+        from app.core.database import SessionLocal, get_engine
+
+        get_engine()
+        db = SessionLocal()
+        try:
+            return func(db)
+        finally:
+            db.close()
+
+    job.__qualname__ = getattr(func, "__qualname__", "job")
+    return job
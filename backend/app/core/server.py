@@ -0,0 +1,121 @@
+"""
+Production server launcher: multi-worker Gunicorn with Uvicorn workers.
+"""
+
+import os
+import sys
+from typing import Any, Dict
+from app.core.config import get_settings, settings
+
+APP_IMPORT_STRING = "main:app"
+
+
+def default_worker_count() -> int:
+    """One async worker per CPU available to this process (respects container CPU affinity)."""
+    if hasattr(os, "sched_getaffinity"):
+        return max(1, len(os.sched_getaffinity(0)))
+    return max(1, os.cpu_count() or 1)
+
+
+def configure_worker_count(workers: int = 0) -> int:
+    """
+    Resolve the worker count and publish it as WEB_CONCURRENCY, so every
+    worker sizes its database pool against the same total (see get_pool_limits).
+    """
+    # SQLite takes one writer at a time and has no cross-worker cache invalidation
+    # (no LISTEN/NOTIFY), so embedded installs run a single worker unless told otherwise
+    workers = workers or settings.web_concurrency or (1 if settings.database_is_sqlite else default_worker_count())
+    os.environ["WEB_CONCURRENCY"] = str(workers)
+    get_settings.cache_clear()
+    return workers
+
+
+def gunicorn_options(workers: int, host: str, port: int) -> Dict[str, Any]:
+    """Gunicorn settings for the production server."""
+    return {
+        "bind": f"{host}:{port}",
+        "workers": workers,
+        "worker_class": "app.core.uvicorn_worker.UvicornWorker",
+        # Import the app once in the master; workers share its memory copy-on-write.
+        # Safe because the DB engine is created per worker in the lifespan.
+        "preload_app": True,
+        "keepalive": settings.keepalive_seconds,
+        "backlog": settings.backlog,
+        # SIGTERM: stop accepting, let in-flight requests finish for up to this long
+        "graceful_timeout": settings.graceful_timeout_seconds,
+        "timeout": settings.graceful_timeout_seconds + 30,
+        "loglevel": "debug" if settings.debug else "info",
+        # Requests are logged by RequestLogMiddleware (see app.core.logs)
+        "accesslog": None,
+        "errorlog": "-",
+    }
+
+
+def run_gunicorn(options: Dict[str, Any]) -> None:
+    """Run Gunicorn programmatically with the given options."""
+    from gunicorn.app.base import BaseApplication
+
+    class StandaloneApplication(BaseApplication):
+        def load_config(self):
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            from main import app
+
+            return app
+
+    StandaloneApplication().run()
+
+
+def run_uvicorn_workers(workers: int, host: str, port: int) -> None:
+    """
+    Fallback for platforms without Gunicorn (Windows): Uvicorn's own process
+    manager. Workers are spawned rather than forked, so there is no preload.
+    """
+    import uvicorn
+
+    uvicorn.run(
+        APP_IMPORT_STRING,
+        host=host,
+        port=port,
+        workers=workers,
+        loop="auto",
+        http="auto",
+        backlog=settings.backlog,
+        timeout_keep_alive=settings.keepalive_seconds,
+        timeout_graceful_shutdown=settings.graceful_timeout_seconds,
+        log_level="info" if not settings.debug else "debug",
+        access_log=False,
+    )
+
+
+def run_production(workers: int = 0, host: str = None, port: int = None) -> None:
+    """Start the multi-worker production server."""
+    workers = configure_worker_count(workers)
+    host = host or settings.host
+    port = port or settings.port
+
+    try:
+        import gunicorn  # noqa: F401
+    except ImportError:
+        if sys.platform != "win32":
+            raise
+        run_uvicorn_workers(workers, host, port)
+        return
+
+    run_gunicorn(gunicorn_options(workers, host, port))
+
+
+def run_development(host: str = None, port: int = None) -> None:
+    """Single process with auto-reload, for local development."""
+    import uvicorn
+
+    uvicorn.run(
+        APP_IMPORT_STRING,
+        host=host or settings.host,
+        port=port or settings.port,
+        reload=True,
+        log_level="info" if not settings.debug else "debug",
+        access_log=False,
+    )
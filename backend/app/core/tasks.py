@@ -0,0 +1,23 @@
+"""
+Helpers for periodic background tasks started from the FastAPI lifespan.
+"""
+
+import asyncio
+import logging
+from typing import Callable
+from starlette.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+
+async def run_periodically(func: Callable[[], object], interval_seconds: float) -> None:
+    """
+    Run a blocking function in the threadpool every interval_seconds until cancelled.
+    Failures are logged and retried on the next tick.
+    """
+    while True:
+        try:
+            await run_in_threadpool(func)
+        except Exception:
+            logger.exception("Periodic task %s failed", getattr(func, "__qualname__", func))
+        await asyncio.sleep(interval_seconds)
@@ -0,0 +1,235 @@
+"""
+Tenant-aware database routing.
+
+Each business owner (tenant) and all of its establishments live on one shard:
+the primary (DEFAULT_SHARD) unless the tenant_shards directory on the primary
+says otherwise. The catalog (business owners, establishments) and users stay
+global on the primary; a tenant's ledger tables (programs, QR codes, point
+activity, balances) live on its shard. Establishment -> shard lookups are
+cached per process for tenant_directory_ttl_seconds, which is also how long a
+tenant move waits for every worker to see it. Per-user reads that span
+tenants (wallet, activity, QR codes by id) query every shard and keep each
+row only from the shard its establishment is routed to.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
+from fastapi import HTTPException, Request, status
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.database import (
+    DEFAULT_SHARD,
+    SessionLocal,
+    open_read_session,
+    replica_pool,
+    shard_registry,
+    wrote_recently,
+)
+from app.core.dialects import upsert
+
+
+# User columns kept current on shard copies (shown with tenant data; unique columns are left alone)
+REPLICATED_USER_COLUMNS = ("full_name", "avatar_url", "is_active")
+
+
+class TenantRoute(NamedTuple):
+    """Where an establishment's tenant lives."""
+    business_owner_id: int
+    shard: str
+    moving: bool
+
+
+class TenantDirectory:
+    """Per-process cache of establishment -> TenantRoute lookups."""
+
+    def __init__(self):
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()  # establishment_id -> (loaded_at, route)
+        self._lock = threading.Lock()
+
+    def route(self, establishment_id: int) -> Optional[TenantRoute]:
+        """Route for an establishment, or None if it does not exist (blocking on a cache miss)."""
+        now = time.monotonic()
+        entry = self._entries.get(establishment_id)
+        if entry is not None and now - entry[0] < settings.tenant_directory_ttl_seconds:
+            return entry[1]
+
+        route = self._load(establishment_id)
+        with self._lock:
+            self._entries[establishment_id] = (now, route)
+            self._entries.move_to_end(establishment_id)
+            while len(self._entries) > settings.tenant_directory_max_entries:
+                self._entries.popitem(last=False)
+        return route
+
+    def invalidate_owner(self, business_owner_id: int) -> None:
+        """Drop this process's cached routes for a tenant (other workers expire by TTL)."""
+        with self._lock:
+            for establishment_id, (_, route) in list(self._entries.items()):
+                if route is not None and route.business_owner_id == business_owner_id:
+                    del self._entries[establishment_id]
+
+    @staticmethod
+    def _load(establishment_id: int) -> Optional[TenantRoute]:
+        from app.models.establishment import Establishment
+        from app.models.tenant_shard import TenantShard
+
+        db = open_read_session()
+        try:
+            row = db.execute(
+                select(Establishment.business_owner_id, TenantShard.shard, TenantShard.is_moving)
+                .outerjoin(TenantShard, TenantShard.business_owner_id == Establishment.business_owner_id)
+                .where(Establishment.id == establishment_id)
+            ).first()
+        finally:
+            db.close()
+
+        if row is None:
+            return None
+        return TenantRoute(row.business_owner_id, row.shard or DEFAULT_SHARD, bool(row.is_moving))
+
+
+# Per-process instance
+tenant_directory = TenantDirectory()
+
+
+def open_tenant_session(establishment_id: int, request: Optional[Request] = None, read_only: bool = False) -> Session:
+    """
+    Session on the shard holding the establishment's tenant. Raises 404 for an
+    unknown establishment and 503 while the tenant is being moved. Read-only
+    sessions for tenants on the primary may use a replica (see get_read_db).
+    """
+    route = tenant_directory.route(establishment_id)
+    if route is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Establishment not found"
+        )
+    if route.moving:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Establishment data is being migrated; retry shortly",
+            headers={"Retry-After": str(int(settings.tenant_directory_ttl_seconds))},
+        )
+
+    engine = shard_registry.engine(route.shard)
+    if read_only:
+        replica = None
+        if route.shard == DEFAULT_SHARD and request is not None and not wrote_recently(request):
+            replica = replica_pool.choose()
+        engine = replica or shard_registry.read_engine(route.shard)
+    db = SessionLocal(bind=engine)
+    db.info["shard"] = route.shard
+    if read_only:
+        db.info["read_only"] = True
+    elif request is not None:
+        db.info["request_state"] = request.state
+    return db
+
+
+def get_tenant_db(establishment_id: int, request: Request):
+    """Session dependency for establishment-scoped routes (establishment_id path or query parameter)."""
+    db = open_tenant_session(establishment_id, request)
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def get_tenant_read_db(establishment_id: int, request: Request):
+    """Read-only variant of get_tenant_db."""
+    db = open_tenant_session(establishment_id, request, read_only=True)
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+@contextmanager
+def tenant_session(establishment_id: int) -> Iterator[Session]:
+    """Tenant session for scripts and background tasks."""
+    db = open_tenant_session(establishment_id)
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def lives_on(establishment_id: int, shard: str) -> bool:
+    """Whether the establishment's tenant is routed to the shard (copies left behind by a move are not)."""
+    route = tenant_directory.route(establishment_id)
+    return route is not None and route.shard == shard
+
+
+def shard_sessions(db: Session) -> Iterator[Tuple[str, Session]]:
+    """db for the primary, then a read-only session on each tenant shard, closed once iterated past."""
+    yield DEFAULT_SHARD, db
+    for shard in shard_registry.engines:
+        shard_db = open_read_session(shard)
+        try:
+            yield shard, shard_db
+        finally:
+            shard_db.close()
+
+
+def query_all_shards(db: Session, statement) -> List:
+    """
+    Rows of a statement selecting establishment_id, run on the primary through
+    db and on every tenant shard, each row kept only from its tenant's shard.
+    Without shards this is db.execute(statement).all().
+    """
+    if not shard_registry.engines:
+        return db.execute(statement).all()
+    return [
+        row
+        for shard, shard_db in shard_sessions(db)
+        for row in shard_db.execute(statement)
+        if lives_on(row.establishment_id, shard)
+    ]
+
+
+def replicate_users(db: Session, user_ids: Iterable[int]) -> Set[int]:
+    """
+    Return the active users among user_ids, checked on the primary. On a
+    shard, user rows it does not have yet are copied in from the primary so
+    tenant rows can reference them, and copies whose REPLICATED_USER_COLUMNS
+    changed on the primary are refreshed.
+    """
+    from app.models.user import User
+
+    user_ids = set(user_ids)
+    if db.info.get("shard", DEFAULT_SHARD) == DEFAULT_SHARD:
+        return set(db.execute(
+            select(User.id).where(User.id.in_(user_ids), User.is_active.is_(True))
+        ).scalars())
+
+    primary = SessionLocal()
+    try:
+        rows = primary.execute(select(User.__table__).where(User.id.in_(user_ids))).mappings().all()
+    finally:
+        primary.close()
+
+    users = User.__table__
+    copies = {
+        row.id: tuple(row[1:])
+        for row in db.execute(
+            select(users.c.id, *[users.c[name] for name in REPLICATED_USER_COLUMNS]).where(users.c.id.in_(user_ids))
+        )
+    }
+    missing = [dict(row) for row in rows if row["id"] not in copies]
+    if missing:
+        # Workers of other tenants' establishments don't carry their assignment over
+        for row in missing:
+            row["establishment_id"] = None
+        db.execute(upsert(db, users).on_conflict_do_nothing(), missing)
+    changed = [
+        {"user_id": row["id"], **{name: row[name] for name in REPLICATED_USER_COLUMNS}}
+        for row in rows
+        if row["id"] in copies and copies[row["id"]] != tuple(row[name] for name in REPLICATED_USER_COLUMNS)
+    ]
+    if changed:
+        db.execute(update(users).where(users.c.id == bindparam("user_id")), changed)
+    return {row["id"] for row in rows if row["is_active"]}
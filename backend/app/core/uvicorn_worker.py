@@ -0,0 +1,21 @@
+"""
+Gunicorn worker class for running the API in production.
+"""
+
+from typing import Any
+from uvicorn.workers import UvicornWorker as BaseUvicornWorker
+
+
+class UvicornWorker(BaseUvicornWorker):
+    """
+    Uvicorn worker pinned to the uvloop event loop and httptools parser.
+    Gunicorn passes keep-alive and backlog through; the graceful shutdown
+    timeout is set just below Gunicorn's graceful_timeout so in-flight
+    requests drain and the lifespan shutdown runs before the worker is killed.
+    """
+
+    CONFIG_KWARGS = {"loop": "uvloop", "http": "httptools", "lifespan": "on"}
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.config.timeout_graceful_shutdown = max(1, self.cfg.graceful_timeout - 2)
@@ -7,8 +7,13 @@ from .user import User
 from .loyalty_program import LoyaltyProgram
 from .user_loyalty_points import UserLoyaltyPoints
 from .qr_code import QRCode
+from .qr_code_archive import QRCodeArchive
 from .point_activity import PointActivity
 from .otp import OTP
+from .refresh_token import RefreshToken
+from .revoked_token import RevokedToken
+from .tenant_shard import TenantShard
+from .booked_receipt import BookedReceipt
 
 __all__ = [
     "BaseModel",
@@ -18,6 +23,11 @@ __all__ = [
     "LoyaltyProgram",
     "UserLoyaltyPoints", 
     "QRCode",
+    "QRCodeArchive",
     "PointActivity",
-    "OTP"
+    "OTP",
+    "RefreshToken",
+    "RevokedToken",
+    "TenantShard",
+    "BookedReceipt"
 ]
@@ -3,10 +3,14 @@ Base model with common fields for all database models.
 """
 
 from datetime import datetime
-from sqlalchemy import Column, DateTime, Integer
+from sqlalchemy import JSON, Column, DateTime, Integer
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.ext.declarative import declared_attr
 from app.core.database import Base
 
+# JSONB on PostgreSQL, generic JSON (text) elsewhere, e.g. SQLite
+JSONType = JSON().with_variant(JSONB(), "postgresql")
+
 
 class BaseModel(Base):
     """
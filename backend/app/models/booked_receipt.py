@@ -0,0 +1,28 @@
+"""
+Booked Receipt model: POS receipts that have already earned points.
+"""
+
+from sqlalchemy import Column, Integer, ForeignKey, String, UniqueConstraint
+from app.models.base import BaseModel
+
+
+class BookedReceipt(BaseModel):
+    """
+    One row per POS receipt booked for an establishment, written in the same
+    transaction as its point activity. The unique (establishment, receipt)
+    pair makes a re-posted receipt a duplicate, across batches, workers and
+    restarts.
+    """
+    __tablename__ = "booked_receipts"
+
+    establishment_id = Column(Integer, ForeignKey("establishments.id", ondelete="CASCADE"), nullable=False)
+    receipt_id = Column(String(64), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+
+    # Constraints
+    __table_args__ = (
+        UniqueConstraint('establishment_id', 'receipt_id', name='uq_booked_receipts_establishment_receipt'),
+    )
+
+    def __str__(self):
+        return f"BookedReceipt(establishment_id={self.establishment_id}, receipt_id={self.receipt_id})"
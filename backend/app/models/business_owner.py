@@ -2,6 +2,7 @@
 Business Owner model for franchise and chain management.
 """
 
+from datetime import datetime
 from sqlalchemy import Column, String, Boolean, TIMESTAMP, Text
 from sqlalchemy.orm import relationship
 from app.models.base import BaseModel
@@ -32,7 +33,7 @@ class BusinessOwner(BaseModel):
     is_active = Column(Boolean, nullable=False, default=True)
     partnership_status = Column(String(50), default='active')  # active, suspended, terminated
     pricing_model = Column(String(50), default='per_customer')  # per_customer, per_redemption, revenue_share
-    joined_date = Column(TIMESTAMP, default="CURRENT_TIMESTAMP")
+    joined_date = Column(TIMESTAMP, default=datetime.utcnow)
 
     # Relationships
     establishments = relationship("Establishment", back_populates="business_owner")
@@ -3,9 +3,8 @@ Establishment model for individual business locations.
 """
 
 from sqlalchemy import Column, String, Boolean, Integer, ForeignKey, Text, Float
-from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
-from app.models.base import BaseModel
+from app.models.base import BaseModel, JSONType
 
 
 class Establishment(BaseModel):
@@ -36,8 +35,8 @@ class Establishment(BaseModel):
     postal_code = Column(String(20), nullable=True)
     
     # Business settings
-    business_hours = Column(JSONB, nullable=True)  # {"monday": "9:00-18:00", ...}
-    settings = Column(JSONB, nullable=True)  # custom settings
+    business_hours = Column(JSONType, nullable=True)  # {"monday": "9:00-18:00", ...}
+    settings = Column(JSONType, nullable=True)  # custom settings
     
     # Location and status
     is_active = Column(Boolean, nullable=False, default=True)
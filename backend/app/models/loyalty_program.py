@@ -2,7 +2,7 @@
 Loyalty Program model for flexible reward programs.
 """
 
-from sqlalchemy import Column, String, Boolean, Integer, ForeignKey, Text, TIMESTAMP, Numeric
+from sqlalchemy import Column, String, Boolean, Integer, ForeignKey, Text, TIMESTAMP, Numeric, Index
 from sqlalchemy.orm import relationship
 from app.models.base import BaseModel
 
@@ -42,5 +42,10 @@ class LoyaltyProgram(BaseModel):
     qr_codes = relationship("QRCode", back_populates="program")
     point_activities = relationship("PointActivity", back_populates="program")
 
+    # Active programs per establishment (wallet and catalog lookups)
+    __table_args__ = (
+        Index('ix_loyalty_programs_establishment_active', 'establishment_id', 'is_active'),
+    )
+
     def __str__(self):
         return f"LoyaltyProgram(id={self.id}, name={self.program_name}, points_required={self.points_required})"
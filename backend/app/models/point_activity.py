@@ -2,10 +2,10 @@
 Point Activity model for tracking all loyalty point transactions.
 """
 
+from datetime import datetime
 from sqlalchemy import Column, String, Integer, ForeignKey, TIMESTAMP, Numeric, Text
-from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
-from app.models.base import BaseModel
+from app.models.base import BaseModel, JSONType
 
 
 class PointActivity(BaseModel):
@@ -18,7 +18,7 @@ class PointActivity(BaseModel):
     # Remove the default id, created_at, updated_at from BaseModel
     # because this table only needs created_at
     id = Column(Integer, primary_key=True, autoincrement=True)
-    created_at = Column(TIMESTAMP, nullable=False, default="CURRENT_TIMESTAMP")
+    created_at = Column(TIMESTAMP, nullable=False, default=datetime.utcnow)
 
     # Relationships
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
@@ -31,18 +31,21 @@ class PointActivity(BaseModel):
     description = Column(Text, nullable=False)  # "Purchased 40€", "Redeemed Free Pizza"
     
     # Context
-    qr_code_id = Column(Integer, ForeignKey("qr_codes.id", ondelete="SET NULL"), nullable=True)
+    # No foreign key: the code may have moved to qr_codes_archive
+    qr_code_id = Column(Integer, nullable=True)
     processed_by_user_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)  # which worker/admin processed
     
     # Additional data
     amount_spent = Column(Numeric(10,2), nullable=True)  # original purchase amount
-    extra_data = Column(JSONB, nullable=True)  # any additional context
+    extra_data = Column(JSONType, nullable=True)  # any additional context
 
     # Relationships
     user = relationship("User", back_populates="point_activities", foreign_keys=[user_id])
     establishment = relationship("Establishment", back_populates="point_activities")
     program = relationship("LoyaltyProgram", back_populates="point_activities")
-    qr_code = relationship("QRCode", back_populates="point_activities")
+    qr_code = relationship(
+        "QRCode", back_populates="point_activities", primaryjoin="foreign(PointActivity.qr_code_id) == QRCode.id"
+    )
     processed_by = relationship("User", foreign_keys=[processed_by_user_id])
 
     def __str__(self):
@@ -2,10 +2,9 @@
 QR Code model for one-time use loyalty codes.
 """
 
-from sqlalchemy import Column, String, Boolean, Integer, ForeignKey, TIMESTAMP, Text, Numeric
-from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy import Column, String, Boolean, Integer, ForeignKey, TIMESTAMP, Text, Numeric, Index, text
 from sqlalchemy.orm import relationship
-from app.models.base import BaseModel
+from app.models.base import BaseModel, JSONType
 
 
 class QRCode(BaseModel):
@@ -41,14 +40,21 @@ class QRCode(BaseModel):
     
     # Additional data
     description = Column(Text, nullable=True)  # "Purchase of 40€", "Free Pizza Redemption"
-    extra_data = Column(JSONB, nullable=True)  # any additional data needed
+    extra_data = Column(JSONType, nullable=True)  # any additional data needed
 
     # Relationships
     establishment = relationship("Establishment", back_populates="qr_codes")
     program = relationship("LoyaltyProgram", back_populates="qr_codes")
     used_by = relationship("User", back_populates="used_qr_codes", foreign_keys=[used_by_user_id])
     created_by = relationship("User", back_populates="created_qr_codes", foreign_keys=[created_by_user_id])
-    point_activities = relationship("PointActivity", back_populates="qr_code")
+    point_activities = relationship(
+        "PointActivity", back_populates="qr_code", primaryjoin="QRCode.id == foreign(PointActivity.qr_code_id)"
+    )
+
+    __table_args__ = (
+        # Archival candidates among used codes; entries leave with their rows
+        Index('ix_qr_codes_used_at', 'used_at', postgresql_where=text('is_used'), sqlite_where=text('is_used')),
+    )
 
     def __str__(self):
         return f"QRCode(id={self.id}, type={self.code_type}, points={self.points_value}, used={self.is_used})"
@@ -0,0 +1,45 @@
+"""
+QR Code archive model for used and expired codes moved out of qr_codes.
+"""
+
+from datetime import datetime
+from sqlalchemy import Column, String, Boolean, Integer, ForeignKey, TIMESTAMP, Text, Numeric
+from app.models.base import BaseModel, JSONType
+
+
+class QRCodeArchive(BaseModel):
+    """
+    Archived QR code: same columns (and id) as QRCode, moved here once it is
+    used or expired past the archival threshold so the hot qr_codes table and
+    its indexes only hold the live working set. Read-only history; user and
+    program references are kept as plain ids.
+    """
+    __tablename__ = "qr_codes_archive"
+
+    # Keeps the id the code had in qr_codes
+    id = Column(Integer, primary_key=True, autoincrement=False)
+
+    establishment_id = Column(Integer, ForeignKey("establishments.id", ondelete="CASCADE"), nullable=False, index=True)
+    program_id = Column(Integer, nullable=True)
+
+    qr_code_hash = Column(String(255), unique=True, nullable=False, index=True)
+    qr_code_url = Column(String(500), nullable=True)
+
+    code_type = Column(String(20), nullable=False)
+    points_value = Column(Integer, nullable=False)
+    amount_spent = Column(Numeric(10,2), nullable=True)
+
+    is_used = Column(Boolean, nullable=False, default=False)
+    used_by_user_id = Column(Integer, nullable=True)
+    used_at = Column(TIMESTAMP, nullable=True)
+
+    expires_at = Column(TIMESTAMP, nullable=False)
+    created_by_user_id = Column(Integer, nullable=True)
+
+    description = Column(Text, nullable=True)
+    extra_data = Column(JSONType, nullable=True)
+
+    archived_at = Column(TIMESTAMP, nullable=False, default=datetime.utcnow)
+
+    def __str__(self):
+        return f"QRCodeArchive(id={self.id}, type={self.code_type}, used={self.is_used})"
@@ -0,0 +1,25 @@
+"""
+Refresh Token model for rotating refresh tokens.
+"""
+
+from sqlalchemy import Column, String, Integer, ForeignKey, TIMESTAMP
+from app.models.base import BaseModel
+
+
+class RefreshToken(BaseModel):
+    """
+    Refresh token issued alongside an access token.
+    Each refresh rotates the token; all tokens from one login share a family,
+    so reuse of an already-rotated token revokes the whole family.
+    """
+    __tablename__ = "refresh_tokens"
+
+    jti = Column(String(36), unique=True, nullable=False, index=True)
+    family_id = Column(String(36), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    expires_at = Column(TIMESTAMP, nullable=False)
+    revoked_at = Column(TIMESTAMP, nullable=True)
+    replaced_by_jti = Column(String(36), nullable=True)
+
+    def __str__(self):
+        return f"RefreshToken(id={self.id}, user_id={self.user_id}, revoked={self.revoked_at is not None})"
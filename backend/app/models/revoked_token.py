@@ -0,0 +1,23 @@
+"""
+Revoked Token model feeding the in-memory access token revocation list.
+"""
+
+from sqlalchemy import Column, String, Integer, ForeignKey, TIMESTAMP
+from app.models.base import BaseModel
+
+
+class RevokedToken(BaseModel):
+    """
+    Revocation entry for access tokens.
+    With a jti it revokes a single token; without one it revokes every token
+    issued to the user before created_at. Workers sync new rows by id.
+    """
+    __tablename__ = "revoked_tokens"
+
+    jti = Column(String(36), nullable=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    # Entry can be dropped once every token it could match has expired
+    expires_at = Column(TIMESTAMP, nullable=False, index=True)
+
+    def __str__(self):
+        return f"RevokedToken(id={self.id}, user_id={self.user_id}, jti={self.jti})"
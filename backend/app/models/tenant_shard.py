@@ -0,0 +1,23 @@
+"""
+Tenant Shard model: the directory of which database holds each tenant.
+"""
+
+from sqlalchemy import Column, String, Boolean, Integer, ForeignKey
+from app.models.base import BaseModel
+
+
+class TenantShard(BaseModel):
+    """
+    Directory entry mapping a business owner (and so all of its
+    establishments) to a database shard. Lives on the primary only; owners
+    without an entry are on the primary. While is_moving is set the tenant is
+    being copied to another shard and its writes are refused.
+    """
+    __tablename__ = "tenant_shards"
+
+    business_owner_id = Column(Integer, ForeignKey("business_owners.id", ondelete="CASCADE"), unique=True, nullable=False)
+    shard = Column(String(50), nullable=False)
+    is_moving = Column(Boolean, nullable=False, default=False)
+
+    def __str__(self):
+        return f"TenantShard(business_owner_id={self.business_owner_id}, shard={self.shard}, moving={self.is_moving})"
@@ -3,9 +3,8 @@ User model for customers, workers, and establishment admins.
 """
 
 from sqlalchemy import Column, String, Boolean, Integer, ForeignKey, TIMESTAMP, Text
-from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
-from app.models.base import BaseModel
+from app.models.base import BaseModel, JSONType
 
 
 class User(BaseModel):
@@ -32,7 +31,7 @@ class User(BaseModel):
     email_verified = Column(Boolean, nullable=False, default=False)
     
     # App preferences
-    notification_settings = Column(JSONB, default={"push": True, "sms": False, "email": False})
+    notification_settings = Column(JSONType, default={"push": True, "sms": False, "email": False})
     app_language = Column(String(10), default='en')
     
     # Activity tracking
@@ -2,10 +2,10 @@
 User Loyalty Points model for tracking customer points per establishment.
 """
 
-from sqlalchemy import Column, Integer, ForeignKey, TIMESTAMP, UniqueConstraint, Numeric
-from sqlalchemy.dialects.postgresql import JSONB
+from datetime import datetime
+from sqlalchemy import Column, Integer, ForeignKey, TIMESTAMP, UniqueConstraint, Numeric, Index
 from sqlalchemy.orm import relationship
-from app.models.base import BaseModel
+from app.models.base import BaseModel, JSONType
 
 
 class UserLoyaltyPoints(BaseModel):
@@ -27,10 +27,10 @@ class UserLoyaltyPoints(BaseModel):
     # Activity tracking
     total_visits = Column(Integer, nullable=False, default=0)
     last_activity_date = Column(TIMESTAMP, nullable=True)
-    first_visit_date = Column(TIMESTAMP, default="CURRENT_TIMESTAMP")
+    first_visit_date = Column(TIMESTAMP, default=datetime.utcnow)
     
     # Customer insights
-    favorite_programs = Column(JSONB, nullable=True)  # track which programs user uses most
+    favorite_programs = Column(JSONType, nullable=True)  # track which programs user uses most
     lifetime_value = Column(Numeric(10,2), default=0)  # estimated customer value
 
     # Relationships
@@ -40,6 +40,11 @@ class UserLoyaltyPoints(BaseModel):
     # Constraints
     __table_args__ = (
         UniqueConstraint('user_id', 'establishment_id', name='uq_user_establishment'),
+        # Covering index for the wallet query (index-only scan on Postgres)
+        Index(
+            'ix_user_loyalty_points_wallet', 'user_id', 'last_activity_date',
+            postgresql_include=['establishment_id', 'current_balance', 'total_points_earned', 'total_visits'],
+        ),
     )
 
     def __str__(self):
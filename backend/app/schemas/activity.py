@@ -0,0 +1,21 @@
+"""
+Point activity schemas for request/response models.
+"""
+
+from datetime import datetime
+from decimal import Decimal
+from typing import Optional
+from app.schemas.base import BaseSchema
+
+
+class PointActivityResponse(BaseSchema):
+    """Single entry of a user's point activity history."""
+    id: int
+    establishment_id: int
+    program_id: Optional[int] = None
+    activity_type: str
+    points_change: int
+    description: str
+    qr_code_id: Optional[int] = None
+    amount_spent: Optional[Decimal] = None
+    created_at: datetime
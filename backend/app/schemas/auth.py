@@ -5,6 +5,7 @@ Authentication schemas for request/response models.
 from pydantic import BaseModel, Field
 from typing import Optional, Union
 from enum import Enum
+from app.schemas.base import BaseSchema
 
 
 class LoginMethod(str, Enum):
@@ -52,6 +53,18 @@ class TokenResponse(BaseModel):
     expires_in: int
     user_id: int
     role: str
+    refresh_token: Optional[str] = None
+    refresh_expires_in: Optional[int] = None
+
+
+class RefreshTokenRequest(BaseModel):
+    """Exchange a refresh token for a new token pair."""
+    refresh_token: str = Field(..., description="Refresh token from the last token response")
+
+
+class LogoutRequest(BaseModel):
+    """Logout request; the refresh token's session is revoked too when given."""
+    refresh_token: Optional[str] = Field(None, description="Refresh token to revoke")
 
 
 class GoogleAuthRequest(BaseModel):
@@ -72,3 +85,22 @@ class OTPResponse(BaseModel):
     """OTP request response."""
     message: str
     expires_in: int = 600  # 10 minutes
+
+
+class GoogleAuthURLResponse(BaseModel):
+    """Google OAuth authorization URL response."""
+    auth_url: str
+
+
+class UserResponse(BaseSchema):
+    """Current user information."""
+    id: int
+    phone_number: str
+    email: Optional[str] = None
+    full_name: Optional[str] = None
+    role: str
+    avatar_url: Optional[str] = None
+    is_active: bool
+    phone_verified: bool
+    email_verified: bool
+    establishment_id: Optional[int] = None
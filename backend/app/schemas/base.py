@@ -0,0 +1,21 @@
+"""
+Base schemas shared across API modules.
+"""
+
+from pydantic import BaseModel, ConfigDict
+
+
+class BaseSchema(BaseModel):
+    """Base response schema that can be populated from ORM objects and Row tuples."""
+    model_config = ConfigDict(from_attributes=True)
+
+
+class MessageResponse(BaseModel):
+    """Simple message response."""
+    message: str
+
+
+class HealthResponse(BaseModel):
+    """Health check response."""
+    status: str
+    service: str
@@ -0,0 +1,28 @@
+"""
+Bulk customer import schemas for request/response models.
+"""
+
+from typing import List
+from pydantic import BaseModel
+
+
+class ImportRowError(BaseModel):
+    """A rejected CSV row (line 1 is the header)."""
+    line: int
+    reason: str
+
+
+class CustomerImportReport(BaseModel):
+    """Outcome of a customer import."""
+    establishment_id: int
+    rows_read: int
+    rows_invalid: int
+    duplicates_in_file: int          # later rows repeating a phone number of the file
+    users_created: int
+    users_matched: int               # phone number already registered
+    balances_created: int
+    balances_existing: int           # customer already had a balance here; left unchanged
+    emails_dropped: int              # invalid, repeated, or already used by another user
+    seconds: float
+    rows_per_second: float
+    errors: List[ImportRowError]     # the first rejected rows
@@ -0,0 +1,47 @@
+"""
+Establishment and loyalty program schemas for request/response models.
+"""
+
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, Optional
+from app.schemas.base import BaseSchema
+
+
+class EstablishmentResponse(BaseSchema):
+    """Public establishment profile and branding."""
+    id: int
+    business_owner_id: int
+    business_name: str
+    business_type: Optional[str] = None
+    description: Optional[str] = None
+    avatar_url: Optional[str] = None
+    background_image_url: Optional[str] = None
+    phone: Optional[str] = None
+    email: Optional[str] = None
+    address: Optional[str] = None
+    city: Optional[str] = None
+    country: Optional[str] = None
+    postal_code: Optional[str] = None
+    business_hours: Optional[Dict[str, Any]] = None
+    is_active: bool
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    updated_at: datetime
+
+
+class LoyaltyProgramResponse(BaseSchema):
+    """Loyalty program as shown to customers."""
+    id: int
+    establishment_id: int
+    program_name: str
+    program_description: Optional[str] = None
+    reward_description: str
+    points_required: int
+    points_per_euro: Optional[Decimal] = None
+    max_redemptions_per_user: Optional[int] = None
+    point_expiry_days: Optional[int] = None
+    start_date: Optional[datetime] = None
+    end_date: Optional[datetime] = None
+    program_color: Optional[str] = None
+    program_icon: Optional[str] = None
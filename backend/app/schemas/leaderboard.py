@@ -0,0 +1,38 @@
+"""
+Leaderboard schemas for request/response models.
+"""
+
+from decimal import Decimal
+from enum import Enum
+from typing import List, Optional, Union
+from pydantic import BaseModel
+
+
+class LeaderboardMetric(str, Enum):
+    """UserLoyaltyPoints columns customers can be ranked by."""
+    CURRENT_BALANCE = "current_balance"
+    TOTAL_VISITS = "total_visits"
+    LIFETIME_VALUE = "lifetime_value"
+
+
+class LeaderboardEntry(BaseModel):
+    """A customer's position on a leaderboard."""
+    rank: int
+    user_id: int
+    full_name: Optional[str] = None
+    value: Union[int, Decimal]
+
+
+class LeaderboardResponse(BaseModel):
+    """A page of an establishment's top customers."""
+    establishment_id: int
+    metric: LeaderboardMetric
+    entries: List[LeaderboardEntry]
+
+
+class LeaderboardRankResponse(BaseModel):
+    """The current customer's rank at an establishment."""
+    establishment_id: int
+    metric: LeaderboardMetric
+    rank: Optional[int] = None
+    value: Optional[Union[int, Decimal]] = None
@@ -0,0 +1,50 @@
+"""
+Operational metrics schemas for response models.
+"""
+
+from datetime import datetime
+from typing import Any, Dict, Optional
+from pydantic import BaseModel
+
+
+class JobMetrics(BaseModel):
+    """A maintenance job's schedule and this worker's runs of it."""
+    trigger: str
+    jitter_seconds: float
+    runs: int
+    failures: int
+    skipped: int
+    last_started_at: Optional[datetime] = None
+    last_duration_ms: Optional[float] = None
+    max_duration_ms: float
+    total_duration_ms: float
+    avg_duration_ms: Optional[float] = None
+    last_result: Any = None
+    last_error: Optional[str] = None
+    next_run_at: Optional[datetime] = None
+
+
+class JobMetricsResponse(BaseModel):
+    """Whether this worker is the scheduler leader, and its jobs by name."""
+    leader: bool
+    jobs: Dict[str, JobMetrics]
+
+
+class HashTimings(BaseModel):
+    """Durations of one password hashing operation in this worker."""
+    count: int
+    mean_ms: Optional[float] = None
+    p50_ms: Optional[float] = None
+    p95_ms: Optional[float] = None
+    max_ms: Optional[float] = None
+
+
+class PasswordHashingMetricsResponse(BaseModel):
+    """Hashing policy and this worker's hash/verify/rehash timings."""
+    scheme: str
+    bcrypt_rounds: int
+    argon2_time_cost: int
+    argon2_memory_kib: int
+    target_ms: float
+    timings: Dict[str, HashTimings]
+    verifications_per_core_second: Optional[float] = None
@@ -0,0 +1,37 @@
+"""
+QR code schemas for request/response models.
+"""
+
+from datetime import datetime
+from enum import Enum
+from typing import List, Optional
+from pydantic import BaseModel, Field
+
+
+class QRCodeStatus(str, Enum):
+    """Lifecycle state of a one-time QR code."""
+    PENDING = "pending"
+    USED = "used"
+    EXPIRED = "expired"
+
+
+class QRCodeStatusResponse(BaseModel):
+    """Current state of a QR code."""
+    qr_code_id: int
+    status: QRCodeStatus
+    used_at: Optional[datetime] = None
+    used_by_user_id: Optional[int] = None
+
+
+class QRImageFormat(str, Enum):
+    """Rendered QR image format."""
+    PNG = "png"
+    SVG = "svg"
+
+
+class QRImageBatchRequest(BaseModel):
+    """Codes to render in one batch (e.g. for a printed campaign)."""
+    qr_code_ids: List[int] = Field(..., min_length=1)
+    format: QRImageFormat = QRImageFormat.SVG
+    scale: int = Field(8, ge=1, le=50)
+    border: int = Field(4, ge=0, le=20)
@@ -0,0 +1,46 @@
+"""
+POS receipt batch schemas for request/response models.
+"""
+
+from datetime import datetime
+from decimal import Decimal
+from enum import Enum
+from typing import List, Optional
+from pydantic import BaseModel, Field
+
+
+class ReceiptStatus(str, Enum):
+    """Outcome of one receipt."""
+    ACCEPTED = "accepted"
+    DUPLICATE = "duplicate"                  # receipt_id already booked, or repeated within the batch
+    INVALID_CUSTOMER = "invalid_customer"
+    NO_ACTIVE_PROGRAM = "no_active_program"  # the program (or any program) was not live at purchase time
+
+
+class Receipt(BaseModel):
+    """A purchase posted by a point-of-sale system."""
+    receipt_id: str = Field(..., min_length=1, max_length=64, description="POS receipt number, echoed in the result")
+    user_id: int = Field(..., description="Customer the purchase is credited to")
+    amount_spent: Decimal = Field(..., ge=0, max_digits=10, decimal_places=2)
+    program_id: Optional[int] = Field(None, description="Program to accrue under; default: best rate live at purchase")
+    purchased_at: datetime
+
+
+class ReceiptBatchRequest(BaseModel):
+    """A batch of receipts, e.g. a till's end-of-day export."""
+    receipts: List[Receipt] = Field(..., min_length=1)
+
+
+class ReceiptResult(BaseModel):
+    """Result for one receipt of the batch."""
+    receipt_id: str
+    status: ReceiptStatus
+    program_id: Optional[int] = None
+    points: Optional[int] = None
+
+
+class ReceiptBatchResponse(BaseModel):
+    """Per-receipt results, in request order."""
+    accepted: int
+    points_awarded: int
+    results: List[ReceiptResult]
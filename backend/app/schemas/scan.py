@@ -0,0 +1,48 @@
+"""
+Offline scan sync schemas for request/response models.
+"""
+
+from datetime import datetime
+from enum import Enum
+from typing import List, Optional
+from pydantic import BaseModel, Field
+
+
+class ScanStatus(str, Enum):
+    """Outcome of one synced scan."""
+    ACCEPTED = "accepted"
+    DUPLICATE = "duplicate"                      # already claimed by this customer (e.g. a re-upload)
+    ALREADY_USED = "already_used"                # claimed by another customer
+    EXPIRED = "expired"                          # code had expired when it was scanned
+    INVALID_TIME = "invalid_time"                # scanned before the code existed, or beyond the offline window
+    NOT_FOUND = "not_found"                      # unknown code or another establishment's
+    INVALID_CUSTOMER = "invalid_customer"
+    INSUFFICIENT_POINTS = "insufficient_points"  # redemption exceeding the customer's balance
+    VELOCITY_LIMITED = "velocity_limited"        # breaks a velocity rule (see app.services.velocity)
+
+
+class OfflineScan(BaseModel):
+    """A scan recorded by a worker device while offline."""
+    scan_id: str = Field(..., min_length=1, max_length=64, description="Device-generated id, echoed in the result")
+    qr_code_hash: str = Field(..., min_length=1, max_length=255)
+    user_id: int = Field(..., description="Customer the code was scanned for")
+    scanned_at: datetime
+
+
+class ScanSyncRequest(BaseModel):
+    """A batch of offline scans."""
+    scans: List[OfflineScan] = Field(..., min_length=1)
+
+
+class ScanResult(BaseModel):
+    """Result for one scan of the batch."""
+    scan_id: str
+    status: ScanStatus
+    qr_code_id: Optional[int] = None
+    points_change: Optional[int] = None
+
+
+class ScanSyncResponse(BaseModel):
+    """Per-scan results, in request order."""
+    accepted: int
+    results: List[ScanResult]
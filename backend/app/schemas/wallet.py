@@ -0,0 +1,38 @@
+"""
+Customer wallet schemas for response models.
+"""
+
+from datetime import datetime
+from typing import List, Optional
+from pydantic import BaseModel
+
+
+class WalletProgram(BaseModel):
+    """An active loyalty program and the customer's progress toward its reward."""
+    program_id: int
+    program_name: str
+    reward_description: str
+    points_required: int
+    points_to_go: int
+    progress_percent: int
+    can_redeem: bool
+    program_color: Optional[str] = None
+    program_icon: Optional[str] = None
+
+
+class WalletEntry(BaseModel):
+    """The customer's balance at one establishment."""
+    establishment_id: int
+    business_name: str
+    avatar_url: Optional[str] = None
+    background_image_url: Optional[str] = None
+    current_balance: int
+    total_points_earned: int
+    total_visits: int
+    last_activity_date: Optional[datetime] = None
+    programs: List[WalletProgram]
+
+
+class WalletResponse(BaseModel):
+    """Customer home screen: every establishment balance with its active programs."""
+    establishments: List[WalletEntry]
@@ -0,0 +1,130 @@
+"""
+Vectorized points accrual for receipt batches.
+
+Points are amount_spent x points_per_euro, computed exactly in integers:
+amounts in cents and rates in hundredths of a point per euro, so a receipt
+is worth cents * rate / 10000 points, rounded per accrual_rounding (down,
+half_up or up). points_for is the Decimal reference for a single receipt.
+
+An establishment's program rules are compiled once per version of its
+interval index (see app.services.program_schedule) into NumPy arrays: the
+time boundaries, the sorted program ids, a segments x programs rate matrix
+(-1 where a program is not live) and the best rate per segment. A batch is
+then a searchsorted over the boundaries, one over the program ids and a
+gather, with no Python loop per receipt.
+"""
+
+import threading
+from decimal import ROUND_CEILING, ROUND_FLOOR, ROUND_HALF_UP, Decimal
+from typing import Dict, Optional, Tuple
+from app.core.config import settings
+from app.services.program_schedule import IntervalIndex, program_schedule
+
+ROUNDING_DOWN = "down"
+ROUNDING_HALF_UP = "half_up"
+ROUNDING_UP = "up"
+
+_DECIMAL_ROUNDING = {ROUNDING_DOWN: ROUND_FLOOR, ROUNDING_HALF_UP: ROUND_HALF_UP, ROUNDING_UP: ROUND_CEILING}
+
+# Stored as Numeric(5, 2); NULL means the column default
+DEFAULT_POINTS_PER_EURO = Decimal("1.00")
+
+NOT_LIVE = -1
+
+
+def points_for(amount_spent: Decimal, points_per_euro: Optional[Decimal], rounding: Optional[str] = None) -> int:
+    """Points for one purchase (reference implementation)."""
+    rate = points_per_euro if points_per_euro is not None else DEFAULT_POINTS_PER_EURO
+    mode = _DECIMAL_ROUNDING[rounding or settings.accrual_rounding]
+    return int((amount_spent * rate).quantize(Decimal(1), rounding=mode))
+
+
+def _rate(points_per_euro: Optional[Decimal]) -> int:
+    """Rate in hundredths of a point per euro."""
+    return int((points_per_euro if points_per_euro is not None else DEFAULT_POINTS_PER_EURO) * 100)
+
+
+class CompiledRules:
+    """NumPy form of one establishment's interval index."""
+
+    __slots__ = ("boundaries", "program_ids", "rates", "best", "best_program")
+
+    def __init__(self, index: Optional[IntervalIndex]):
+        import numpy as np
+
+        windows = index.windows if index is not None else {}
+        segments = index.segments if index is not None else [()]
+        self.boundaries = np.array(index.boundaries if index is not None else [], dtype=np.float64)
+        self.program_ids = np.array(sorted(windows), dtype=np.int64)
+        column = {program_id: position for position, program_id in enumerate(self.program_ids.tolist())}
+
+        self.rates = np.full((len(segments), len(self.program_ids)), NOT_LIVE, dtype=np.int64)
+        for position, live in enumerate(segments):
+            for window in live:
+                self.rates[position, column[window.program_id]] = _rate(window.info["points_per_euro"])
+        if len(self.program_ids):
+            best = self.rates.argmax(axis=1)
+            self.best = self.rates[np.arange(len(segments)), best]
+            self.best_program = np.where(self.best != NOT_LIVE, self.program_ids[best], 0)
+        else:
+            self.best = np.full(len(segments), NOT_LIVE, dtype=np.int64)
+            self.best_program = np.zeros(len(segments), dtype=np.int64)
+
+    def accrue(self, cents, purchased_at, program_ids, rounding: Optional[str] = None) -> Tuple[object, object]:
+        """
+        Points and applied program per receipt, from int64 cents, float64
+        epoch seconds and int64 program ids (0 = best rate live at purchase).
+        Receipts without a live program get program 0 and points -1.
+        """
+        import numpy as np
+
+        segment = np.searchsorted(self.boundaries, purchased_at, side="right")
+        rates = self.best[segment]
+        applied = self.best_program[segment]
+
+        named = program_ids != 0
+        if named.any() and len(self.program_ids):
+            column = np.searchsorted(self.program_ids, program_ids[named])
+            column = np.minimum(column, len(self.program_ids) - 1)
+            known = self.program_ids[column] == program_ids[named]
+            named_rates = np.where(known, self.rates[segment[named], column], NOT_LIVE)
+            rates[named] = named_rates
+            applied[named] = np.where(named_rates != NOT_LIVE, program_ids[named], 0)
+        elif named.any():
+            rates[named] = NOT_LIVE
+            applied[named] = 0
+
+        product = cents * rates  # ten-thousandths of a point
+        mode = rounding or settings.accrual_rounding
+        if mode == ROUNDING_DOWN:
+            points = product // 10000
+        elif mode == ROUNDING_HALF_UP:
+            points = (product + 5000) // 10000
+        elif mode == ROUNDING_UP:
+            points = -(-product // 10000)
+        else:
+            raise ValueError(f"Unknown accrual rounding {mode!r}")
+        live = rates != NOT_LIVE
+        return np.where(live, points, -1), np.where(live, applied, 0)
+
+
+class AccrualEngine:
+    """Per-process compiled rules, rebuilt when an establishment's programs change."""
+
+    def __init__(self):
+        self._compiled: Dict[int, Tuple[Optional[IntervalIndex], CompiledRules]] = {}
+        self._lock = threading.Lock()
+
+    def rules(self, establishment_id: int) -> CompiledRules:
+        index = program_schedule.index(establishment_id)
+        cached = self._compiled.get(establishment_id)
+        if cached is not None and cached[0] is index:
+            return cached[1]
+        compiled = CompiledRules(index)
+        with self._lock:
+            self._compiled[establishment_id] = (index, compiled)
+        return compiled
+
+
+# Per-process instance
+accrual_engine = AccrualEngine()
@@ -0,0 +1,359 @@
+"""
+Bulk import of customers and their balances from CSV.
+
+The file is streamed in batches of customer_import_batch_size rows. Each
+batch is normalized and deduplicated in memory, loaded into a temporary
+staging table with COPY (a bulk INSERT on SQLite), and merged with set-based
+statements: new phone numbers become users on the primary, then every
+customer gets a balance row at the establishment on its tenant's shard.
+Existing users are matched by phone number and existing balances are left
+alone, so re-running an import is safe. Each batch commits on its own.
+
+Columns (header names, case-insensitive): phone_number (required), email,
+full_name, current_balance, total_points_earned, total_points_redeemed,
+total_visits, last_activity_date, lifetime_value.
+"""
+
+import csv
+import io
+import logging
+import re
+import time
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from typing import Callable, Dict, Iterator, List, Optional, TextIO
+from sqlalchemy import (
+    TIMESTAMP,
+    Column,
+    Integer,
+    MetaData,
+    Numeric,
+    String,
+    Table,
+    exists,
+    false,
+    insert,
+    literal,
+    null,
+    select,
+    true,
+    update,
+)
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.database import DEFAULT_SHARD, SessionLocal, get_engine
+from app.core.dialects import dialect_name, upsert
+from app.core.tenancy import replicate_users, tenant_directory, tenant_session
+from app.models.base import JSONType
+from app.models.user import User
+from app.models.user_loyalty_points import UserLoyaltyPoints
+from app.schemas.customer_import import CustomerImportReport, ImportRowError
+from app.services.ledger import record_ledger_write
+
+logger = logging.getLogger(__name__)
+
+MAX_REPORTED_ERRORS = 100
+
+HEADER_ALIASES = {
+    "phone": "phone_number",
+    "name": "full_name",
+    "balance": "current_balance",
+    "points": "current_balance",
+    "visits": "total_visits",
+}
+
+_PHONE_PUNCTUATION = re.compile(r"[\s().\-/]")
+_E164 = re.compile(r"\+[1-9]\d{6,14}")
+
+_staging = MetaData()
+STAGE_CUSTOMERS = Table(
+    "_import_customers", _staging,
+    Column("phone_number", String(20)),
+    Column("email", String(255)),
+    Column("full_name", String(255)),
+    prefixes=["TEMPORARY"],
+)
+STAGE_BALANCES = Table(
+    "_import_balances", _staging,
+    Column("user_id", Integer),
+    Column("total_points_earned", Integer),
+    Column("total_points_redeemed", Integer),
+    Column("current_balance", Integer),
+    Column("total_visits", Integer),
+    Column("last_activity_date", TIMESTAMP),
+    Column("lifetime_value", Numeric(10, 2)),
+    prefixes=["TEMPORARY"],
+)
+
+
+def normalize_phone(raw: Optional[str], default_country_code: Optional[str] = None) -> Optional[str]:
+    """
+    E.164 form of a phone number, or None if it is not one. National numbers
+    (leading 0) need default_country_code, e.g. "33".
+    """
+    phone = _PHONE_PUNCTUATION.sub("", raw or "")
+    if phone.startswith("00"):
+        phone = "+" + phone[2:]
+    elif phone.startswith("0"):
+        if not default_country_code:
+            return None
+        phone = "+" + default_country_code.lstrip("+") + phone[1:]
+    elif not phone.startswith("+"):
+        phone = "+" + phone
+    return phone if _E164.fullmatch(phone) else None
+
+
+def normalize_email(raw: Optional[str]) -> Optional[str]:
+    email = (raw or "").strip().lower()
+    if not email or len(email) > 255 or email.count("@") != 1 or email.startswith("@") or email.endswith("@"):
+        return None
+    return email
+
+
+class CustomerRow:
+    """One normalized CSV row."""
+
+    __slots__ = ("line", "phone_number", "email", "full_name", "earned", "redeemed", "balance", "visits",
+                 "last_activity", "lifetime_value")
+
+    def __init__(self, line: int, record: Dict[str, str], default_country_code: Optional[str]):
+        self.line = line
+        self.phone_number = normalize_phone(record.get("phone_number"), default_country_code)
+        if self.phone_number is None:
+            raise ValueError("invalid phone_number")
+        self.email = normalize_email(record.get("email"))
+        self.full_name = (record.get("full_name") or "").strip()[:255] or None
+        self.balance = _integer(record, "current_balance")
+        self.redeemed = _integer(record, "total_points_redeemed")
+        self.earned = _integer(record, "total_points_earned", self.balance + self.redeemed)
+        if self.balance < 0 or self.redeemed < 0 or self.earned < 0:
+            raise ValueError("negative points")
+        self.visits = _integer(record, "total_visits")
+        self.last_activity = _timestamp(record, "last_activity_date")
+        self.lifetime_value = _decimal(record, "lifetime_value")
+
+
+def _integer(record: Dict[str, str], name: str, default: int = 0) -> int:
+    value = (record.get(name) or "").strip()
+    try:
+        return int(value) if value else default
+    except ValueError:
+        raise ValueError(f"invalid {name}") from None
+
+
+def _decimal(record: Dict[str, str], name: str) -> Decimal:
+    value = (record.get(name) or "").strip()
+    try:
+        return Decimal(value).quantize(Decimal("0.01")) if value else Decimal(0)
+    except InvalidOperation:
+        raise ValueError(f"invalid {name}") from None
+
+
+def _timestamp(record: Dict[str, str], name: str) -> Optional[datetime]:
+    value = (record.get(name) or "").strip()
+    try:
+        return datetime.fromisoformat(value) if value else None
+    except ValueError:
+        raise ValueError(f"invalid {name}") from None
+
+
+class ImportProgress:
+    """Running totals of an import, passed to the progress callback after every batch."""
+
+    def __init__(self, establishment_id: int):
+        self.establishment_id = establishment_id
+        self.started = time.perf_counter()
+        self.rows_read = 0
+        self.rows_invalid = 0
+        self.duplicates_in_file = 0
+        self.users_created = 0
+        self.users_matched = 0
+        self.balances_created = 0
+        self.balances_existing = 0
+        self.emails_dropped = 0
+        self.errors: List[ImportRowError] = []
+
+    @property
+    def seconds(self) -> float:
+        return time.perf_counter() - self.started
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows_read / self.seconds if self.seconds > 0 else 0.0
+
+    def reject(self, line: int, reason: str) -> None:
+        self.rows_invalid += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(ImportRowError(line=line, reason=reason))
+
+    def report(self) -> CustomerImportReport:
+        return CustomerImportReport(
+            establishment_id=self.establishment_id,
+            rows_read=self.rows_read,
+            rows_invalid=self.rows_invalid,
+            duplicates_in_file=self.duplicates_in_file,
+            users_created=self.users_created,
+            users_matched=self.users_matched,
+            balances_created=self.balances_created,
+            balances_existing=self.balances_existing,
+            emails_dropped=self.emails_dropped,
+            seconds=round(self.seconds, 3),
+            rows_per_second=round(self.rows_per_second, 1),
+            errors=self.errors,
+        )
+
+
+def _bulk_load(db: Session, table: Table, rows: List[tuple]) -> None:
+    """Create the staging table in the session's transaction and fill it."""
+    connection = db.connection()
+    table.create(connection)
+    if not rows:
+        return
+    if dialect_name(db) == "postgresql":
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)  # None -> empty unquoted field -> NULL
+        buffer.seek(0)
+        columns = ", ".join(column.name for column in table.columns)
+        with connection.connection.cursor() as cursor:
+            cursor.copy_expert(f"COPY {table.name} ({columns}) FROM STDIN WITH (FORMAT csv)", buffer)
+    else:
+        db.execute(insert(table), [dict(zip(table.columns.keys(), row)) for row in rows])
+
+
+class CustomerImporter:
+    """Streams a customer CSV into an establishment."""
+
+    def __init__(self, establishment_id: int, default_country_code: Optional[str] = None,
+                 batch_size: Optional[int] = None,
+                 progress: Optional[Callable[[ImportProgress], None]] = None):
+        self.establishment_id = establishment_id
+        self.default_country_code = default_country_code
+        self.batch_size = batch_size or settings.customer_import_batch_size
+        self.progress = progress
+        self.stats = ImportProgress(establishment_id)
+        self._phones = set()
+        self._emails = set()
+
+    def _batches(self, stream: TextIO) -> Iterator[List[CustomerRow]]:
+        reader = csv.DictReader(stream)
+        if reader.fieldnames is None:
+            return
+        fields = [HEADER_ALIASES.get(name.strip().lower(), name.strip().lower()) for name in reader.fieldnames]
+        if "phone_number" not in fields:
+            raise ValueError("The CSV file has no phone_number column")
+        reader.fieldnames = fields
+
+        batch = []
+        for record in reader:
+            self.stats.rows_read += 1
+            line = reader.line_num
+            try:
+                row = CustomerRow(line, record, self.default_country_code)
+            except ValueError as exc:
+                self.stats.reject(line, str(exc))
+                continue
+            if row.phone_number in self._phones:
+                self.stats.duplicates_in_file += 1
+                continue
+            self._phones.add(row.phone_number)
+            if row.email is not None and row.email in self._emails:
+                row.email = None
+                self.stats.emails_dropped += 1
+            elif row.email is not None:
+                self._emails.add(row.email)
+            elif (record.get("email") or "").strip():
+                self.stats.emails_dropped += 1
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def _merge_users(self, rows: List[CustomerRow]) -> Dict[str, int]:
+        """Create users for new phone numbers (primary); returns phone -> user id for the batch."""
+        stage = STAGE_CUSTOMERS
+        users = User.__table__
+        now = datetime.utcnow()
+        db = SessionLocal()
+        try:
+            _bulk_load(db, stage, [(row.phone_number, row.email, row.full_name) for row in rows])
+            # Emails already registered to someone else are not carried over
+            self.stats.emails_dropped += db.execute(
+                update(stage)
+                .where(stage.c.email == users.c.email, stage.c.phone_number != users.c.phone_number)
+                .values(email=None)
+            ).rowcount
+            created = db.execute(
+                upsert(db, users).from_select(
+                    ["phone_number", "email", "full_name", "role", "is_active", "phone_verified",
+                     "email_verified", "notification_settings", "app_language", "created_at", "updated_at"],
+                    select(
+                        stage.c.phone_number, stage.c.email, stage.c.full_name, literal("customer"), true(),
+                        false(), false(), literal(users.c.notification_settings.default.arg, JSONType),
+                        literal("en"), literal(now), literal(now),
+                    ).where(~exists().where(users.c.phone_number == stage.c.phone_number)),
+                ).on_conflict_do_nothing()
+            ).rowcount
+            user_ids = dict(db.execute(
+                select(stage.c.phone_number, users.c.id).join(users, users.c.phone_number == stage.c.phone_number)
+            ).all())
+            stage.drop(db.connection())
+            db.commit()
+        finally:
+            db.close()
+        self.stats.users_created += created
+        self.stats.users_matched += len(user_ids) - created
+        return user_ids
+
+    def _merge_balances(self, rows: List[CustomerRow], user_ids: Dict[str, int]) -> None:
+        """Create missing balance rows at the establishment (tenant shard)."""
+        stage = STAGE_BALANCES
+        balances = UserLoyaltyPoints.__table__
+        now = datetime.utcnow()
+        loaded = [
+            (user_ids[row.phone_number], row.earned, row.redeemed, row.balance, row.visits, row.last_activity,
+             row.lifetime_value)
+            for row in rows if row.phone_number in user_ids
+        ]
+        with tenant_session(self.establishment_id) as db:
+            if db.info.get("shard", DEFAULT_SHARD) != DEFAULT_SHARD:
+                replicate_users(db, {values[0] for values in loaded})
+            _bulk_load(db, stage, loaded)
+            created = db.execute(
+                upsert(db, balances).from_select(
+                    ["user_id", "establishment_id", "total_points_earned", "total_points_redeemed",
+                     "current_balance", "total_visits", "last_activity_date", "first_visit_date",
+                     "lifetime_value", "created_at", "updated_at"],
+                    select(
+                        stage.c.user_id, literal(self.establishment_id), stage.c.total_points_earned,
+                        stage.c.total_points_redeemed, stage.c.current_balance, stage.c.total_visits,
+                        stage.c.last_activity_date, null(), stage.c.lifetime_value, literal(now), literal(now),
+                    ).where(stage.c.user_id.isnot(None)),
+                ).on_conflict_do_nothing(index_elements=[balances.c.user_id, balances.c.establishment_id])
+            ).rowcount
+            stage.drop(db.connection())
+            for values in loaded:
+                record_ledger_write(db, values[0], self.establishment_id)
+            db.commit()
+        self.stats.balances_created += created
+        self.stats.balances_existing += len(loaded) - created
+
+    def run(self, stream: TextIO) -> CustomerImportReport:
+        """Import every row of the CSV stream; returns the final report."""
+        get_engine()
+        if tenant_directory.route(self.establishment_id) is None:
+            raise ValueError(f"Establishment {self.establishment_id} not found")
+        for rows in self._batches(stream):
+            user_ids = self._merge_users(rows)
+            self._merge_balances(rows, user_ids)
+            if self.progress is not None:
+                self.progress(self.stats)
+
+        report = self.stats.report()
+        logger.info(
+            "Imported %d rows into establishment %s in %.1fs (%.0f rows/s): %d users created, %d balances created",
+            report.rows_read, self.establishment_id, report.seconds, report.rows_per_second,
+            report.users_created, report.balances_created,
+        )
+        return report
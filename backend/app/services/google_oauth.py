@@ -2,24 +2,20 @@
 Google OAuth service for authentication.
 """
 
-import requests
 from typing import Optional
-from google.auth.transport import requests as google_requests
-from google.oauth2 import id_token
-from google_auth_oauthlib.flow import Flow
 from fastapi import HTTPException, status
 from app.core.config import settings
 from app.schemas.auth import GoogleUserInfo
 
 
 class GoogleOAuthService:
-    """Service for handling Google OAuth authentication."""
+    """
+    Service for handling Google OAuth authentication.
+    The Google client libraries and requests are imported inside the methods
+    that use them, keeping them off the application's import path.
+    """
     
     def __init__(self):
-        self.client_id = settings.google_client_id
-        self.client_secret = settings.google_client_secret
-        self.redirect_uri = settings.google_redirect_uri
-        
         # OAuth 2.0 scopes
         self.scopes = [
             "openid",
@@ -27,6 +23,18 @@ class GoogleOAuthService:
             "profile"
         ]
     
+    @property
+    def client_id(self) -> str:
+        return settings.google_client_id
+
+    @property
+    def client_secret(self) -> str:
+        return settings.google_client_secret
+
+    @property
+    def redirect_uri(self) -> str:
+        return settings.google_redirect_uri
+    
     def get_authorization_url(self) -> str:
         """Generate Google OAuth authorization URL."""
         if not self.client_id or not self.client_secret:
@@ -35,6 +43,8 @@ class GoogleOAuthService:
                 detail="Google OAuth not configured"
             )
         
+        from google_auth_oauthlib.flow import Flow
+
         flow = Flow.from_client_config(
             {
                 "web": {
@@ -64,6 +74,8 @@ class GoogleOAuthService:
                 detail="Google OAuth not configured"
             )
         
+        from google_auth_oauthlib.flow import Flow
+
         flow = Flow.from_client_config(
             {
                 "web": {
@@ -89,6 +101,8 @@ class GoogleOAuthService:
     
     def get_user_info(self, access_token: str) -> GoogleUserInfo:
         """Get user information from Google API."""
+        import requests
+
         headers = {"Authorization": f"Bearer {access_token}"}
         response = requests.get(
             "https://www.googleapis.com/oauth2/v2/userinfo",
@@ -112,6 +126,9 @@ class GoogleOAuthService:
     
     def verify_id_token(self, id_token_str: str) -> dict:
         """Verify Google ID token."""
+        from google.auth.transport import requests as google_requests
+        from google.oauth2 import id_token
+
         try:
             # Verify the token
             id_info = id_token.verify_oauth2_token(
@@ -0,0 +1,265 @@
+"""
+Top-customer leaderboards per establishment.
+
+Each worker keeps the top `leaderboard_size` customers per (establishment,
+metric) in a sorted list, loaded on first read with one indexed query. Ledger
+writes (local, or other workers' via the event hub) mark (user,
+establishment) pairs as pending; a periodic task re-reads just those rows in
+one query and applies them to the loaded boards, and a slower resync reloads
+everything as a safety net. Customer names are read from the primary, which
+stays authoritative for users when the establishment lives on a shard.
+"""
+
+import threading
+from bisect import bisect_left, insort
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.events import event_hub
+from app.models.user import User
+from app.models.user_loyalty_points import UserLoyaltyPoints
+from app.schemas.leaderboard import LeaderboardMetric
+from app.services.ledger import LedgerWrites, on_ledger_commit
+
+
+def _column(metric: LeaderboardMetric):
+    column = getattr(UserLoyaltyPoints, metric.value)
+    # lifetime_value is nullable; rank missing values as 0
+    return func.coalesce(column, 0).label(metric.value) if column.nullable else column
+
+
+def _full_names(user_ids: Iterable[int]) -> Dict[int, Optional[str]]:
+    """Customers' current names, from the primary."""
+    from app.core.database import open_read_session
+
+    user_ids = set(user_ids)
+    if not user_ids:
+        return {}
+    db = open_read_session()
+    try:
+        return dict(db.execute(select(User.id, User.full_name).where(User.id.in_(user_ids))).all())
+    finally:
+        db.close()
+
+
+class Leaderboard:
+    """
+    Top customers of one establishment by one metric, highest first.
+
+    Invariant: every customer not on the board has a value <= the lowest value
+    on it, so ranks read from the board are exact. `complete` means the board
+    holds every customer of the establishment.
+    """
+
+    def __init__(self, rows: List[Tuple[int, Any, Optional[str]]], capacity: int, complete: bool):
+        self.capacity = capacity
+        self.complete = complete
+        self.stale = False
+        self._order: List[Tuple[Any, int]] = sorted((-value, user_id) for user_id, value, _ in rows)
+        self._values: Dict[int, Any] = {user_id: value for user_id, value, _ in rows}
+        self._names: Dict[int, Optional[str]] = {user_id: name for user_id, _, name in rows}
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def _rank_of_value(self, value: Any) -> int:
+        # Competition ranking: 1 + number of customers with a strictly higher value
+        return bisect_left(self._order, (-value,)) + 1
+
+    def update(self, user_id: int, value: Any, name: Optional[str]) -> None:
+        """Apply a customer's new value, keeping the invariant."""
+        self.remove(user_id)
+        if not self.complete:
+            if not self._order:
+                # Nothing left to compare against; reload on next read
+                self.stale = True
+                return
+            if value <= -self._order[-1][0]:
+                # Not above the lowest entry: stays (or becomes) off-board
+                if len(self._order) < self.capacity // 2:
+                    self.stale = True
+                return
+
+        insort(self._order, (-value, user_id))
+        self._values[user_id] = value
+        self._names[user_id] = name
+        if len(self._order) > self.capacity:
+            _, evicted = self._order.pop()
+            self._values.pop(evicted, None)
+            self._names.pop(evicted, None)
+            self.complete = False
+
+    def remove(self, user_id: int) -> None:
+        value = self._values.pop(user_id, None)
+        if value is not None:
+            del self._order[bisect_left(self._order, (-value, user_id))]
+            self._names.pop(user_id, None)
+
+    def top(self, offset: int, limit: int) -> List[Dict[str, Any]]:
+        return [
+            {
+                "rank": self._rank_of_value(-negative_value),
+                "user_id": user_id,
+                "full_name": self._names.get(user_id),
+                "value": -negative_value,
+            }
+            for negative_value, user_id in self._order[offset:offset + limit]
+        ]
+
+    def rank(self, user_id: int) -> Optional[Tuple[int, Any]]:
+        value = self._values.get(user_id)
+        if value is None:
+            return None
+        return self._rank_of_value(value), value
+
+
+class LeaderboardRegistry:
+    """Per-process leaderboards, keyed by (establishment_id, metric)."""
+
+    def __init__(self):
+        self._boards: Dict[Tuple[int, LeaderboardMetric], Leaderboard] = {}
+        self._pending: Set[Tuple[int, int]] = set()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _load(db: Session, establishment_id: int, metric: LeaderboardMetric) -> Leaderboard:
+        column = _column(metric)
+        capacity = settings.leaderboard_size
+        rows = db.execute(
+            select(UserLoyaltyPoints.user_id, column)
+            .where(UserLoyaltyPoints.establishment_id == establishment_id)
+            .order_by(column.desc(), UserLoyaltyPoints.user_id)
+            .limit(capacity + 1)
+        ).all()
+        complete = len(rows) <= capacity
+        rows = rows[:capacity]
+        names = _full_names(user_id for user_id, _ in rows)
+        return Leaderboard([(user_id, value, names.get(user_id)) for user_id, value in rows], capacity, complete)
+
+    def _board(self, db: Session, establishment_id: int, metric: LeaderboardMetric) -> Leaderboard:
+        key = (establishment_id, metric)
+        board = self._boards.get(key)
+        if board is None or board.stale:
+            board = self._load(db, establishment_id, metric)
+            with self._lock:
+                self._boards[key] = board
+        return board
+
+    def top(self, db: Session, establishment_id: int, metric: LeaderboardMetric,
+            offset: int = 0, limit: int = 20) -> List[Dict[str, Any]]:
+        """Page of the leaderboard; pages beyond leaderboard_size are empty."""
+        board = self._board(db, establishment_id, metric)
+        with self._lock:
+            return board.top(offset, limit)
+
+    def rank(self, db: Session, establishment_id: int, metric: LeaderboardMetric,
+             user_id: int) -> Optional[Tuple[int, Any]]:
+        """(rank, value) for a customer, or None if they have no points record there."""
+        board = self._board(db, establishment_id, metric)
+        with self._lock:
+            found = board.rank(user_id)
+        if found is not None or board.complete:
+            return found
+
+        # Off-board customer: count the customers ahead of them (indexed)
+        column = _column(metric)
+        value = db.execute(
+            select(column).where(
+                UserLoyaltyPoints.establishment_id == establishment_id,
+                UserLoyaltyPoints.user_id == user_id,
+            )
+        ).scalar()
+        if value is None:
+            return None
+        ahead = db.execute(
+            select(func.count()).select_from(UserLoyaltyPoints).where(
+                UserLoyaltyPoints.establishment_id == establishment_id,
+                column > value,
+            )
+        ).scalar()
+        return ahead + 1, value
+
+    def mark_pending(self, writes: LedgerWrites) -> None:
+        with self._lock:
+            self._pending.update(writes)
+
+    def apply_pending(self) -> int:
+        """Re-read pending customers of loaded establishments and update their boards (periodic)."""
+        with self._lock:
+            pending, self._pending = self._pending, set()
+            loaded = {establishment_id for establishment_id, _ in self._boards}
+        pairs = [pair for pair in pending if pair[1] in loaded]
+        if not pairs:
+            return 0
+
+        from app.core.database import get_engine, open_read_session
+        from app.core.tenancy import tenant_directory
+
+        get_engine()
+        by_shard: Dict[str, list] = {}
+        for pair in pairs:
+            route = tenant_directory.route(pair[1])
+            if route is None:
+                continue
+            if route.moving:
+                # Retry once the tenant has landed on its new shard
+                self.mark_pending({pair})
+                continue
+            by_shard.setdefault(route.shard, []).append(pair)
+
+        rows = []
+        for shard, shard_pairs in by_shard.items():
+            db = open_read_session(shard)
+            try:
+                rows += db.execute(
+                    select(
+                        UserLoyaltyPoints.user_id,
+                        UserLoyaltyPoints.establishment_id,
+                        *[_column(metric) for metric in LeaderboardMetric],
+                    )
+                    .where(tuple_(UserLoyaltyPoints.user_id, UserLoyaltyPoints.establishment_id).in_(shard_pairs))
+                ).all()
+            finally:
+                db.close()
+        pairs = [pair for shard_pairs in by_shard.values() for pair in shard_pairs]
+
+        found = {(row.user_id, row.establishment_id): row for row in rows}
+        names = _full_names(row.user_id for row in rows)
+        with self._lock:
+            for (establishment_id, metric), board in self._boards.items():
+                for user_id, pair_establishment_id in pairs:
+                    if pair_establishment_id != establishment_id:
+                        continue
+                    row = found.get((user_id, establishment_id))
+                    if row is None:
+                        board.remove(user_id)
+                    else:
+                        board.update(user_id, getattr(row, metric.value), names.get(user_id))
+        return len(pairs)
+
+    def resync(self) -> None:
+        """Mark every board stale so it reloads on its next read (periodic)."""
+        with self._lock:
+            # Boards not read since the last resync are dropped to bound memory
+            self._boards = {key: board for key, board in self._boards.items() if not board.stale}
+            for board in self._boards.values():
+                board.stale = True
+
+
+# Per-process instance
+leaderboards = LeaderboardRegistry()
+
+
+@on_ledger_commit
+def _mark_leaderboards_pending(writes: LedgerWrites) -> None:
+    leaderboards.mark_pending(writes)
+
+
+def _mark_leaderboards_pending_on_event(event: dict) -> None:
+    # Ledger writes committed by other workers
+    if event.get("type") == "point_activity":
+        leaderboards.mark_pending({(event["user_id"], event["establishment_id"])})
+
+
+event_hub.add_listener(_mark_leaderboards_pending_on_event)
@@ -0,0 +1,60 @@
+"""
+Ledger write tracking.
+
+Anything that changes a customer's points (PointActivity rows,
+UserLoyaltyPoints balances) is recorded on the session as a
+(user_id, establishment_id) pair. Listeners registered with on_ledger_commit
+receive the pairs once the transaction commits, so caches and other derived
+state are only updated for writes that actually landed.
+"""
+
+import logging
+from typing import Callable, List, Set, Tuple
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.models.point_activity import PointActivity
+from app.models.user_loyalty_points import UserLoyaltyPoints
+
+logger = logging.getLogger(__name__)
+
+LedgerWrites = Set[Tuple[int, int]]
+
+_listeners: List[Callable[[LedgerWrites], None]] = []
+
+
+def on_ledger_commit(listener: Callable[[LedgerWrites], None]) -> Callable[[LedgerWrites], None]:
+    """Register a listener called with the committed (user_id, establishment_id) pairs."""
+    _listeners.append(listener)
+    return listener
+
+
+def record_ledger_write(session: Session, user_id: int, establishment_id: int) -> None:
+    """
+    Mark a ledger write on the session. ORM changes are recorded automatically;
+    call this for bulk/Core statements that bypass the unit of work.
+    """
+    session.info.setdefault("ledger_writes", set()).add((user_id, establishment_id))
+
+
+@event.listens_for(Session, "before_flush")
+def _record_orm_ledger_writes(session, flush_context, instances):
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, (PointActivity, UserLoyaltyPoints)):
+            record_ledger_write(session, obj.user_id, obj.establishment_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _dispatch_ledger_writes(session):
+    writes = session.info.pop("ledger_writes", None)
+    if not writes:
+        return
+    for listener in _listeners:
+        try:
+            listener(writes)
+        except Exception:
+            logger.exception("Ledger listener %s failed", getattr(listener, "__qualname__", listener))
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_ledger_writes(session):
+    session.info.pop("ledger_writes", None)
@@ -2,16 +2,24 @@
 OTP (One-Time Password) service for phone number verification.
 """
 
+import logging
 import random
 import string
 from datetime import datetime, timedelta
 from typing import Optional
 from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.database import assert_primary_session
 from app.models.otp import OTP
 
+logger = logging.getLogger(__name__)
+
 
 class OTPService:
-    """Service for handling OTP generation and verification."""
+    """
+    Service for handling OTP generation and verification.
+    OTP reads must see the latest writes, so every method requires a primary session.
+    """
     
     @staticmethod
     def generate_otp_code() -> str:
@@ -24,6 +32,8 @@ class OTPService:
         Create a new OTP for the given phone number.
         Invalidates any existing unused OTPs for the same phone number.
         """
+        assert_primary_session(db)
+
         # Invalidate existing unused OTPs for this phone number
         existing_otps = db.query(OTP).filter(
             OTP.phone_number == phone_number,
@@ -56,6 +66,8 @@ class OTPService:
         Verify an OTP code for the given phone number.
         Returns True if valid, False otherwise.
         """
+        assert_primary_session(db)
+
         otp = db.query(OTP).filter(
             OTP.phone_number == phone_number,
             OTP.code == code,
@@ -89,7 +101,11 @@ class OTPService:
         In production, integrate with SMS service like Twilio, AWS SNS, etc.
         """
         # TODO: Implement actual SMS sending
-        print(f"SMS to {phone_number}: Your verification code is {code}")
+        if settings.debug:
+            logger.info("SMS to %s: Your verification code is %s", phone_number, code)
+        else:
+            # Codes stay out of production logs
+            logger.info("SMS to ...%s: verification code not sent (no SMS provider)", phone_number[-4:])
         return True
     
     @staticmethod
@@ -98,14 +114,11 @@ class OTPService:
         Clean up expired OTPs from the database.
         Returns the number of deleted records.
         """
-        expired_otps = db.query(OTP).filter(
+        assert_primary_session(db)
+
+        count = db.query(OTP).filter(
             OTP.expires_at < datetime.utcnow()
-        ).all()
-        
-        count = len(expired_otps)
-        
-        for otp in expired_otps:
-            db.delete(otp)
-        
+        ).delete(synchronize_session=False)
+
         db.commit()
         return count
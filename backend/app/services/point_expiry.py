@@ -0,0 +1,109 @@
+"""
+Expiry of unused points (LoyaltyProgram.point_expiry_days).
+
+Balances are kept per customer and establishment across programs, so an
+establishment's points expire only if every active program has an expiry,
+after the longest of them, counted from the customer's last activity there.
+Expired balances are zeroed in chunks, each with an 'expired' ledger entry,
+on every tenant shard (a scheduled job, see app.core.scheduler).
+"""
+
+import logging
+from datetime import datetime, timedelta
+from typing import Dict
+from sqlalchemy import bindparam, func, insert, select, update
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.dialects import dialect_name
+from app.core.scheduler import job_scheduler
+from app.models.loyalty_program import LoyaltyProgram
+from app.models.point_activity import PointActivity
+from app.models.user_loyalty_points import UserLoyaltyPoints
+from app.services.ledger import record_ledger_write
+
+logger = logging.getLogger(__name__)
+
+
+class PointExpiry:
+    """Zeroes balances left unused for longer than the establishment's expiry."""
+
+    @staticmethod
+    def expiry_days(db: Session) -> Dict[int, int]:
+        """Days of inactivity after which points expire, by establishment (only those that expire)."""
+        rows = db.execute(
+            select(LoyaltyProgram.establishment_id, func.max(LoyaltyProgram.point_expiry_days))
+            .where(LoyaltyProgram.is_active.is_(True))
+            .group_by(LoyaltyProgram.establishment_id)
+            .having(func.count() == func.count(LoyaltyProgram.point_expiry_days))
+        ).all()
+        return {establishment_id: days for establishment_id, days in rows}
+
+    @staticmethod
+    def expire_chunk(db: Session, establishment_id: int, days: int, now: datetime, limit: int) -> int:
+        """Expire up to `limit` balances inactive for `days`; returns the number expired."""
+        candidates = (
+            select(UserLoyaltyPoints.id, UserLoyaltyPoints.user_id, UserLoyaltyPoints.current_balance)
+            .where(
+                UserLoyaltyPoints.establishment_id == establishment_id,
+                UserLoyaltyPoints.current_balance > 0,
+                UserLoyaltyPoints.last_activity_date < now - timedelta(days=days),
+            )
+            .limit(limit)
+        )
+        if dialect_name(db) != "sqlite":
+            # Leave balances being changed by a scan to the next run
+            candidates = candidates.with_for_update(skip_locked=True)
+        rows = db.execute(candidates).all()
+        if not rows:
+            return 0
+
+        db.execute(insert(PointActivity), [
+            {
+                "user_id": row.user_id,
+                "establishment_id": establishment_id,
+                "program_id": None,
+                "activity_type": "expired",
+                "points_change": -row.current_balance,
+                "description": f"{row.current_balance} points expired after {days} days without activity",
+                "created_at": now,
+            }
+            for row in rows
+        ])
+        # Core executemany; subtracts what was read, in case the balance moved since
+        balances = UserLoyaltyPoints.__table__
+        db.execute(
+            update(balances)
+            .where(balances.c.id == bindparam("row_id"))
+            .values(current_balance=balances.c.current_balance - bindparam("expired"), updated_at=now),
+            [{"row_id": row.id, "expired": row.current_balance} for row in rows],
+        )
+        for row in rows:
+            record_ledger_write(db, row.user_id, establishment_id)
+        return len(rows)
+
+    @staticmethod
+    def run() -> int:
+        """Expire points on every shard (scheduled); returns the number of balances expired."""
+        from app.core.database import SessionLocal, get_engine, shard_registry
+
+        get_engine()
+        now = datetime.utcnow()
+        total = 0
+        for shard in shard_registry.names:
+            db = SessionLocal(bind=shard_registry.engine(shard))
+            try:
+                for establishment_id, days in PointExpiry.expiry_days(db).items():
+                    while not job_scheduler.stopping:
+                        expired = PointExpiry.expire_chunk(
+                            db, establishment_id, days, now, settings.point_expiry_chunk_size
+                        )
+                        db.commit()
+                        total += expired
+                        if expired < settings.point_expiry_chunk_size:
+                            break
+            finally:
+                db.close()
+
+        if total:
+            logger.info("Expired the points of %d inactive customers", total)
+        return total
@@ -0,0 +1,336 @@
+"""
+In-memory schedule of loyalty programs: which programs are live, per establishment.
+
+Each establishment's active programs (is_active) are kept as an interval
+index: the sorted start/end boundaries of their [start_date, end_date)
+windows and, for every segment between two boundaries, the programs live in
+it. "Live at t" is a bisect, O(log n) in the number of boundaries.
+
+The programs live right now are cached per establishment and flipped at
+the boundaries by a timer wheel advanced every program_schedule_tick_seconds,
+so the common lookup is a dict read. Listeners hear about every flip.
+
+Programs are loaded from every shard. An establishment is reloaded on the
+next tick after a loyalty_programs NOTIFY event, or when the periodic
+refresh finds programs updated since the last one; the full resync also
+picks up deletions. updated_at is stamped before commit, so a write can
+commit after a later one was already seen: each refresh re-reads an overlap
+window before its watermark.
+"""
+
+import threading
+from bisect import bisect_right
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+from sqlalchemy import func, select
+from app.core.config import settings
+from app.core.events import event_hub
+from app.models.loyalty_program import LoyaltyProgram
+
+_EPOCH = datetime(1970, 1, 1)
+_NEVER = float("inf")
+
+
+def _epoch(at: datetime) -> float:
+    return (at - _EPOCH).total_seconds()
+
+
+class ProgramWindow(NamedTuple):
+    """An active program and the [start, end) epoch seconds it is live in."""
+    program_id: int
+    start: float
+    end: float
+    info: dict  # program_id, program_name, reward_description, points_required, points_per_euro, color, icon
+
+
+class IntervalIndex:
+    """Programs of one establishment by time; lookups are a bisect over the boundaries."""
+
+    __slots__ = ("windows", "boundaries", "segments")
+
+    def __init__(self, windows: Iterable[ProgramWindow]):
+        self.windows = {window.program_id: window for window in windows}
+        self.boundaries = sorted({
+            point for window in self.windows.values() for point in (window.start, window.end) if abs(point) != _NEVER
+        })
+        # segments[i] holds the programs live in [boundaries[i - 1], boundaries[i]); segments[0] is before any
+        self.segments: List[Tuple[ProgramWindow, ...]] = []
+        for position in range(len(self.boundaries) + 1):
+            at = self.boundaries[position - 1] if position else -_NEVER
+            live = [window for window in self.windows.values() if window.start <= at < window.end]
+            live.sort(key=lambda window: (window.info["points_required"], window.program_id))
+            self.segments.append(tuple(live))
+
+    def active_at(self, at: float) -> Tuple[ProgramWindow, ...]:
+        return self.segments[bisect_right(self.boundaries, at)]
+
+    def boundaries_after(self, at: float) -> List[float]:
+        return self.boundaries[bisect_right(self.boundaries, at):]
+
+
+class TimerWheel:
+    """
+    Hashed timer wheel of `slots` ticks. Entries further out than one turn
+    stay in their slot until their tick comes round; advancing is O(ticks
+    elapsed + entries due).
+    """
+
+    def __init__(self, tick_seconds: float, slots: int = 512):
+        self.tick_seconds = tick_seconds
+        self.slots: List[List[Tuple[int, object]]] = [[] for _ in range(slots)]
+        self.current: Optional[int] = None
+
+    def schedule(self, at: float, item: object) -> None:
+        """Fire item on the first tick at or after `at`."""
+        tick = int(-(-at // self.tick_seconds))
+        if self.current is not None:
+            tick = max(tick, self.current + 1)
+        self.slots[tick % len(self.slots)].append((tick, item))
+
+    def advance(self, now: float) -> List[object]:
+        """Items due up to now, in no particular order."""
+        target = int(now // self.tick_seconds)
+        if self.current is None:
+            self.current = target - 1
+        if target <= self.current:
+            return []
+        elapsed = range(self.current + 1, target + 1)
+        if len(elapsed) >= len(self.slots):
+            positions = range(len(self.slots))
+        else:
+            positions = [tick % len(self.slots) for tick in elapsed]
+        due = []
+        for position in positions:
+            entries = self.slots[position]
+            if not entries:
+                continue
+            pending = []
+            for entry in entries:
+                if entry[0] <= target:
+                    due.append(entry[1])
+                else:
+                    pending.append(entry)
+            self.slots[position] = pending
+        self.current = target
+        return due
+
+
+def _window(row) -> ProgramWindow:
+    return ProgramWindow(
+        row.id,
+        _epoch(row.start_date) if row.start_date is not None else -_NEVER,
+        _epoch(row.end_date) if row.end_date is not None else _NEVER,
+        {
+            "program_id": row.id,
+            "program_name": row.program_name,
+            "reward_description": row.reward_description,
+            "points_required": row.points_required,
+            "points_per_euro": row.points_per_euro,
+            "program_color": row.program_color,
+            "program_icon": row.program_icon,
+        },
+    )
+
+
+_PROGRAM_COLUMNS = (
+    LoyaltyProgram.id,
+    LoyaltyProgram.establishment_id,
+    LoyaltyProgram.start_date,
+    LoyaltyProgram.end_date,
+    LoyaltyProgram.program_name,
+    LoyaltyProgram.reward_description,
+    LoyaltyProgram.points_required,
+    LoyaltyProgram.points_per_euro,
+    LoyaltyProgram.program_color,
+    LoyaltyProgram.program_icon,
+)
+
+
+class ProgramSchedule:
+    """Per-process interval indexes and live-program sets, keyed by establishment."""
+
+    def __init__(self):
+        self._indexes: Dict[int, IntervalIndex] = {}
+        self._live: Dict[int, Tuple[ProgramWindow, ...]] = {}
+        self._generations: Dict[int, int] = defaultdict(int)
+        self._wheel: Optional[TimerWheel] = None  # created by the first resync
+        self._watermarks: Dict[str, datetime] = {}
+        self._dirty: Set[int] = set()
+        self._listeners: List[Callable[[int], None]] = []
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def add_listener(self, listener: Callable[[int], None]) -> None:
+        """Called with the establishment id whenever its live programs change."""
+        self._listeners.append(listener)
+
+    def _install(self, establishment_id: int, windows: List[ProgramWindow], now: float) -> bool:
+        """Swap in an establishment's index and schedule its boundaries (lock held); True if live changed."""
+        index = IntervalIndex(windows)
+        self._generations[establishment_id] += 1
+        generation = self._generations[establishment_id]
+        for boundary in index.boundaries_after(now):
+            self._wheel.schedule(boundary, (establishment_id, generation))
+        if windows:
+            self._indexes[establishment_id] = index
+        else:
+            self._indexes.pop(establishment_id, None)
+        live = index.active_at(now)
+        changed = live != self._live.get(establishment_id, ())
+        if live:
+            self._live[establishment_id] = live
+        else:
+            self._live.pop(establishment_id, None)
+        return changed
+
+    def _notify(self, establishment_ids: Iterable[int]) -> None:
+        for establishment_id in establishment_ids:
+            for listener in self._listeners:
+                listener(establishment_id)
+
+    @staticmethod
+    def _query(db, *criteria) -> Dict[int, List[ProgramWindow]]:
+        by_establishment: Dict[int, List[ProgramWindow]] = defaultdict(list)
+        for row in db.execute(select(*_PROGRAM_COLUMNS).where(LoyaltyProgram.is_active.is_(True), *criteria)):
+            by_establishment[row.establishment_id].append(_window(row))
+        return by_establishment
+
+    def resync(self) -> int:
+        """Reload every establishment's programs from every shard (periodic; also the first load)."""
+        from app.core.database import get_engine, open_read_session, shard_registry
+
+        get_engine()
+        loaded: Dict[int, List[ProgramWindow]] = {}
+        watermarks = {}
+        for shard in shard_registry.names:
+            db = open_read_session(shard)
+            try:
+                watermarks[shard] = db.execute(select(func.max(LoyaltyProgram.updated_at))).scalar() or _EPOCH
+                loaded.update(self._query(db))
+            finally:
+                db.close()
+
+        now = _epoch(datetime.utcnow())
+        with self._lock:
+            previous = set(self._indexes)
+            self._wheel = TimerWheel(settings.program_schedule_tick_seconds)
+            changed = [est for est in previous - set(loaded) if self._install(est, [], now)]
+            changed += [est for est, windows in loaded.items() if self._install(est, windows, now)]
+            self._watermarks = watermarks
+            self._loaded = True
+        self._notify(changed)
+        return sum(len(windows) for windows in loaded.values())
+
+    @staticmethod
+    def _reload(establishment_ids: Set[int]) -> Dict[int, List[ProgramWindow]]:
+        """Active programs of the given establishments, from whichever shard holds them."""
+        from app.core.database import open_read_session, shard_registry
+
+        reloaded: Dict[int, List[ProgramWindow]] = {establishment_id: [] for establishment_id in establishment_ids}
+        for shard in shard_registry.names:
+            db = open_read_session(shard)
+            try:
+                reloaded.update(ProgramSchedule._query(db, LoyaltyProgram.establishment_id.in_(establishment_ids)))
+            finally:
+                db.close()
+        return reloaded
+
+    def _apply(self, reloaded: Dict[int, List[ProgramWindow]]) -> None:
+        now = _epoch(datetime.utcnow())
+        with self._lock:
+            changed = [est for est, windows in reloaded.items() if self._install(est, windows, now)]
+        self._notify(changed)
+
+    def refresh(self) -> int:
+        """Reload establishments with programs updated since the last refresh (periodic)."""
+        from app.core.database import get_engine, open_read_session, shard_registry
+
+        if not self._loaded:
+            return 0  # the first resync has not finished
+        get_engine()
+        overlap = timedelta(seconds=settings.program_schedule_refresh_overlap_seconds)
+        establishment_ids = set()
+        watermarks = {}
+        for shard in shard_registry.names:
+            db = open_read_session(shard)
+            try:
+                since = self._watermarks.get(shard, _EPOCH)
+                updated = db.execute(
+                    select(LoyaltyProgram.establishment_id, func.max(LoyaltyProgram.updated_at))
+                    .where(LoyaltyProgram.updated_at > since - overlap)
+                    .group_by(LoyaltyProgram.establishment_id)
+                ).all()
+            finally:
+                db.close()
+            watermarks[shard] = max([since] + [row[1] for row in updated])
+            establishment_ids.update(row[0] for row in updated)
+
+        if establishment_ids:
+            self._apply(self._reload(establishment_ids))
+        self._watermarks.update(watermarks)
+        return len(establishment_ids)
+
+    def tick(self) -> int:
+        """
+        Reload notified establishments, then flip live programs at the
+        boundaries that passed since the last tick (periodic).
+        """
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+        if dirty and self._loaded:
+            self._apply(self._reload(dirty))
+
+        now = _epoch(datetime.utcnow())
+        with self._lock:
+            flipped = set()
+            due = self._wheel.advance(now) if self._wheel is not None else ()
+            for establishment_id, generation in due:
+                index = self._indexes.get(establishment_id)
+                if generation != self._generations[establishment_id] or index is None:
+                    continue
+                live = index.active_at(now)
+                if live != self._live.get(establishment_id, ()):
+                    self._live[establishment_id] = live
+                    flipped.add(establishment_id)
+        self._notify(flipped)
+        return len(flipped)
+
+    def mark_dirty(self, establishment_id: int) -> None:
+        with self._lock:
+            self._dirty.add(establishment_id)
+
+    def _ensure_loaded(self) -> None:
+        if not self._loaded:
+            self.resync()
+
+    def index(self, establishment_id: int) -> Optional[IntervalIndex]:
+        """The establishment's interval index (None without active programs); replaced, never mutated."""
+        self._ensure_loaded()
+        return self._indexes.get(establishment_id)
+
+    def active_programs(self, establishment_id: int, at: Optional[datetime] = None) -> List[dict]:
+        """Programs live at `at` (default now), by points_required."""
+        self._ensure_loaded()
+        if at is None:
+            windows = self._live.get(establishment_id, ())
+        else:
+            index = self._indexes.get(establishment_id)
+            windows = index.active_at(_epoch(at)) if index is not None else ()
+        return [window.info for window in windows]
+
+    def is_live(self, establishment_id: int, program_id: int, at: Optional[datetime] = None) -> bool:
+        return any(info["program_id"] == program_id for info in self.active_programs(establishment_id, at))
+
+
+# Per-process instance
+program_schedule = ProgramSchedule()
+
+
+def _mark_program_changed(event: dict) -> None:
+    # Program rows changed on the primary; reloaded on the next tick
+    if event.get("type") == "loyalty_program":
+        program_schedule.mark_dirty(event["establishment_id"])
+
+
+event_hub.add_listener(_mark_program_changed)
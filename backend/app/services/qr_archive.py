@@ -0,0 +1,155 @@
+"""
+Archival of used and expired QR codes.
+
+Codes used or expired longer than `qr_archive_after_days` ago are moved from
+qr_codes to qr_codes_archive in small chunks, each a single
+DELETE ... RETURNING / INSERT statement in its own short transaction, with a
+pause between chunks so the move never competes with the scan path. Chunks
+lock with SKIP LOCKED, so concurrent runs do not conflict (on SQLite a chunk
+is a copy and a delete under the database write lock).
+Lookups by hash or id fall back to the archive via find_code/find_codes.
+The archiver runs on the primary and on every tenant shard.
+"""
+
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Sequence
+from sqlalchemy import and_, delete, insert, literal, or_, select
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.dialects import dialect_name
+from app.models.qr_code import QRCode
+from app.models.qr_code_archive import QRCodeArchive
+
+logger = logging.getLogger(__name__)
+
+# Columns shared by both tables (the archive adds archived_at)
+CODE_COLUMNS = [column.name for column in QRCode.__table__.columns]
+
+
+def find_code(db: Session, qr_code_id: int, columns: Sequence[str]):
+    """Row with the given columns for a code, live or archived (None if unknown)."""
+    for model in (QRCode, QRCodeArchive):
+        row = db.execute(
+            select(*[getattr(model, name) for name in columns]).where(model.id == qr_code_id)
+        ).first()
+        if row is not None:
+            return row
+    return None
+
+
+def find_code_on_shards(db: Session, qr_code_id: int, columns: Sequence[str]):
+    """
+    find_code on the primary (through db) and then every tenant shard; ids are
+    unique across shards, and copies left behind by a tenant move are skipped
+    (columns must include establishment_id).
+    """
+    from app.core.database import shard_registry
+    from app.core.tenancy import lives_on, shard_sessions
+
+    for shard, shard_db in shard_sessions(db):
+        code = find_code(shard_db, qr_code_id, columns)
+        if code is not None and (not shard_registry.engines or lives_on(code.establishment_id, shard)):
+            return code
+    return None
+
+
+def find_codes(db: Session, hashes: Iterable[str], columns: Sequence[str]) -> Dict[str, object]:
+    """
+    Rows keyed by qr_code_hash for the given hashes, live or archived (columns
+    must include qr_code_hash). The archive is only queried for hashes missing
+    from the live table.
+    """
+    hashes = set(hashes)
+    found = {}
+    for model in (QRCode, QRCodeArchive):
+        found.update(
+            (row.qr_code_hash, row)
+            for row in db.execute(
+                select(*[getattr(model, name) for name in columns]).where(model.qr_code_hash.in_(hashes))
+            )
+        )
+        hashes -= found.keys()
+        if not hashes:
+            break
+    return found
+
+
+class QRCodeArchiver:
+    """Moves cold codes out of the hot table in throttled chunks."""
+
+    @staticmethod
+    def archive_chunk(db: Session, cutoff: datetime, limit: int) -> int:
+        """Move up to `limit` codes used or expired before cutoff; returns the number moved."""
+        candidates = (
+            select(QRCode.id)
+            .where(or_(
+                QRCode.expires_at < cutoff,
+                # Served by the partial ix_qr_codes_used_at index
+                and_(QRCode.is_used.is_(True), QRCode.used_at < cutoff),
+            ))
+            .limit(limit)
+        )
+        if dialect_name(db) == "sqlite":
+            return QRCodeArchiver._copy_chunk(db, candidates)
+
+        moved = (
+            delete(QRCode.__table__)
+            .where(QRCode.id.in_(candidates.with_for_update(skip_locked=True).scalar_subquery()))
+            .returning(*QRCode.__table__.columns)
+            .cte("moved")
+        )
+        result = db.execute(
+            insert(QRCodeArchive.__table__).from_select(
+                CODE_COLUMNS + ["archived_at"],
+                select(*[moved.c[name] for name in CODE_COLUMNS], literal(datetime.utcnow()).label("archived_at")),
+            )
+        )
+        return result.rowcount
+
+    @staticmethod
+    def _copy_chunk(db: Session, candidates) -> int:
+        """
+        Copy-then-delete variant for SQLite, which has no DML in CTEs and no row
+        locks; the chunk's transaction holds the database write lock instead.
+        """
+        ids = list(db.execute(candidates).scalars())
+        if ids:
+            db.execute(
+                insert(QRCodeArchive.__table__).from_select(
+                    CODE_COLUMNS + ["archived_at"],
+                    select(*[QRCode.__table__.c[name] for name in CODE_COLUMNS], literal(datetime.utcnow()))
+                    .where(QRCode.id.in_(ids)),
+                )
+            )
+            db.execute(delete(QRCode.__table__).where(QRCode.id.in_(ids)))
+        return len(ids)
+
+    @staticmethod
+    def run() -> int:
+        """Archive everything past the threshold on every shard, chunk by chunk (periodic)."""
+        from app.core.database import SessionLocal, get_engine, shard_registry
+        from app.core.scheduler import job_scheduler
+
+        get_engine()
+        cutoff = datetime.utcnow() - timedelta(days=settings.qr_archive_after_days)
+        total = 0
+        for shard in shard_registry.names:
+            for _ in range(settings.qr_archive_max_chunks):
+                db = SessionLocal(bind=shard_registry.engine(shard))
+                try:
+                    moved = QRCodeArchiver.archive_chunk(db, cutoff, settings.qr_archive_chunk_size)
+                    db.commit()
+                finally:
+                    db.close()
+                total += moved
+                if moved < settings.qr_archive_chunk_size or job_scheduler.stopping:
+                    break
+                time.sleep(settings.qr_archive_pause_seconds)
+            if job_scheduler.stopping:
+                break
+
+        if total:
+            logger.info("Archived %d QR codes used or expired before %s", total, cutoff)
+        return total
@@ -0,0 +1,237 @@
+"""
+QR code image rendering (PNG/SVG) with a content-addressed cache.
+
+Images are keyed by a hash of (payload, format, scale, border), so the key
+doubles as a strong ETag and cached files never need invalidation. Lookups go
+memory LRU -> disk -> render. The disk cache is shared by a host's workers and
+kept under qr_image_disk_cache_bytes by pruning the least recently used files
+(disk hits refresh a file's mtime). Single images render in the threadpool;
+batch jobs fan out over a process pool since rendering is CPU-bound.
+"""
+
+import hashlib
+import io
+import logging
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+MEDIA_TYPES = {"png": "image/png", "svg": "image/svg+xml"}
+
+# (payload, format, scale, border)
+RenderSpec = Tuple[str, str, int, int]
+
+
+def image_key(payload: str, fmt: str, scale: int, border: int) -> str:
+    """Content address of a rendered image."""
+    return hashlib.sha256(f"{fmt}:{scale}:{border}:{payload}".encode()).hexdigest()
+
+
+def image_etag(key: str) -> str:
+    return f'"{key[:32]}"'
+
+
+def render_image(payload: str, fmt: str, scale: int, border: int) -> bytes:
+    """Render one QR code (pure function, safe to run in a worker process)."""
+    import segno
+
+    buffer = io.BytesIO()
+    segno.make(payload, error="m", micro=False).save(buffer, kind=fmt, scale=scale, border=border)
+    return buffer.getvalue()
+
+
+def render_many(specs: Sequence[RenderSpec]) -> List[bytes]:
+    """Render a chunk of images in one worker process call."""
+    return [render_image(*spec) for spec in specs]
+
+
+class QRImageCache:
+    """Byte-bounded in-memory LRU in front of a byte-bounded on-disk store."""
+
+    # Disk usage is rescanned after this share of the cap was written by this process
+    PRUNE_EVERY = 0.1
+    # Pruning frees space down to this share of the cap
+    PRUNE_TO = 0.9
+
+    def __init__(self):
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._written: Optional[int] = None  # since the last prune; None: not pruned yet
+        self._prune_lock = threading.Lock()
+
+    def _path(self, key: str, fmt: str) -> Path:
+        return Path(settings.qr_image_cache_dir) / key[:2] / f"{key}.{fmt}"
+
+    def get_memory(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+            return data
+
+    def put_memory(self, key: str, data: bytes) -> None:
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = data
+            self._size += len(data)
+            while self._size > settings.qr_image_cache_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def get(self, key: str, fmt: str) -> Optional[bytes]:
+        """Memory, then disk (blocking)."""
+        data = self.get_memory(key)
+        if data is None:
+            path = self._path(key, fmt)
+            try:
+                data = path.read_bytes()
+                os.utime(path)  # recently used: pruned last
+            except OSError:
+                return None
+            self.put_memory(key, data)
+        return data
+
+    def put(self, key: str, fmt: str, data: bytes) -> None:
+        """Store in memory and on disk (blocking); the write is atomic."""
+        self.put_memory(key, data)
+        path = self._path(key, fmt)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            temp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            temp.write_bytes(data)
+            os.replace(temp, path)
+        except OSError:
+            return  # Disk cache is best effort
+
+        with self._lock:
+            self._written = None if self._written is None else self._written + len(data)
+            due = self._written is None or self._written >= settings.qr_image_disk_cache_bytes * self.PRUNE_EVERY
+            if due:
+                self._written = 0
+        if due and self._prune_lock.acquire(blocking=False):
+            threading.Thread(target=self._prune, name="qr-image-cache-prune", daemon=True).start()
+
+    def _prune(self) -> None:
+        """Delete the least recently used files while the disk cache is over its cap."""
+        try:
+            files = []
+            total = 0
+            for directory in os.scandir(settings.qr_image_cache_dir):
+                if not directory.is_dir():
+                    continue
+                for entry in os.scandir(directory.path):
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue  # removed by another worker
+                    files.append((stat.st_mtime, stat.st_size, entry.path))
+                    total += stat.st_size
+            if total <= settings.qr_image_disk_cache_bytes:
+                return
+
+            target = settings.qr_image_disk_cache_bytes * self.PRUNE_TO
+            removed = 0
+            files.sort()
+            for _, size, path in files:
+                if total <= target:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+                removed += 1
+            logger.info("Pruned %d images from the QR image disk cache", removed)
+        except OSError:
+            pass  # no cache directory yet
+        finally:
+            self._prune_lock.release()
+
+
+class QRRenderer:
+    """Cached rendering for single images and batches."""
+
+    def __init__(self):
+        self.cache = QRImageCache()
+        self._executor: Optional[Executor] = None
+        self._executor_lock = threading.Lock()
+
+    def _get_executor(self) -> Executor:
+        with self._executor_lock:
+            if self._executor is None:
+                import multiprocessing
+
+                cpus = os.cpu_count() or 1
+                # Default: share the CPUs with the other web workers
+                processes = settings.qr_render_processes or max(1, cpus // (settings.web_concurrency or cpus))
+                # spawn: never fork a process holding DB connections and a running event loop
+                self._executor = ProcessPoolExecutor(processes, mp_context=multiprocessing.get_context("spawn"))
+            return self._executor
+
+    def get_or_render(self, payload: str, fmt: str, scale: int, border: int) -> Tuple[str, bytes]:
+        """Return (key, image) for one code (blocking; call from the threadpool)."""
+        key = image_key(payload, fmt, scale, border)
+        data = self.cache.get(key, fmt)
+        if data is None:
+            data = render_image(payload, fmt, scale, border)
+            self.cache.put(key, fmt, data)
+        return key, data
+
+    async def render(self, payload: str, fmt: str, scale: int, border: int) -> Tuple[str, bytes]:
+        key = image_key(payload, fmt, scale, border)
+        data = self.cache.get_memory(key)
+        if data is not None:
+            return key, data
+        return await run_in_threadpool(self.get_or_render, payload, fmt, scale, border)
+
+    def render_batch(self, specs: Sequence[RenderSpec], chunk_size: int = 64) -> List[bytes]:
+        """
+        Render many images (blocking), serving cache hits and spreading misses
+        over the process pool in chunks.
+        """
+        results: List[Optional[bytes]] = [None] * len(specs)
+        missing: Dict[str, List[int]] = {}
+        for index, spec in enumerate(specs):
+            key = image_key(*spec)
+            data = self.cache.get(key, spec[1])
+            if data is not None:
+                results[index] = data
+            else:
+                missing.setdefault(key, []).append(index)
+
+        keys = list(missing)
+        chunks = [keys[i:i + chunk_size] for i in range(0, len(keys), chunk_size)]
+        rendered_chunks = self._get_executor().map(
+            render_many, [[specs[missing[key][0]] for key in chunk] for chunk in chunks]
+        )
+        try:
+            for chunk, rendered in zip(chunks, rendered_chunks):
+                for key, data in zip(chunk, rendered):
+                    self.cache.put(key, specs[missing[key][0]][1], data)
+                    for index in missing[key]:
+                        results[index] = data
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM-killed): start a fresh pool next time
+            self.shutdown()
+            raise
+        return results
+
+    def shutdown(self) -> None:
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+# Per-process instance
+qr_renderer = QRRenderer()
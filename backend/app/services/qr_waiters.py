@@ -0,0 +1,61 @@
+"""
+In-memory waiters for QR code redemption.
+
+Clients long-polling a code's status park on a future keyed by the code id;
+the event hub resolves every waiter of a code when its qr_code_used event
+arrives, so one redemption wakes all waiting requests with no extra query.
+"""
+
+import asyncio
+from typing import Any, Dict, Optional, Set
+from app.core.events import event_hub
+
+
+class CodeWaiters:
+    """Map of QR code id -> futures of the requests waiting on it (event loop only)."""
+
+    def __init__(self):
+        self._waiters: Dict[int, Set[asyncio.Future]] = {}
+        self._count = 0
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    async def wait(self, qr_code_id: int, timeout: float) -> Optional[Dict[str, Any]]:
+        """
+        Wait for the code's redemption event; None on timeout.
+        The waiter is registered before the first await, so an event dispatched
+        after the caller's status query cannot be missed.
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(qr_code_id, set()).add(future)
+        self._count += 1
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            waiters = self._waiters.get(qr_code_id)
+            if waiters is not None:
+                waiters.discard(future)
+                if not waiters:
+                    del self._waiters[qr_code_id]
+            self._count -= 1
+
+    def resolve(self, qr_code_id: int, event: Dict[str, Any]) -> None:
+        for future in self._waiters.pop(qr_code_id, ()):
+            if not future.done():
+                future.set_result(event)
+
+
+# Per-process instance
+code_waiters = CodeWaiters()
+
+
+def _resolve_on_event(event: dict) -> None:
+    if event.get("type") == "qr_code_used":
+        code_waiters.resolve(event["id"], event)
+
+
+event_hub.add_listener(_resolve_on_event)
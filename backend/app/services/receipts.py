@@ -0,0 +1,167 @@
+"""
+Points for receipt batches posted by point-of-sale systems.
+
+Points come from the accrual engine (one vectorized pass per batch), ledger
+rows are appended with one bulk INSERT and balances are applied with one
+upsert aggregated per customer, as for offline scan sync. Receipts are
+recorded in booked_receipts in the same transaction; one already booked for
+the establishment (by any earlier batch) is a duplicate and earns nothing.
+"""
+
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import List, Optional, Sequence, Set
+from sqlalchemy import func, insert
+from sqlalchemy.orm import Session
+from app.core.dialects import greatest, upsert
+from app.core.tenancy import replicate_users
+from app.models.booked_receipt import BookedReceipt
+from app.models.point_activity import PointActivity
+from app.models.user_loyalty_points import UserLoyaltyPoints
+from app.schemas.receipt import Receipt, ReceiptResult, ReceiptStatus
+from app.services.accrual import accrual_engine
+from app.services.ledger import record_ledger_write
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _naive_utc(value: datetime, now: datetime) -> datetime:
+    """POS timestamps as naive UTC (as stored), never later than now."""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return min(value, now)
+
+
+class ReceiptService:
+    """Set-based accrual of receipt batches."""
+
+    @staticmethod
+    def _claim(db: Session, establishment_id: int, receipts: Sequence[Receipt]) -> Set[str]:
+        """
+        Record receipts as booked; returns the ids of those not booked before.
+        A concurrent batch booking the same receipt waits on the unique index
+        until that batch commits, then skips it.
+        """
+        if not receipts:
+            return set()
+        statement = upsert(db, BookedReceipt.__table__).on_conflict_do_nothing(
+            index_elements=[BookedReceipt.establishment_id, BookedReceipt.receipt_id]
+        ).returning(BookedReceipt.receipt_id)
+        return set(db.execute(statement, [
+            {"establishment_id": establishment_id, "receipt_id": receipt.receipt_id, "user_id": receipt.user_id}
+            for receipt in receipts
+        ]).scalars())
+
+    @staticmethod
+    def book(db: Session, establishment_id: int, worker_id: int, receipts: Sequence[Receipt]) -> List[ReceiptResult]:
+        """Validate, accrue and book a batch of receipts; results are in request order."""
+        import numpy as np
+
+        now = datetime.utcnow()
+        results: List[Optional[ReceiptResult]] = [None] * len(receipts)
+        customers = replicate_users(db, {receipt.user_id for receipt in receipts})
+
+        candidates = []
+        seen = set()
+        for index, receipt in enumerate(receipts):
+            if receipt.receipt_id in seen:
+                results[index] = ReceiptResult(receipt_id=receipt.receipt_id, status=ReceiptStatus.DUPLICATE)
+            elif receipt.user_id not in customers:
+                results[index] = ReceiptResult(receipt_id=receipt.receipt_id, status=ReceiptStatus.INVALID_CUSTOMER)
+            else:
+                candidates.append(index)
+            seen.add(receipt.receipt_id)
+        if not candidates:
+            return results
+
+        purchased = [_naive_utc(receipts[index].purchased_at, now) for index in candidates]
+        points, programs = accrual_engine.rules(establishment_id).accrue(
+            np.array([int(receipts[index].amount_spent * 100) for index in candidates], dtype=np.int64),
+            np.array([(at - _EPOCH).total_seconds() for at in purchased], dtype=np.float64),
+            np.array([receipts[index].program_id or 0 for index in candidates], dtype=np.int64),
+        )
+
+        accrued = points >= 0
+        claimed = ReceiptService._claim(
+            db, establishment_id, [receipts[index] for index, ok in zip(candidates, accrued.tolist()) if ok]
+        )
+        booked = accrued & np.array([receipts[index].receipt_id in claimed for index in candidates], dtype=bool)
+
+        activities = []
+        for position, index in enumerate(candidates):
+            receipt = receipts[index]
+            if not booked[position]:
+                status = ReceiptStatus.DUPLICATE if accrued[position] else ReceiptStatus.NO_ACTIVE_PROGRAM
+                results[index] = ReceiptResult(receipt_id=receipt.receipt_id, status=status)
+                continue
+            change, program_id = int(points[position]), int(programs[position])
+            activities.append({
+                "user_id": receipt.user_id,
+                "establishment_id": establishment_id,
+                "program_id": program_id,
+                "activity_type": "earned",
+                "points_change": change,
+                "description": f"Purchased {receipt.amount_spent}€",
+                "qr_code_id": None,
+                "processed_by_user_id": worker_id,
+                "amount_spent": receipt.amount_spent,
+                "extra_data": {"receipt_id": receipt.receipt_id},
+                "created_at": purchased[position],
+                "updated_at": now,
+            })
+            results[index] = ReceiptResult(
+                receipt_id=receipt.receipt_id, status=ReceiptStatus.ACCEPTED, program_id=program_id, points=change
+            )
+        if not activities:
+            return results
+
+        # Per-customer totals over the booked receipts
+        user_ids = np.array([receipts[index].user_id for index in candidates], dtype=np.int64)[booked]
+        customers_booked, slot = np.unique(user_ids, return_inverse=True)
+        earned = np.zeros(len(customers_booked), dtype=np.int64)
+        visits = np.zeros(len(customers_booked), dtype=np.int64)
+        np.add.at(earned, slot, points[booked])
+        np.add.at(visits, slot, 1)
+        value = [Decimal(0)] * len(customers_booked)
+        first: List[Optional[datetime]] = [None] * len(customers_booked)
+        last: List[Optional[datetime]] = [None] * len(customers_booked)
+        for activity, position in zip(activities, slot.tolist()):
+            value[position] += activity["amount_spent"]
+            at = activity["created_at"]
+            first[position] = min(first[position] or at, at)
+            last[position] = max(last[position] or at, at)
+
+        db.execute(insert(PointActivity), activities)
+        statement = upsert(db, UserLoyaltyPoints.__table__).values([
+            {
+                "user_id": int(user_id),
+                "establishment_id": establishment_id,
+                "total_points_earned": int(earned[position]),
+                "total_points_redeemed": 0,
+                "current_balance": int(earned[position]),
+                "total_visits": int(visits[position]),
+                "first_visit_date": first[position],
+                "last_activity_date": last[position],
+                "lifetime_value": value[position],
+                "created_at": now,
+                "updated_at": now,
+            }
+            for position, user_id in enumerate(customers_booked.tolist())
+        ])
+        excluded = statement.excluded
+        db.execute(statement.on_conflict_do_update(
+            index_elements=[UserLoyaltyPoints.user_id, UserLoyaltyPoints.establishment_id],
+            set_={
+                "total_points_earned": UserLoyaltyPoints.total_points_earned + excluded.total_points_earned,
+                "current_balance": UserLoyaltyPoints.current_balance + excluded.current_balance,
+                "total_visits": UserLoyaltyPoints.total_visits + excluded.total_visits,
+                "last_activity_date": greatest(db, UserLoyaltyPoints.last_activity_date, excluded.last_activity_date),
+                "lifetime_value": func.coalesce(UserLoyaltyPoints.lifetime_value, 0) + excluded.lifetime_value,
+                "updated_at": excluded.updated_at,
+            },
+        ))
+        for user_id in customers_booked.tolist():
+            record_ledger_write(db, int(user_id), establishment_id)
+
+        db.commit()
+        return results
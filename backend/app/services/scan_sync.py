@@ -0,0 +1,311 @@
+"""
+Bulk ingestion of scans collected offline by worker devices.
+
+A whole batch costs a fixed number of statements regardless of its size:
+codes and customers are validated with one IN query each, balances and
+then codes are locked with one SELECT ... FOR UPDATE each, codes are
+claimed with a single multi-row UPDATE (an executemany on SQLite), ledger
+rows are appended with one bulk INSERT, and balances are applied with one
+upsert aggregated per customer.
+
+Device timestamps are trusted only within bounds: a scan dated before the
+code was created or older than scan_sync_max_offline_seconds is rejected,
+so a backdated scan cannot redeem an expired code.
+"""
+
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Dict, List, Optional, Sequence
+from sqlalchemy import TIMESTAMP, Integer, bindparam, column, func, insert, select, update, values
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.dialects import dialect_name, greatest, upsert
+from app.core.events import event_hub
+from app.core.tenancy import replicate_users
+from app.models.point_activity import PointActivity
+from app.models.qr_code import QRCode
+from app.models.user_loyalty_points import UserLoyaltyPoints
+from app.schemas.scan import OfflineScan, ScanResult, ScanStatus
+from app.services.ledger import record_ledger_write
+from app.services.qr_archive import find_codes
+from app.services.velocity import ScanEvent, velocity_checks
+
+logger = logging.getLogger(__name__)
+
+CODE_TYPE_EARN = "earn_points"
+
+CODE_COLUMNS = (
+    "id",
+    "qr_code_hash",
+    "establishment_id",
+    "program_id",
+    "code_type",
+    "points_value",
+    "amount_spent",
+    "description",
+    "is_used",
+    "used_by_user_id",
+    "expires_at",
+    "created_at",
+)
+
+
+def _activity_type(code) -> str:
+    return "earned" if code.code_type == CODE_TYPE_EARN else "redeemed"
+
+
+def _naive_utc(value: datetime, now: datetime) -> datetime:
+    """Device timestamps as naive UTC (as stored), never later than now."""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return min(value, now)
+
+
+class ScanSyncService:
+    """Set-based processing of offline scan batches."""
+
+    @staticmethod
+    def _lock_codes(db: Session, code_ids: set) -> Dict[int, Optional[int]]:
+        """
+        Lock the codes about to be claimed; returns those lost since they were
+        read: claimed by a concurrent request (-> its customer) or archived (-> None).
+        """
+        if not code_ids or dialect_name(db) == "sqlite":
+            # The transaction has held the write lock since BEGIN IMMEDIATE
+            return {}
+        rows = db.execute(
+            select(QRCode.id, QRCode.is_used, QRCode.used_by_user_id)
+            .where(QRCode.id.in_(code_ids))
+            .order_by(QRCode.id)
+            .with_for_update()
+        ).all()
+        lost: Dict[int, Optional[int]] = {code_id: None for code_id in code_ids}
+        for row in rows:
+            if row.is_used:
+                lost[row.id] = row.used_by_user_id
+            else:
+                del lost[row.id]
+        return lost
+
+    @staticmethod
+    def _claim(db: Session, claims: List[tuple], now: datetime) -> None:
+        """
+        Claim codes locked by _lock_codes in one statement. Only codes that
+        stay claimed are updated: each fires a qr_code_used event on commit.
+        """
+        if not claims:
+            return
+        if dialect_name(db) == "sqlite":
+            # No UPDATE ... FROM (VALUES) there
+            codes = QRCode.__table__
+            db.execute(
+                update(codes)
+                .where(codes.c.id == bindparam("claim_id"), codes.c.is_used.is_(False))
+                .values(is_used=True, used_by_user_id=bindparam("claim_user_id"),
+                        used_at=bindparam("claim_used_at"), updated_at=now),
+                [{"claim_id": id_, "claim_user_id": user_id, "claim_used_at": used_at}
+                 for id_, user_id, used_at in claims],
+            )
+            return
+        claim_values = values(
+            column("id", Integer), column("user_id", Integer), column("used_at", TIMESTAMP), name="claims"
+        ).data(claims)
+        db.execute(
+            update(QRCode)
+            .where(QRCode.id == claim_values.c.id, QRCode.is_used.is_(False))
+            .values(is_used=True, used_by_user_id=claim_values.c.user_id, used_at=claim_values.c.used_at, updated_at=now)
+            .execution_options(synchronize_session=False)
+        )
+
+    @staticmethod
+    def _affordable(scans: Sequence[OfflineScan], ordered: List[tuple], balances: Dict[int, int],
+                    skipped: set) -> set:
+        """Ids of the codes whose scans, applied in order, never take a balance below zero."""
+        balances = dict(balances)
+        affordable = set()
+        for _, index, code in ordered:
+            if code.id in skipped:
+                continue
+            user_id = scans[index].user_id
+            change = code.points_value if code.code_type == CODE_TYPE_EARN else -code.points_value
+            if balances.get(user_id, 0) + change >= 0:
+                balances[user_id] = balances.get(user_id, 0) + change
+                affordable.add(code.id)
+        return affordable
+
+    @staticmethod
+    def sync(db: Session, establishment_id: int, worker_id: int, scans: Sequence[OfflineScan]) -> List[ScanResult]:
+        """Validate, claim and book a batch of scans; results are in request order."""
+        now = datetime.utcnow()
+        oldest = now - timedelta(seconds=settings.scan_sync_max_offline_seconds)
+        results: List[Optional[ScanResult]] = [None] * len(scans)
+
+        # Old codes may have been archived; those can only be duplicates or expired
+        codes = find_codes(db, {scan.qr_code_hash for scan in scans}, CODE_COLUMNS)
+        customers = replicate_users(db, {scan.user_id for scan in scans})
+
+        # Per-item validation; the first scan of a code within the batch wins
+        candidates = []
+        claimed_in_batch: Dict[str, int] = {}
+        for index, scan in enumerate(scans):
+            code = codes.get(scan.qr_code_hash)
+            scanned_at = _naive_utc(scan.scanned_at, now)
+            status = None
+            if code is None or code.establishment_id != establishment_id:
+                status = ScanStatus.NOT_FOUND
+            elif scan.user_id not in customers:
+                status = ScanStatus.INVALID_CUSTOMER
+            elif code.is_used or code.qr_code_hash in claimed_in_batch:
+                claimed_by = code.used_by_user_id if code.is_used else claimed_in_batch[code.qr_code_hash]
+                status = ScanStatus.DUPLICATE if claimed_by == scan.user_id else ScanStatus.ALREADY_USED
+            elif scanned_at < code.created_at or scanned_at < oldest:
+                status = ScanStatus.INVALID_TIME
+            elif code.expires_at < scanned_at:
+                status = ScanStatus.EXPIRED
+            else:
+                claimed_in_batch[code.qr_code_hash] = scan.user_id
+                candidates.append((scanned_at, index, code))
+
+            if status is not None:
+                results[index] = ScanResult(
+                    scan_id=scan.scan_id, status=status, qr_code_id=code.id if code is not None else None
+                )
+
+        # Velocity rules, in scan order, against this worker's in-memory counters
+        ordered = sorted(candidates, key=lambda candidate: candidate[:2])
+        violations = velocity_checks.check([
+            ScanEvent(scans[index].user_id, worker_id, establishment_id, _activity_type(code), scanned_at)
+            for scanned_at, index, code in ordered
+        ])
+        if violations:
+            logger.warning(
+                "Velocity rules broken at establishment %s by worker %s: %s",
+                establishment_id, worker_id,
+                {scans[ordered[position][1]].scan_id: rule for position, rule in violations.items()},
+            )
+            if settings.velocity_enforce:
+                for position in violations:
+                    _, index, code = ordered[position]
+                    results[index] = ScanResult(
+                        scan_id=scans[index].scan_id, status=ScanStatus.VELOCITY_LIMITED, qr_code_id=code.id
+                    )
+                ordered = [candidate for position, candidate in enumerate(ordered) if position not in violations]
+
+        if not ordered:
+            return results
+
+        # Lock the customers' balances (in a stable order) for the rest of the transaction
+        balances = dict(db.execute(
+            select(UserLoyaltyPoints.user_id, UserLoyaltyPoints.current_balance)
+            .where(
+                UserLoyaltyPoints.establishment_id == establishment_id,
+                UserLoyaltyPoints.user_id.in_({scans[index].user_id for _, index, _ in ordered}),
+            )
+            .order_by(UserLoyaltyPoints.user_id)
+            .with_for_update()
+        ).all())
+
+        # Lock the codes too, and leave out those lost to a concurrent request, before
+        # claiming: a claim rolled back later would already have fired its event
+        lost_to = ScanSyncService._lock_codes(db, {code.id for _, _, code in ordered})
+        lost = set(lost_to)
+        claimed = ScanSyncService._affordable(scans, ordered, balances, lost)
+        ScanSyncService._claim(db, [
+            (code.id, scans[index].user_id, scanned_at)
+            for scanned_at, index, code in ordered if code.id in claimed
+        ], now)
+
+        activities = []
+        booked: List[ScanEvent] = []
+        totals = defaultdict(lambda: {
+            "earned": 0, "redeemed": 0, "visits": 0, "value": Decimal(0), "first": None, "last": None,
+        })
+        for scanned_at, index, code in ordered:
+            scan = scans[index]
+            if code.id in lost:
+                if lost_to[code.id] is None:
+                    # Archived: an unused code long past its expiry
+                    status = ScanStatus.EXPIRED
+                elif lost_to[code.id] == scan.user_id:
+                    status = ScanStatus.DUPLICATE
+                else:
+                    status = ScanStatus.ALREADY_USED
+                results[index] = ScanResult(scan_id=scan.scan_id, status=status, qr_code_id=code.id)
+                continue
+            if code.id not in claimed:
+                results[index] = ScanResult(
+                    scan_id=scan.scan_id, status=ScanStatus.INSUFFICIENT_POINTS, qr_code_id=code.id
+                )
+                continue
+
+            earn = code.code_type == CODE_TYPE_EARN
+            change = code.points_value if earn else -code.points_value
+            booked.append(ScanEvent(scan.user_id, worker_id, establishment_id, _activity_type(code), scanned_at))
+            total = totals[scan.user_id]
+            total["earned" if earn else "redeemed"] += abs(change)
+            total["visits"] += 1
+            if earn and code.amount_spent is not None:
+                total["value"] += code.amount_spent
+            total["first"] = total["first"] or scanned_at
+            total["last"] = scanned_at
+
+            activities.append({
+                "user_id": scan.user_id,
+                "establishment_id": establishment_id,
+                "program_id": code.program_id,
+                "activity_type": _activity_type(code),
+                "points_change": change,
+                "description": code.description or ("Points earned" if earn else "Reward redeemed"),
+                "qr_code_id": code.id,
+                "processed_by_user_id": worker_id,
+                "amount_spent": code.amount_spent if earn else None,
+                "extra_data": {"offline_scan_id": scan.scan_id, "synced_at": now.isoformat()},
+                "created_at": scanned_at,
+                "updated_at": now,
+            })
+            results[index] = ScanResult(
+                scan_id=scan.scan_id, status=ScanStatus.ACCEPTED, qr_code_id=code.id, points_change=change
+            )
+
+        if activities:
+            db.execute(insert(PointActivity), activities)
+
+            statement = upsert(db, UserLoyaltyPoints.__table__).values([
+                {
+                    "user_id": user_id,
+                    "establishment_id": establishment_id,
+                    "total_points_earned": total["earned"],
+                    "total_points_redeemed": total["redeemed"],
+                    "current_balance": total["earned"] - total["redeemed"],
+                    "total_visits": total["visits"],
+                    "first_visit_date": total["first"],
+                    "last_activity_date": total["last"],
+                    "lifetime_value": total["value"],
+                    "created_at": now,
+                    "updated_at": now,
+                }
+                for user_id, total in totals.items()
+            ])
+            excluded = statement.excluded
+            db.execute(statement.on_conflict_do_update(
+                index_elements=[UserLoyaltyPoints.user_id, UserLoyaltyPoints.establishment_id],
+                set_={
+                    "total_points_earned": UserLoyaltyPoints.total_points_earned + excluded.total_points_earned,
+                    "total_points_redeemed": UserLoyaltyPoints.total_points_redeemed + excluded.total_points_redeemed,
+                    "current_balance": UserLoyaltyPoints.current_balance + excluded.current_balance,
+                    "total_visits": UserLoyaltyPoints.total_visits + excluded.total_visits,
+                    "last_activity_date": greatest(db, UserLoyaltyPoints.last_activity_date, excluded.last_activity_date),
+                    "lifetime_value": func.coalesce(UserLoyaltyPoints.lifetime_value, 0) + excluded.lifetime_value,
+                    "updated_at": excluded.updated_at,
+                },
+            ))
+            for user_id in totals:
+                record_ledger_write(db, user_id, establishment_id)
+
+        db.commit()
+        if not event_hub.enabled:
+            # Otherwise the committed activities come back through the event hub
+            velocity_checks.record(booked)
+        return results
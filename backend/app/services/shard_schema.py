@@ -0,0 +1,222 @@
+"""
+Schema for tenant shards.
+
+The Alembic migrations only run against the primary. A shard gets its tables
+from the models and the NOTIFY triggers of migrations 004 and 007, which the
+live event feed, QR long polling, velocity checks and cache invalidation rely
+on for the tenants it holds (app.core.events listens on every shard).
+
+Ledger ids stay unique across databases, so rows keep their ids when a tenant
+moves and ids from different shards never collide in merged reads: each shard's
+id sequences are confined to its own block (id_block), and the primary's stop
+below the lowest block.
+Run with `python scripts/move_tenant.py --prepare <shard>`; safe to repeat.
+"""
+
+import logging
+from typing import List, Tuple
+from sqlalchemy import text
+from app.core.config import settings
+from app.core.database import DEFAULT_SHARD, Base, shard_registry
+
+logger = logging.getLogger(__name__)
+
+# Kept in step with migrations 004_add_event_notify_triggers and 007_add_program_notify_trigger
+TRIGGER_FUNCTIONS = (
+    """
+    CREATE OR REPLACE FUNCTION notify_point_activity()
+    RETURNS TRIGGER AS $$
+    BEGIN
+        PERFORM pg_notify('establishment_events', json_build_object(
+            'type', 'point_activity',
+            'establishment_id', NEW.establishment_id,
+            'id', NEW.id,
+            'user_id', NEW.user_id,
+            'program_id', NEW.program_id,
+            'activity_type', NEW.activity_type,
+            'points_change', NEW.points_change,
+            'qr_code_id', NEW.qr_code_id,
+            'processed_by_user_id', NEW.processed_by_user_id,
+            'created_at', NEW.created_at
+        )::text);
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE OR REPLACE FUNCTION notify_qr_code_used()
+    RETURNS TRIGGER AS $$
+    BEGIN
+        PERFORM pg_notify('establishment_events', json_build_object(
+            'type', 'qr_code_used',
+            'establishment_id', NEW.establishment_id,
+            'id', NEW.id,
+            'code_type', NEW.code_type,
+            'points_value', NEW.points_value,
+            'used_by_user_id', NEW.used_by_user_id,
+            'used_at', NEW.used_at
+        )::text);
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE OR REPLACE FUNCTION notify_loyalty_program()
+    RETURNS TRIGGER AS $$
+    DECLARE
+        program loyalty_programs%ROWTYPE;
+    BEGIN
+        IF TG_OP = 'DELETE' THEN
+            program := OLD;
+        ELSE
+            program := NEW;
+        END IF;
+        PERFORM pg_notify('establishment_events', json_build_object(
+            'type', 'loyalty_program',
+            'establishment_id', program.establishment_id,
+            'id', program.id,
+            'operation', lower(TG_OP)
+        )::text);
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+)
+
+# Tables whose ids are allocated on the tenant's shard
+ID_TABLES = ("loyalty_programs", "user_loyalty_points", "qr_codes", "point_activities", "booked_receipts")
+# Top of the int4 id columns
+MAX_ID = 2 ** 31 - 1
+
+# name -> (table, CREATE TRIGGER statement)
+TRIGGERS = {
+    "point_activities_notify": (
+        "point_activities",
+        """
+        CREATE TRIGGER point_activities_notify
+            AFTER INSERT ON point_activities
+            FOR EACH ROW
+            EXECUTE FUNCTION notify_point_activity()
+        """,
+    ),
+    "qr_codes_notify_used": (
+        "qr_codes",
+        """
+        CREATE TRIGGER qr_codes_notify_used
+            AFTER UPDATE OF is_used ON qr_codes
+            FOR EACH ROW
+            WHEN (NEW.is_used AND NOT OLD.is_used)
+            EXECUTE FUNCTION notify_qr_code_used()
+        """,
+    ),
+    "loyalty_programs_notify": (
+        "loyalty_programs",
+        """
+        CREATE TRIGGER loyalty_programs_notify
+            AFTER INSERT OR UPDATE OR DELETE ON loyalty_programs
+            FOR EACH ROW
+            EXECUTE FUNCTION notify_loyalty_program()
+        """,
+    ),
+}
+
+
+def id_block(shard: str) -> Tuple[int, int]:
+    """
+    (first, last) id a database may allocate: the n-th shard of
+    DATABASE_SHARD_URLS owns the n-th shard_id_block_size ids counted down from
+    MAX_ID, the primary everything below the lowest block.
+    """
+    names = shard_registry.names
+    size = settings.shard_id_block_size
+    if shard == DEFAULT_SHARD:
+        first, last = 1, MAX_ID - (len(names) - 1) * size
+    else:
+        last = MAX_ID - (names.index(shard) - 1) * size
+        first = last - size + 1
+    if first < 1 or last < first:
+        raise ValueError(f"SHARD_ID_BLOCK_SIZE={size} leaves no id range for {len(names)} databases")
+    return first, last
+
+
+def _sequence(cursor, table: str) -> str:
+    cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", (table,))
+    return cursor.fetchone()[0]
+
+
+def _confine_sequences(cursor, shard: str) -> None:
+    """Restrict the id sequences to the database's block, keeping their position inside it."""
+    first, last = id_block(shard)
+    for table in ID_TABLES:
+        sequence = _sequence(cursor, table)
+        cursor.execute(f"SELECT last_value, is_called FROM {sequence}")
+        last_value, is_called = cursor.fetchone()
+        position = last_value + 1 if is_called else last_value
+        if shard == DEFAULT_SHARD:
+            if position > last + 1:
+                raise RuntimeError(f"{sequence} is at {last_value}, inside the shard id blocks")
+            cursor.execute(f"ALTER SEQUENCE {sequence} MAXVALUE {last}")
+            continue
+        cursor.execute(f"SELECT max(id) FROM {table} WHERE id BETWEEN %s AND %s", (first, last))
+        allocated = cursor.fetchone()[0]
+        restart = max(first, (allocated or 0) + 1, position if first <= position <= last else first)
+        cursor.execute(
+            f"ALTER SEQUENCE {sequence} MINVALUE {first} MAXVALUE {last} START WITH {first} RESTART WITH {restart}"
+        )
+
+
+def prepare_shard(shard: str) -> None:
+    """
+    Create missing tables and (re)create the NOTIFY triggers on a shard, and
+    confine its id sequences (and the primary's) to their blocks.
+    """
+    import app.models  # noqa: F401  (registers every table)
+
+    engine = shard_registry.engine(shard)
+    Base.metadata.create_all(engine)
+    if engine.dialect.name != "postgresql":
+        return
+
+    shards = [DEFAULT_SHARD] if shard == DEFAULT_SHARD else [shard, DEFAULT_SHARD]
+    for name in shards:
+        # Raw DBAPI cursor: the function bodies contain % (ROWTYPE), which must not be parameter-formatted
+        connection = shard_registry.engine(name).raw_connection()
+        try:
+            with connection.cursor() as cursor:
+                if name == shard:
+                    for ddl in TRIGGER_FUNCTIONS:
+                        cursor.execute(ddl)
+                    for trigger, (table, ddl) in TRIGGERS.items():
+                        cursor.execute(f"DROP TRIGGER IF EXISTS {trigger} ON {table}")
+                        cursor.execute(ddl)
+                _confine_sequences(cursor, name)
+            connection.commit()
+        finally:
+            connection.close()
+    logger.info("Prepared shard %s (ids %d-%d)", shard, *id_block(shard))
+
+
+def missing_setup(shard: str) -> List[str]:
+    """What a PostgreSQL database still needs from prepare_shard: tables, triggers, sequences outside its id block."""
+    engine = shard_registry.engine(shard)
+    if engine.dialect.name != "postgresql":
+        return []
+    first, last = id_block(shard)
+    with engine.connect() as connection:
+        present = set(connection.execute(
+            text("SELECT tgname FROM pg_trigger WHERE NOT tgisinternal AND tgname = ANY(:names)"),
+            {"names": list(TRIGGERS)},
+        ).scalars())
+        missing = [name for name in TRIGGERS if name not in present]
+        for table in ID_TABLES:
+            if connection.execute(text("SELECT to_regclass(:table)"), {"table": table}).scalar() is None:
+                missing.append(f"{table} table")
+                continue
+            bounds = connection.execute(
+                text("SELECT seqmin, seqmax FROM pg_sequence WHERE seqrelid = pg_get_serial_sequence(:table, 'id')::regclass"),
+                {"table": table},
+            ).first()
+            confined = bounds.seqmax <= last if shard == DEFAULT_SHARD else tuple(bounds) == (first, last)
+            if not confined:
+                missing.append(f"{table} id block")
+    return missing
@@ -0,0 +1,226 @@
+"""
+Moving a tenant (business owner) between database shards.
+
+The tenant is first marked as moving in the directory, and the mover waits
+one directory TTL so every worker refuses its writes. Its rows are then
+streamed from a consistent snapshot of the source into the target with
+COPY (source) -> staging table -> INSERT (target), row counts are verified,
+the directory is flipped, and the rows are deleted from the source.
+Rows keep their ids: each database allocates ledger ids from its own block,
+so they stay unique on the target. The target must have been prepared
+(app.services.shard_schema) first.
+Catalog rows (business owner, establishments) and referenced users are copied
+but stay on the primary, which remains authoritative for them.
+"""
+
+import logging
+import tempfile
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+from sqlalchemy import Table, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from app.core.config import settings
+from app.core.database import DEFAULT_SHARD, SessionLocal, get_engine, shard_registry
+from app.core.tenancy import tenant_directory
+from app.models.booked_receipt import BookedReceipt
+from app.models.business_owner import BusinessOwner
+from app.models.establishment import Establishment
+from app.models.loyalty_program import LoyaltyProgram
+from app.models.point_activity import PointActivity
+from app.models.qr_code import QRCode
+from app.models.qr_code_archive import QRCodeArchive
+from app.models.tenant_shard import TenantShard
+from app.models.user import User
+from app.models.user_loyalty_points import UserLoyaltyPoints
+from app.services.shard_schema import missing_setup
+
+logger = logging.getLogger(__name__)
+
+# Copied to the target, kept on the primary
+CATALOG_TABLES: Sequence[Table] = (BusinessOwner.__table__, Establishment.__table__)
+# Moved: copied to the target, deleted from the source (foreign key order)
+LEDGER_TABLES: Sequence[Table] = (
+    LoyaltyProgram.__table__,
+    UserLoyaltyPoints.__table__,
+    QRCode.__table__,
+    QRCodeArchive.__table__,
+    PointActivity.__table__,
+    BookedReceipt.__table__,
+)
+
+# Spill COPY buffers to disk beyond this size
+COPY_BUFFER_BYTES = 64 * 1024 * 1024
+
+
+def _tenant_filter(table: Table) -> str:
+    if table is BusinessOwner.__table__:
+        return "id = %(owner)s"
+    if table is Establishment.__table__:
+        return "business_owner_id = %(owner)s"
+    return "establishment_id = ANY(%(establishments)s)"
+
+
+def _users_filter() -> str:
+    """Users referenced by the tenant's rows, plus its staff."""
+    return (
+        "establishment_id = ANY(%(establishments)s) OR id IN ("
+        " SELECT user_id FROM user_loyalty_points WHERE establishment_id = ANY(%(establishments)s)"
+        " UNION SELECT user_id FROM point_activities WHERE establishment_id = ANY(%(establishments)s)"
+        " UNION SELECT processed_by_user_id FROM point_activities WHERE establishment_id = ANY(%(establishments)s)"
+        " UNION SELECT created_by_user_id FROM qr_codes WHERE establishment_id = ANY(%(establishments)s)"
+        " UNION SELECT used_by_user_id FROM qr_codes WHERE establishment_id = ANY(%(establishments)s))"
+    )
+
+
+class TenantMover:
+    """Copies a tenant's rows between shards with COPY."""
+
+    def __init__(self, business_owner_id: int):
+        self.business_owner_id = business_owner_id
+
+    def current_shard(self) -> str:
+        get_engine()
+        db = SessionLocal()
+        try:
+            shard = db.execute(
+                select(TenantShard.shard).where(TenantShard.business_owner_id == self.business_owner_id)
+            ).scalar()
+        finally:
+            db.close()
+        return shard or DEFAULT_SHARD
+
+    def _set_directory(self, shard: str, moving: bool) -> None:
+        db = SessionLocal()
+        try:
+            upsert = pg_insert(TenantShard).values(
+                business_owner_id=self.business_owner_id, shard=shard, is_moving=moving
+            )
+            db.execute(upsert.on_conflict_do_update(
+                index_elements=[TenantShard.business_owner_id],
+                set_={"shard": shard, "is_moving": moving, "updated_at": upsert.excluded.updated_at},
+            ))
+            db.commit()
+        finally:
+            db.close()
+        tenant_directory.invalidate_owner(self.business_owner_id)
+
+    @staticmethod
+    def _copy(source_cursor, target_cursor, table: Table, where: str, params: Dict,
+              columns: Optional[List[str]] = None, select_list: Optional[str] = None,
+              on_conflict: str = "") -> Tuple[int, int]:
+        """Stream matching rows of one table into the target; returns (staged, inserted)."""
+        columns = columns or [column.name for column in table.columns]
+        column_list = ", ".join(columns)
+        query = source_cursor.mogrify(
+            f"COPY (SELECT {select_list or column_list} FROM {table.name} WHERE {where}) TO STDOUT", params
+        ).decode()
+
+        with tempfile.SpooledTemporaryFile(max_size=COPY_BUFFER_BYTES) as buffer:
+            source_cursor.copy_expert(query, buffer)
+            buffer.seek(0)
+            stage = f"_stage_{table.name}"
+            target_cursor.execute(f"CREATE TEMP TABLE {stage} (LIKE {table.name} INCLUDING DEFAULTS) ON COMMIT DROP")
+            target_cursor.copy_expert(f"COPY {stage} ({column_list}) FROM STDIN", buffer)
+
+        target_cursor.execute(f"SELECT count(*) FROM {stage}")
+        staged = target_cursor.fetchone()[0]
+        target_cursor.execute(
+            f"INSERT INTO {table.name} ({column_list}) SELECT {column_list} FROM {stage} {on_conflict}"
+        )
+        return staged, target_cursor.rowcount
+
+    def move(self, target: str, wait_seconds: Optional[float] = None) -> Dict[str, int]:
+        """Move the tenant to the target shard; returns rows copied per table."""
+        source = self.current_shard()
+        if source == target:
+            return {}
+        source_engine = shard_registry.engine(source)
+        target_engine = shard_registry.engine(target)
+        missing = missing_setup(target)
+        if missing:
+            raise RuntimeError(
+                f"shard {target!r} is not prepared (missing {', '.join(missing)}); "
+                f"run scripts/move_tenant.py --prepare {target} first"
+            )
+
+        self._set_directory(source, moving=True)
+        # Let every worker's cached route expire so none still writes to the source
+        time.sleep(settings.tenant_directory_ttl_seconds if wait_seconds is None else wait_seconds)
+
+        copied: Dict[str, int] = {}
+        source_connection = source_engine.raw_connection()
+        target_connection = target_engine.raw_connection()
+        try:
+            source_connection.rollback()
+            target_connection.rollback()
+            source_cursor = source_connection.cursor()
+            target_cursor = target_connection.cursor()
+            # One snapshot for every table read from the source
+            source_cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY")
+
+            source_cursor.execute(
+                "SELECT id FROM establishments WHERE business_owner_id = %s", (self.business_owner_id,)
+            )
+            params = {
+                "owner": self.business_owner_id,
+                "establishments": [row[0] for row in source_cursor.fetchall()],
+            }
+
+            # Leftovers of an interrupted earlier move to this target
+            for table in reversed(LEDGER_TABLES):
+                target_cursor.execute(f"DELETE FROM {table.name} WHERE {_tenant_filter(table)}", params)
+
+            for table in CATALOG_TABLES:
+                _, copied[table.name] = self._copy(
+                    source_cursor, target_cursor, table, _tenant_filter(table), params,
+                    on_conflict="ON CONFLICT DO NOTHING",
+                )
+
+            # Staff assignments to other tenants' establishments are not carried over
+            user_columns = [column.name for column in User.__table__.columns]
+            user_select = ", ".join(
+                "CASE WHEN establishment_id = ANY(%(establishments)s) THEN establishment_id END"
+                if name == "establishment_id" else name
+                for name in user_columns
+            )
+            _, copied["users"] = self._copy(
+                source_cursor, target_cursor, User.__table__, _users_filter(), params,
+                columns=user_columns, select_list=user_select, on_conflict="ON CONFLICT DO NOTHING",
+            )
+
+            for table in LEDGER_TABLES:
+                staged, inserted = self._copy(source_cursor, target_cursor, table, _tenant_filter(table), params)
+                if staged != inserted:
+                    raise RuntimeError(f"{table.name}: staged {staged} rows but inserted {inserted}")
+                copied[table.name] = inserted
+
+            target_connection.commit()
+            source_connection.rollback()
+        except Exception:
+            target_connection.rollback()
+            source_connection.rollback()
+            self._set_directory(source, moving=False)
+            raise
+        finally:
+            source_connection.close()
+            target_connection.close()
+
+        self._set_directory(target, moving=False)
+        logger.info("Moved tenant %s from %s to %s: %s", self.business_owner_id, source, target, copied)
+
+        self._purge_source(source_engine, source, params)
+        return copied
+
+    def _purge_source(self, source_engine, source: str, params: Dict) -> None:
+        """Delete the tenant's rows from the shard it left (catalog rows stay on the primary)."""
+        tables = list(reversed(LEDGER_TABLES))
+        if source != DEFAULT_SHARD:
+            tables += list(reversed(CATALOG_TABLES))
+        connection = source_engine.raw_connection()
+        try:
+            with connection.cursor() as cursor:
+                for table in tables:
+                    cursor.execute(f"DELETE FROM {table.name} WHERE {_tenant_filter(table)}", params)
+            connection.commit()
+        finally:
+            connection.close()
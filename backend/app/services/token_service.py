@@ -0,0 +1,151 @@
+"""
+Token service for issuing, rotating and revoking access/refresh tokens.
+"""
+
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Tuple
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session
+from app.core.auth import create_access_token, create_refresh_token, verify_token, REFRESH_TOKEN_TYPE
+from app.core.config import settings
+from app.core.permissions import ESTABLISHMENT_CLAIM
+from app.core.revocation import revocation_list, to_epoch
+from app.models.refresh_token import RefreshToken
+from app.models.revoked_token import RevokedToken
+from app.models.user import User
+from app.schemas.auth import TokenResponse
+
+
+class TokenService:
+    """Service for short-lived access tokens, rotating refresh tokens and revocation."""
+
+    @staticmethod
+    def _new_refresh_token(db: Session, user_id: int, family_id: str) -> Tuple[str, str]:
+        """Persist a refresh token record and return (token, jti)."""
+        jti = uuid.uuid4().hex
+        expires_at = datetime.utcnow() + timedelta(days=settings.refresh_token_expire_days)
+        db.add(RefreshToken(jti=jti, family_id=family_id, user_id=user_id, expires_at=expires_at))
+        return create_refresh_token(user_id, jti, family_id, expires_at), jti
+
+    @staticmethod
+    def _token_response(user: User, refresh_token: str) -> TokenResponse:
+        """Create a short-lived access token and build the token response."""
+        access_token = create_access_token(
+            data={"sub": str(user.id), "role": user.role, ESTABLISHMENT_CLAIM: user.establishment_id},
+            expires_delta=timedelta(minutes=settings.access_token_expire_minutes)
+        )
+
+        return TokenResponse(
+            access_token=access_token,
+            token_type="bearer",
+            expires_in=settings.access_token_expire_minutes * 60,
+            user_id=user.id,
+            role=user.role,
+            refresh_token=refresh_token,
+            refresh_expires_in=settings.refresh_token_expire_days * 86400
+        )
+
+    @staticmethod
+    def issue_tokens(db: Session, user: User, family_id: str = None) -> TokenResponse:
+        """
+        Issue an access token and a refresh token for the user.
+        A new login starts a new refresh token family.
+        """
+        refresh_token, _ = TokenService._new_refresh_token(db, user.id, family_id or uuid.uuid4().hex)
+        db.commit()
+
+        return TokenService._token_response(user, refresh_token)
+
+    @staticmethod
+    def rotate_refresh_token(db: Session, refresh_token: str) -> TokenResponse:
+        """
+        Exchange a refresh token for a new token pair, revoking the old one.
+        Presenting an already-rotated token revokes its whole family.
+        """
+        payload = verify_token(refresh_token, token_type=REFRESH_TOKEN_TYPE)
+        invalid = HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired refresh token"
+        )
+
+        stored = db.query(RefreshToken).filter(
+            RefreshToken.jti == payload.get("jti")
+        ).with_for_update().first()
+
+        now = datetime.utcnow()
+        if not stored or stored.expires_at <= now:
+            raise invalid
+
+        if stored.revoked_at is not None:
+            # Token reuse: treat the family as compromised
+            TokenService.revoke_family(db, stored.family_id)
+            db.commit()
+            raise invalid
+
+        user = db.query(User).filter(User.id == stored.user_id).first()
+        if not user or not user.is_active:
+            raise invalid
+
+        new_token, new_jti = TokenService._new_refresh_token(db, user.id, stored.family_id)
+        stored.revoked_at = now
+        stored.replaced_by_jti = new_jti
+        db.commit()
+
+        return TokenService._token_response(user, new_token)
+
+    @staticmethod
+    def revoke_family(db: Session, family_id: str) -> None:
+        """Revoke every still-active refresh token in a family (caller commits)."""
+        db.query(RefreshToken).filter(
+            RefreshToken.family_id == family_id,
+            RefreshToken.revoked_at.is_(None)
+        ).update({RefreshToken.revoked_at: datetime.utcnow()}, synchronize_session=False)
+
+    @staticmethod
+    def logout(db: Session, access_payload: dict, refresh_token: str = None) -> None:
+        """Revoke the current access token and, if given, the refresh token's family."""
+        user_id = int(access_payload["sub"])
+
+        if refresh_token:
+            refresh_payload = verify_token(refresh_token, token_type=REFRESH_TOKEN_TYPE)
+            if int(refresh_payload["sub"]) == user_id and refresh_payload.get("fam"):
+                TokenService.revoke_family(db, refresh_payload["fam"])
+
+        jti = access_payload.get("jti")
+        if jti:
+            expires_at = datetime.utcfromtimestamp(access_payload["exp"])
+            db.add(RevokedToken(jti=jti, user_id=user_id, expires_at=expires_at))
+        db.commit()
+
+        if jti:
+            # Effective immediately on this worker; others pick it up on their next sync
+            revocation_list.add(user_id, jti, time.time(), to_epoch(expires_at))
+
+    @staticmethod
+    def revoke_all_user_tokens(db: Session, user_id: int) -> None:
+        """Revoke every access and refresh token issued to the user so far."""
+        now = datetime.utcnow()
+        expires_at = now + timedelta(minutes=settings.access_token_expire_minutes)
+
+        db.add(RevokedToken(jti=None, user_id=user_id, expires_at=expires_at))
+        db.query(RefreshToken).filter(
+            RefreshToken.user_id == user_id,
+            RefreshToken.revoked_at.is_(None)
+        ).update({RefreshToken.revoked_at: now}, synchronize_session=False)
+        db.commit()
+
+        revocation_list.add(user_id, None, time.time(), to_epoch(expires_at))
+
+    @staticmethod
+    def purge_expired(db: Session) -> int:
+        """
+        Delete expired revocation entries and refresh tokens.
+        Returns the number of deleted records.
+        """
+        now = datetime.utcnow()
+        count = db.query(RevokedToken).filter(RevokedToken.expires_at < now).delete(synchronize_session=False)
+        count += db.query(RefreshToken).filter(RefreshToken.expires_at < now).delete(synchronize_session=False)
+        db.commit()
+        return count
@@ -0,0 +1,296 @@
+"""
+Velocity checks on scans, evaluated from in-memory counters.
+
+Each worker counts point activity in time buckets of velocity_bucket_seconds
+per customer, per worker (processed_by_user_id), per establishment and per
+(worker, customer), and tracks which establishments each customer was active
+at. A rule (see parse_rules) caps one of these counts over a sliding window
+kept with a running total, so checking a scan is a few dict lookups and never
+an aggregate query. Windows are exact to one bucket.
+
+Every worker sees every committed activity through the event hub (or, without
+it, its own commits); a periodic resync rebuilds the counters from recent
+point_activities on every shard, which also warms them on startup.
+"""
+
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Set
+from sqlalchemy import select
+from app.core.config import settings
+from app.core.events import event_hub
+from app.models.point_activity import PointActivity
+
+ACTIVITY_ANY = "any"
+ACTIVITIES = ("earned", "redeemed", ACTIVITY_ANY)
+
+# What a rule counts
+SCOPE_USER = "user"                                # activities of one customer
+SCOPE_WORKER = "worker"                            # activities processed by one worker
+SCOPE_ESTABLISHMENT = "establishment"              # activities at one establishment
+SCOPE_WORKER_USER = "worker_user"                  # one worker's activities for one customer
+SCOPE_USER_ESTABLISHMENTS = "user_establishments"  # distinct establishments of one customer
+SCOPES = (SCOPE_USER, SCOPE_WORKER, SCOPE_ESTABLISHMENT, SCOPE_WORKER_USER, SCOPE_USER_ESTABLISHMENTS)
+
+
+class VelocityRule(NamedTuple):
+    """At most `limit` of `scope` for `activity` within `window_seconds`."""
+    name: str
+    scope: str
+    activity: str
+    limit: int
+    window_seconds: int
+
+
+class ScanEvent(NamedTuple):
+    """One (tentative or committed) point activity."""
+    user_id: int
+    worker_id: Optional[int]
+    establishment_id: int
+    activity: str  # "earned" or "redeemed"
+    at: datetime   # naive UTC
+
+
+def parse_rules(spec: str) -> List[VelocityRule]:
+    """
+    Parse comma-separated `name=scope:activity:limit/window_seconds` rules,
+    e.g. "worker_user_earn=worker_user:earned:20/3600".
+    """
+    rules = []
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        try:
+            name, definition = item.split("=", 1)
+            scope, activity, bound = definition.split(":")
+            limit, window = bound.split("/")
+            rule = VelocityRule(name.strip(), scope.strip(), activity.strip(), int(limit), int(window))
+        except ValueError:
+            raise ValueError(f"Invalid velocity rule {item.strip()!r}") from None
+        if rule.scope not in SCOPES or rule.activity not in ACTIVITIES or rule.window_seconds <= 0:
+            raise ValueError(f"Invalid velocity rule {item.strip()!r}")
+        rules.append(rule)
+    return rules
+
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _epoch(at: datetime) -> float:
+    return (at - _EPOCH).total_seconds()
+
+
+def _key(scope: str, event: ScanEvent) -> Optional[tuple]:
+    if scope in (SCOPE_USER, SCOPE_USER_ESTABLISHMENTS):
+        return (event.user_id,)
+    if scope == SCOPE_ESTABLISHMENT:
+        return (event.establishment_id,)
+    if event.worker_id is None:
+        return None
+    return (event.worker_id,) if scope == SCOPE_WORKER else (event.worker_id, event.user_id)
+
+
+class SlidingWindow:
+    """
+    Counts per bucket over the last `size` buckets with a running total.
+    The window only slides forward, so reads at the latest bucket are O(1)
+    amortized; reads at an earlier bucket (out-of-order offline scans) sum
+    the buckets they cover.
+    """
+
+    __slots__ = ("size", "head", "total", "buckets")
+
+    def __init__(self, size: int):
+        self.size = size
+        self.head = 0
+        self.total = 0
+        self.buckets: Dict[int, int] = {}
+
+    def _slide(self, bucket: int) -> None:
+        if bucket - self.head >= self.size:
+            self.buckets.clear()
+            self.total = 0
+        else:
+            for old in range(self.head - self.size + 1, bucket - self.size + 1):
+                self.total -= self.buckets.pop(old, 0)
+        self.head = bucket
+
+    def add(self, bucket: int) -> None:
+        if bucket > self.head:
+            self._slide(bucket)
+        elif bucket <= self.head - self.size:
+            return
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+        self.total += 1
+
+    def count(self, bucket: int) -> int:
+        """Count in the window ending at bucket."""
+        if bucket >= self.head:
+            self._slide(bucket)
+            return self.total
+        first = bucket - self.size
+        return sum(count for at, count in self.buckets.items() if first < at <= bucket)
+
+
+class VelocityCounters:
+    """Per rule: a SlidingWindow per key, or establishment -> latest bucket for spread rules."""
+
+    def __init__(self, rules: Sequence[VelocityRule]):
+        self.rules = rules
+        self.sizes = [_buckets(rule) for rule in rules]
+        self.by_rule: List[Dict[tuple, object]] = [{} for _ in rules]
+
+    def add(self, event: ScanEvent, bucket: int) -> None:
+        for rule, size, counters in zip(self.rules, self.sizes, self.by_rule):
+            if rule.activity != ACTIVITY_ANY and rule.activity != event.activity:
+                continue
+            key = _key(rule.scope, event)
+            if key is None:
+                continue
+            if rule.scope == SCOPE_USER_ESTABLISHMENTS:
+                seen = counters.setdefault(key, {})
+                seen[event.establishment_id] = max(bucket, seen.get(event.establishment_id, bucket))
+                if len(seen) > 4 * rule.limit:
+                    # Forget establishments that fell out of the window
+                    counters[key] = {est: at for est, at in seen.items() if at > bucket - size}
+            else:
+                window = counters.get(key)
+                if window is None:
+                    window = counters[key] = SlidingWindow(size)
+                window.add(bucket)
+
+    def count(self, position: int, key: tuple, bucket: int) -> int:
+        window = self.by_rule[position].get(key)
+        return window.count(bucket) if window is not None else 0
+
+    def establishments(self, position: int, key: tuple, bucket: int) -> Set[int]:
+        seen = self.by_rule[position].get(key)
+        if not seen:
+            return set()
+        first = bucket - self.sizes[position]
+        return {est for est, at in seen.items() if first < at <= bucket}
+
+
+def _buckets(rule: VelocityRule) -> int:
+    """Buckets spanned by the rule's window (rounded up)."""
+    return max(1, -(-rule.window_seconds // settings.velocity_bucket_seconds))
+
+
+class VelocityChecks:
+    """Per-process velocity counters and rule evaluation."""
+
+    def __init__(self):
+        self._rules: Optional[List[VelocityRule]] = None
+        self._counters: Optional[VelocityCounters] = None
+        self._bucket_seconds = 0
+        self._lock = threading.Lock()
+
+    @property
+    def rules(self) -> List[VelocityRule]:
+        if self._rules is None:
+            self._rules = parse_rules(settings.velocity_rules)
+            self._bucket_seconds = settings.velocity_bucket_seconds
+            self._counters = VelocityCounters(self._rules)
+        return self._rules
+
+    def _broken_rule(self, event: ScanEvent, bucket: int, pending: VelocityCounters) -> Optional[str]:
+        for position, rule in enumerate(self._rules):
+            if rule.activity != ACTIVITY_ANY and rule.activity != event.activity:
+                continue
+            key = _key(rule.scope, event)
+            if key is None:
+                continue
+            if rule.scope == SCOPE_USER_ESTABLISHMENTS:
+                seen = self._counters.establishments(position, key, bucket)
+                seen |= pending.establishments(position, key, bucket)
+                seen.add(event.establishment_id)
+                if len(seen) > rule.limit:
+                    return rule.name
+            elif self._counters.count(position, key, bucket) + pending.count(position, key, bucket) >= rule.limit:
+                return rule.name
+        return None
+
+    def check(self, events: Sequence[ScanEvent]) -> Dict[int, str]:
+        """
+        Evaluate a batch of scans in order; returns {index: rule name} for the
+        ones that break a rule. Scans that pass count towards the later ones.
+        """
+        rules = self.rules
+        violations: Dict[int, str] = {}
+        if not rules:
+            return violations
+        enforce = settings.velocity_enforce
+        pending = VelocityCounters(rules)
+        with self._lock:
+            for index, event in enumerate(events):
+                bucket = int(_epoch(event.at) // self._bucket_seconds)
+                broken = self._broken_rule(event, bucket, pending)
+                if broken is not None:
+                    violations[index] = broken
+                    if enforce:
+                        continue
+                pending.add(event, bucket)
+        return violations
+
+    def record(self, events: Iterable[ScanEvent]) -> None:
+        """Count committed activities."""
+        if not self.rules:
+            return
+        with self._lock:
+            counters = self._counters
+            for event in events:
+                counters.add(event, int(_epoch(event.at) // self._bucket_seconds))
+
+    def resync(self) -> int:
+        """Rebuild the counters from point activity within the longest window, on every shard (periodic)."""
+        from app.core.database import get_engine, open_read_session, shard_registry
+
+        rules = self.rules
+        if not rules:
+            return 0
+        get_engine()
+        since = datetime.utcnow() - timedelta(
+            seconds=max(rule.window_seconds for rule in rules) + settings.velocity_bucket_seconds
+        )
+        counters = VelocityCounters(rules)
+        total = 0
+        for shard in shard_registry.names:
+            db = open_read_session(shard)
+            try:
+                rows = db.execute(
+                    select(
+                        PointActivity.user_id,
+                        PointActivity.processed_by_user_id,
+                        PointActivity.establishment_id,
+                        PointActivity.activity_type,
+                        PointActivity.created_at,
+                    ).where(PointActivity.created_at >= since)
+                )
+                for row in rows:
+                    counters.add(ScanEvent(*row), int(_epoch(row.created_at) // self._bucket_seconds))
+                    total += 1
+            finally:
+                db.close()
+        with self._lock:
+            self._counters = counters
+        return total
+
+
+# Per-process instance
+velocity_checks = VelocityChecks()
+
+
+def _record_event(event: dict) -> None:
+    # Committed point activity of every worker, this one included
+    if event.get("type") != "point_activity":
+        return
+    velocity_checks.record([ScanEvent(
+        event["user_id"],
+        event.get("processed_by_user_id"),
+        event["establishment_id"],
+        event["activity_type"],
+        datetime.fromisoformat(event["created_at"]),
+    )])
+
+
+event_hub.add_listener(_record_event)
@@ -0,0 +1,219 @@
+"""
+Customer wallet service: balances, establishment branding and program progress.
+
+Balances come from one query (one per database with tenant shards, branding
+then read from the primary); live programs come from the in-memory program
+schedule.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import List, NamedTuple, Optional
+import orjson
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.database import shard_registry
+from app.core.events import event_hub
+from app.core.tenancy import query_all_shards
+from app.models.establishment import Establishment
+from app.models.user_loyalty_points import UserLoyaltyPoints
+from app.services.ledger import LedgerWrites, on_ledger_commit
+from app.services.program_schedule import program_schedule
+
+
+class WalletRow(NamedTuple):
+    """A wallet_query row assembled from a shard's balance and the primary's branding."""
+    establishment_id: int
+    business_name: str
+    avatar_url: Optional[str]
+    background_image_url: Optional[str]
+    current_balance: int
+    total_points_earned: int
+    total_visits: int
+    last_activity_date: Optional[datetime]
+
+
+class WalletCache:
+    """Bounded per-process cache of serialized wallets, keyed by user id."""
+
+    def __init__(self):
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()  # user_id -> (expires_at, body)
+        self._lock = threading.Lock()
+
+    def get(self, user_id: int) -> Optional[bytes]:
+        entry = self._entries.get(user_id)
+        if entry is None or entry[0] <= time.monotonic():
+            return None
+        return entry[1]
+
+    def put(self, user_id: int, body: bytes) -> None:
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + settings.wallet_cache_ttl_seconds, body)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > settings.wallet_cache_max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int) -> None:
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+# Per-process instance
+wallet_cache = WalletCache()
+
+
+@on_ledger_commit
+def _invalidate_wallets(writes: LedgerWrites) -> None:
+    for user_id, _ in writes:
+        wallet_cache.invalidate(user_id)
+
+
+def _invalidate_wallet_on_event(event: dict) -> None:
+    # Ledger writes committed by other workers
+    if event.get("type") == "point_activity":
+        wallet_cache.invalidate(event["user_id"])
+
+
+event_hub.add_listener(_invalidate_wallet_on_event)
+
+
+def _invalidate_wallets_on_program_change(establishment_id: int) -> None:
+    # Customers of the establishment are not known here; program changes are rare
+    wallet_cache.clear()
+
+
+program_schedule.add_listener(_invalidate_wallets_on_program_change)
+
+
+class WalletService:
+    """Service for building the customer wallet in a single query."""
+
+    @staticmethod
+    def wallet_query(user_id: int):
+        """One row per establishment where the user has a balance."""
+        return (
+            select(
+                UserLoyaltyPoints.establishment_id,
+                Establishment.business_name,
+                Establishment.avatar_url,
+                Establishment.background_image_url,
+                UserLoyaltyPoints.current_balance,
+                UserLoyaltyPoints.total_points_earned,
+                UserLoyaltyPoints.total_visits,
+                UserLoyaltyPoints.last_activity_date,
+            )
+            .join(Establishment, Establishment.id == UserLoyaltyPoints.establishment_id)
+            .where(UserLoyaltyPoints.user_id == user_id, Establishment.is_active.is_(True))
+            .order_by(
+                UserLoyaltyPoints.last_activity_date.desc().nulls_last(),
+                UserLoyaltyPoints.establishment_id,
+            )
+        )
+
+    @staticmethod
+    def wallet_rows(db: Session, user_id: int) -> List:
+        """
+        Rows of wallet_query, in its order. With tenant shards, balances are read
+        from every shard and joined in memory with the establishments on the
+        primary, which stays authoritative for branding and is_active.
+        """
+        if not shard_registry.engines:
+            return db.execute(WalletService.wallet_query(user_id)).all()
+
+        balances = query_all_shards(db, select(
+            UserLoyaltyPoints.establishment_id,
+            UserLoyaltyPoints.current_balance,
+            UserLoyaltyPoints.total_points_earned,
+            UserLoyaltyPoints.total_visits,
+            UserLoyaltyPoints.last_activity_date,
+        ).where(UserLoyaltyPoints.user_id == user_id))
+        if not balances:
+            return []
+        branding = {
+            row.id: row
+            for row in db.execute(
+                select(
+                    Establishment.id,
+                    Establishment.business_name,
+                    Establishment.avatar_url,
+                    Establishment.background_image_url,
+                ).where(
+                    Establishment.id.in_([row.establishment_id for row in balances]),
+                    Establishment.is_active.is_(True),
+                )
+            )
+        }
+
+        rows = []
+        for row in balances:
+            establishment = branding.get(row.establishment_id)
+            if establishment is not None:
+                rows.append(WalletRow(
+                    row.establishment_id,
+                    establishment.business_name,
+                    establishment.avatar_url,
+                    establishment.background_image_url,
+                    row.current_balance,
+                    row.total_points_earned,
+                    row.total_visits,
+                    row.last_activity_date,
+                ))
+        # Most recent activity first, never-active last, then by establishment (stable sorts)
+        rows.sort(key=lambda row: row.establishment_id)
+        rows.sort(key=lambda row: row.last_activity_date or datetime.min, reverse=True)
+        return rows
+
+    @staticmethod
+    def build_wallet(db: Session, user_id: int) -> bytes:
+        """Run the wallet query, add live programs and serialize it to WalletResponse JSON."""
+        rows = WalletService.wallet_rows(db, user_id)
+
+        establishments = []
+        for row in rows:
+            balance = row.current_balance
+            programs = []
+            for program in program_schedule.active_programs(row.establishment_id):
+                required = program["points_required"]
+                programs.append({
+                    "program_id": program["program_id"],
+                    "program_name": program["program_name"],
+                    "reward_description": program["reward_description"],
+                    "points_required": required,
+                    "points_to_go": max(required - balance, 0),
+                    "progress_percent": min(100, balance * 100 // required) if required > 0 else 100,
+                    "can_redeem": balance >= required,
+                    "program_color": program["program_color"],
+                    "program_icon": program["program_icon"],
+                })
+            establishments.append({
+                "establishment_id": row.establishment_id,
+                "business_name": row.business_name,
+                "avatar_url": row.avatar_url,
+                "background_image_url": row.background_image_url,
+                "current_balance": balance,
+                "total_points_earned": row.total_points_earned,
+                "total_visits": row.total_visits,
+                "last_activity_date": row.last_activity_date,
+                "programs": programs,
+            })
+
+        return orjson.dumps({"establishments": establishments})
+
+    @staticmethod
+    def get_wallet(db: Session, user_id: int, use_cache: bool = True) -> bytes:
+        """Return the user's wallet JSON, from the cache when possible."""
+        if use_cache:
+            body = wallet_cache.get(user_id)
+            if body is not None:
+                return body
+
+        body = WalletService.build_wallet(db, user_id)
+        wallet_cache.put(user_id, body)
+        return body
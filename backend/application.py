@@ -1,16 +1,35 @@
 #!/usr/bin/env python3
 """
 Application server script for the QR Backend API.
+
+Usage:
+    python application.py                 # development: single process, auto-reload
+    python application.py --prod          # production: one worker per CPU
+    python application.py --prod --workers 4 --port 8080
+
+Production mode runs Gunicorn with uvloop/httptools Uvicorn workers and a
+preloaded app; send SIGTERM for a graceful drain. It is also selected when
+ENVIRONMENT=production.
 """
 
-import uvicorn
+import argparse
 from app.core.config import settings
+from app.core.server import run_development, run_production
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the QR Backend API server.")
+    parser.add_argument("--prod", action="store_true", help="multi-worker production server")
+    parser.add_argument("--workers", type=int, default=0, help="worker count (default: WEB_CONCURRENCY or CPU count)")
+    parser.add_argument("--host", default=None)
+    parser.add_argument("--port", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.prod or settings.environment == "production":
+        run_production(workers=args.workers, host=args.host, port=args.port)
+    else:
+        run_development(host=args.host, port=args.port)
+
 
 if __name__ == "__main__":
-    uvicorn.run(
-        "main:app",
-        host="0.0.0.0",
-        port=8000,
-        reload=True,
-        log_level="info" if not settings.debug else "debug"
-    )
+    main()
@@ -1,36 +1,142 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
+from app.core.database import (
+    init_engine,
+    dispose_engine,
+    replica_pool,
+    WriteTokenMiddleware,
+    WRITE_TOKEN_HEADER,
+)
+from app.core.events import event_hub
+from app.core.idempotency import IdempotencyMiddleware, REPLAYED_HEADER
+from app.core.logs import REQUEST_ID_HEADER, RequestLogMiddleware, configure_logging, log_pipeline
+from app.core.passwords import password_hasher
+from app.core.permissions import ROLE_ADMIN, Principal, require_role
+from app.core.revocation import revocation_list
+from app.core.scheduler import CronTrigger, IntervalTrigger, job_scheduler, with_primary_session
+from app.core.tasks import run_periodically
+from app.services.leaderboard import leaderboards
+from app.services.otp_service import OTPService
+from app.services.point_expiry import PointExpiry
+from app.services.program_schedule import program_schedule
+from app.services.qr_archive import QRCodeArchiver
+from app.services.qr_renderer import qr_renderer
+from app.services.token_service import TokenService
+from app.services.velocity import velocity_checks
+from app.core.responses import ORJSONResponse, json_response
 from app.api import api_router
+from app.schemas.base import MessageResponse, HealthResponse
+from app.schemas.metrics import JobMetricsResponse, PasswordHashingMetricsResponse
+
+
+def cors_middleware(app):
+    """CORSMiddleware built with the app's middleware stack, so importing main reads no settings."""
+    return CORSMiddleware(
+        app,
+        allow_origins=settings.allowed_origins_list,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        expose_headers=[WRITE_TOKEN_HEADER, REPLAYED_HEADER, REQUEST_ID_HEADER],
+    )
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create the database engines and background tasks on startup, release them on shutdown."""
+    configure_logging()
+    log_pipeline.start()
+    engine = init_engine()
+    tasks = [
+        asyncio.create_task(run_periodically(revocation_list.sync_from_db, settings.revocation_sync_seconds)),
+        asyncio.create_task(run_periodically(leaderboards.apply_pending, settings.leaderboard_refresh_seconds)),
+        asyncio.create_task(run_periodically(leaderboards.resync, settings.leaderboard_resync_seconds)),
+        asyncio.create_task(run_periodically(velocity_checks.resync, settings.velocity_resync_seconds)),
+        asyncio.create_task(run_periodically(program_schedule.resync, settings.program_schedule_resync_seconds)),
+        asyncio.create_task(run_periodically(program_schedule.refresh, settings.program_schedule_refresh_seconds)),
+        asyncio.create_task(run_periodically(program_schedule.tick, settings.program_schedule_tick_seconds)),
+    ]
+    if settings.scheduler_enabled:
+        # Maintenance jobs: run by one worker cluster-wide
+        job_scheduler.add_job("otp_cleanup", with_primary_session(OTPService.cleanup_expired_otps),
+                              IntervalTrigger(settings.otp_cleanup_interval_seconds), jitter_seconds=60)
+        job_scheduler.add_job("token_purge", with_primary_session(TokenService.purge_expired),
+                              IntervalTrigger(settings.token_purge_interval_seconds), jitter_seconds=60)
+        job_scheduler.add_job("qr_archive", QRCodeArchiver.run,
+                              IntervalTrigger(settings.qr_archive_interval_seconds), jitter_seconds=60)
+        job_scheduler.add_job("point_expiry", PointExpiry.run,
+                              CronTrigger(settings.point_expiry_cron), jitter_seconds=300)
+        tasks.append(asyncio.create_task(job_scheduler.run()))
+    if engine.dialect.name == "postgresql":
+        # LISTEN/NOTIFY; without it (SQLite) there is no live feed and long polls return at once
+        tasks.append(asyncio.create_task(event_hub.run()))
+    if settings.database_replica_urls_list:
+        tasks.append(asyncio.create_task(
+            run_periodically(replica_pool.check_health, settings.replica_health_check_seconds)
+        ))
+    yield
+    await job_scheduler.shutdown()
+    for task in tasks:
+        task.cancel()
+    qr_renderer.shutdown()
+    dispose_engine()
+    log_pipeline.stop()
+
 
 app = FastAPI(
     title="QR Backend API",
     description="A FastAPI backend for QR code functionality",
     version="1.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
 )
 
 # Configure CORS
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=settings.allowed_origins_list,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+app.add_middleware(cors_middleware)
+
+# Return a write token after committed writes (read-your-writes on replicas)
+app.add_middleware(WriteTokenMiddleware)
+
+# Replay the first response for retried POSTs that send an Idempotency-Key
+app.add_middleware(IdempotencyMiddleware, paths=[
+    "/api/v1/auth/register",
+    "/api/v1/auth/phone/request-otp",
+    "/api/v1/auth/phone/verify-otp",
+    "/api/v1/auth/refresh",
+    "/api/v1/auth/google/callback",
+    "/api/v1/scans/sync",
+    "/api/v1/receipts/batch",
+])
+
+# Request ids and the sampled access log (outermost, so it times the whole request)
+app.add_middleware(RequestLogMiddleware)
 
 # Include API routes
 app.include_router(api_router, prefix="/api/v1")
 
-@app.get("/")
+@app.get("/", response_model=MessageResponse)
 async def root():
     """Root endpoint to check if the API is running."""
-    return {"message": "QR Backend API is running!"}
+    return MessageResponse(message="QR Backend API is running!")
 
-@app.get("/health")
+@app.get("/health", response_model=HealthResponse)
 async def health_check():
     """Health check endpoint."""
-    return {"status": "healthy", "service": "QR Backend API"}
+    return HealthResponse(status="healthy", service="QR Backend API")
+
+@app.get("/metrics/jobs", response_model=JobMetricsResponse)
+async def job_metrics(principal: Principal = Depends(require_role(ROLE_ADMIN, live=True))):
+    """Maintenance jobs: whether this worker is the scheduler leader, and its runs of each job (admins)."""
+    return json_response(JobMetricsResponse, job_scheduler.metrics(), from_attributes=True)
+
+@app.get("/metrics/password-hashing", response_model=PasswordHashingMetricsResponse)
+async def password_hashing_metrics(principal: Principal = Depends(require_role(ROLE_ADMIN, live=True))):
+    """Hashing policy and this worker's hash/verify times, for sizing login capacity (admins)."""
+    return json_response(PasswordHashingMetricsResponse, password_hasher.metrics(), from_attributes=True)
 
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    from app.core.server import run_production
+    run_production()
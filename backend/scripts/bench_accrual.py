@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Points accrual for receipt batches: vectorized engine vs the row-by-row reference.
+
+Compiles one establishment's programs (overlapping dated windows with
+different points_per_euro), then accrues a batch of synthetic receipts with
+the NumPy engine and, on a sample, with the per-receipt Decimal reference
+(bisect over the interval index + points_for), and checks both agree
+exactly. No database is needed.
+
+Usage:
+    python scripts/bench_accrual.py [--receipts 1000000] [--programs 20] [--sample 100000] [--rounding down]
+"""
+
+import argparse
+import random
+import sys
+import time
+from datetime import datetime
+from decimal import Decimal
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def report(label: str, count: int, seconds: float) -> None:
+    print(f"{label:<28} {seconds / count * 1e6:>8.3f} us/receipt  ({count / seconds:>14,.0f} receipts/s)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--receipts", type=int, default=1000000)
+    parser.add_argument("--programs", type=int, default=20)
+    parser.add_argument("--sample", type=int, default=100000, help="Receipts checked against the reference")
+    parser.add_argument("--rounding", choices=["down", "half_up", "up"], default="down")
+    args = parser.parse_args()
+
+    import numpy as np
+    from app.services.accrual import CompiledRules, points_for
+    from app.services.program_schedule import IntervalIndex, ProgramWindow, _epoch
+
+    rng = random.Random(42)
+    now = _epoch(datetime.utcnow())
+    day = 86400
+
+    def window(program_id: int) -> ProgramWindow:
+        start = now - rng.uniform(0, 90) * day
+        end = start + rng.uniform(1, 60) * day if rng.random() < 0.7 else float("inf")
+        rate = Decimal(rng.randrange(25, 500)) / 100 if rng.random() < 0.9 else None
+        info = {"program_id": program_id, "points_required": rng.randrange(500), "points_per_euro": rate}
+        return ProgramWindow(program_id, start, end, info)
+
+    index = IntervalIndex(window(program_id) for program_id in range(1, args.programs + 1))
+    started = time.perf_counter()
+    rules = CompiledRules(index)
+    print(f"compile: {len(rules.program_ids)} programs, {len(rules.best)} segments "
+          f"in {(time.perf_counter() - started) * 1000:.2f} ms")
+
+    generator = np.random.default_rng(42)
+    cents = generator.integers(0, 50000, args.receipts, dtype=np.int64)
+    purchased_at = now - generator.uniform(0, 90 * day, args.receipts)
+    program_ids = np.where(
+        generator.random(args.receipts) < 0.3, generator.integers(1, args.programs + 1, args.receipts), 0
+    ).astype(np.int64)
+
+    started = time.perf_counter()
+    points, applied = rules.accrue(cents, purchased_at, program_ids, args.rounding)
+    report("vectorized", args.receipts, time.perf_counter() - started)
+    print(f"  booked {int((points >= 0).sum()):,} receipts, {int(points[points >= 0].sum()):,} points")
+
+    sample = min(args.sample, args.receipts)
+    amounts = [Decimal(int(value)) / 100 for value in cents[:sample].tolist()]
+    started = time.perf_counter()
+    expected = []
+    for amount, at, program_id in zip(amounts, purchased_at[:sample].tolist(), program_ids[:sample].tolist()):
+        live = index.active_at(at)
+        if program_id:
+            live = [window for window in live if window.program_id == program_id]
+        else:
+            # Best rate, lowest program id on ties
+            live = sorted(live, key=lambda window: (-(window.info["points_per_euro"] or Decimal(1)), window.program_id))
+        if not live:
+            expected.append((-1, 0))
+            continue
+        expected.append((points_for(amount, live[0].info["points_per_euro"], args.rounding), live[0].program_id))
+    report("row-by-row (Decimal)", sample, time.perf_counter() - started)
+
+    got = list(zip(points[:sample].tolist(), applied[:sample].tolist()))
+    mismatches = sum(left != right for left, right in zip(got, expected))
+    print(f"reference check on {sample:,} receipts: {mismatches} mismatches")
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
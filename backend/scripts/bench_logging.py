@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Caller-side cost of logging through the background pipeline.
+
+Times logger.info calls from several threads through QueueingHandler (the
+writer thread formats JSON and writes to a file), against a plain
+synchronous handler doing the same formatting and writes in the caller,
+then reports the records dropped when the buffer overflows. No database
+is needed.
+
+Usage:
+    python scripts/bench_logging.py [--records 200000] [--threads 4] [--queue-size 10000] [--output /dev/null]
+"""
+
+import argparse
+import logging
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def run(logger: logging.Logger, records: int, threads: int) -> float:
+    """Wall-clock seconds per call across all threads (they share the GIL)."""
+    per_thread = records // threads
+
+    def work():
+        for n in range(per_thread):
+            logger.info("Scan %d accepted", n, extra={"user_id": n, "establishment_id": 7})
+
+    workers = [threading.Thread(target=work) for _ in range(threads)]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return (time.perf_counter() - started) / (per_thread * threads)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=200000)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--queue-size", type=int, default=10000)
+    parser.add_argument("--output", default="/dev/null")
+    args = parser.parse_args()
+
+    from app.core.logs import LogPipeline, QueueingHandler, configure_logging, format_json, request_id_var
+
+    configure_logging()  # same LogRecord settings as the app
+    request_id_var.set("0123456789abcdef")
+    output = open(args.output, "ab")
+
+    class SyncJSONHandler(logging.Handler):
+        def emit(self, record):
+            record.request_id = request_id_var.get()
+            output.write(format_json(record))
+            output.flush()
+
+    sync_logger = logging.getLogger("bench.sync")
+    sync_logger.propagate = False
+    sync_logger.addHandler(SyncJSONHandler())
+    sync_logger.setLevel(logging.INFO)
+    seconds = run(sync_logger, args.records, args.threads)
+    print(f"{'synchronous handler':<24} {seconds * 1e6:>8.2f} us/call")
+
+    pipeline = LogPipeline(args.queue_size)
+    pipeline.configure([output], text_format=False)
+    pipeline.start()
+    queued_logger = logging.getLogger("bench.queued")
+    queued_logger.propagate = False
+    queued_logger.addHandler(QueueingHandler(pipeline))
+    queued_logger.setLevel(logging.INFO)
+    started = time.perf_counter()
+    seconds = run(queued_logger, args.records, args.threads)
+    pipeline.stop()
+    print(f"{'queued (pipeline)':<24} {seconds * 1e6:>8.2f} us/call")
+    print(f"  drained in {time.perf_counter() - started:.2f}s, {pipeline.dropped:,} of {args.records:,} records dropped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Lookup cost of the in-memory program schedule.
+
+Builds interval indexes for synthetic establishments with overlapping
+dated programs, then times "live now" lookups (the timer-wheel maintained
+set), "live at t" lookups (bisect over the boundaries) and a timer wheel
+advance. No database is needed.
+
+Usage:
+    python scripts/bench_program_schedule.py [--establishments 5000] [--programs 20] [--lookups 200000]
+"""
+
+import argparse
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def report(label: str, count: int, seconds: float) -> None:
+    print(f"{label:<28} {seconds / count * 1e6:>8.2f} us/op  ({count / seconds:>12,.0f} ops/s)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--establishments", type=int, default=5000)
+    parser.add_argument("--programs", type=int, default=20, help="Programs per establishment")
+    parser.add_argument("--lookups", type=int, default=200000)
+    args = parser.parse_args()
+
+    from app.services.program_schedule import ProgramSchedule, ProgramWindow, _epoch
+
+    rng = random.Random(42)
+    now = _epoch(datetime.utcnow())
+    day = 86400
+
+    def window(program_id: int) -> ProgramWindow:
+        start = now + rng.uniform(-60, 60) * day if rng.random() < 0.8 else float("-inf")
+        end = start + rng.uniform(1, 90) * day if rng.random() < 0.8 else float("inf")
+        return ProgramWindow(program_id, start, end, {"program_id": program_id, "points_required": rng.randrange(500)})
+
+    schedule = ProgramSchedule()
+    started = time.perf_counter()
+    with schedule._lock:
+        for establishment_id in range(args.establishments):
+            windows = [window(establishment_id * args.programs + n) for n in range(args.programs)]
+            schedule._install(establishment_id, windows, now)
+    schedule._loaded = True
+    report("install (per establishment)", args.establishments, time.perf_counter() - started)
+
+    ids = [rng.randrange(args.establishments) for _ in range(args.lookups)]
+    started = time.perf_counter()
+    for establishment_id in ids:
+        schedule.active_programs(establishment_id)
+    report("live now", args.lookups, time.perf_counter() - started)
+
+    at = datetime.utcnow() + timedelta(days=10)
+    started = time.perf_counter()
+    for establishment_id in ids:
+        schedule.active_programs(establishment_id, at)
+    report("live at t (bisect)", args.lookups, time.perf_counter() - started)
+
+    started = time.perf_counter()
+    flipped = schedule.tick()
+    print(f"tick: {flipped} establishments flipped in {(time.perf_counter() - started) * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark for QR image batch rendering.
+
+Renders a batch of unique payloads serially in this process, through the
+renderer's process pool (cold cache), and again from the warm memory and disk
+caches, and prints images per second for each.
+
+Usage:
+    python scripts/bench_qr_render.py [--count 2000] [--format png|svg] [--scale 8] [--processes 0]
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def report(label: str, count: int, seconds: float) -> None:
+    print(f"{label:<24} {count / seconds:>10,.0f} images/s  ({seconds * 1000:,.0f} ms)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=2000)
+    parser.add_argument("--format", choices=["png", "svg"], default="png")
+    parser.add_argument("--scale", type=int, default=8)
+    parser.add_argument("--border", type=int, default=4)
+    parser.add_argument("--processes", type=int, default=0, help="0 = one per CPU")
+    args = parser.parse_args()
+
+    cache_dir = tempfile.mkdtemp(prefix="qr-bench-")
+    os.environ["QR_IMAGE_CACHE_DIR"] = cache_dir
+    os.environ["QR_RENDER_PROCESSES"] = str(args.processes or os.cpu_count() or 1)
+    from app.services.qr_renderer import QRRenderer, render_image
+
+    specs = [
+        (f"https://app.example.com/qr/{index:08d}-{os.urandom(16).hex()}", args.format, args.scale, args.border)
+        for index in range(args.count)
+    ]
+    renderer = QRRenderer()
+    try:
+        start = time.perf_counter()
+        for spec in specs[:200]:
+            render_image(*spec)
+        report("serial (200 sample)", 200, time.perf_counter() - start)
+
+        renderer.render_batch(specs[:1])  # start the pool outside the measurement
+        start = time.perf_counter()
+        images = renderer.render_batch(specs[1:])
+        report("pool, cold cache", len(images), time.perf_counter() - start)
+
+        start = time.perf_counter()
+        renderer.render_batch(specs)
+        report("warm memory cache", len(specs), time.perf_counter() - start)
+
+        renderer.cache = type(renderer.cache)()
+        start = time.perf_counter()
+        renderer.render_batch(specs)
+        report("warm disk cache", len(specs), time.perf_counter() - start)
+
+        size = sum(len(image) for image in images) / len(images)
+        print(f"average image size: {size:,.0f} bytes")
+    finally:
+        renderer.shutdown()
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
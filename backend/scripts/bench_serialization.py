@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for JSON encoding of list responses.
+
+Compares FastAPI's generic path (dict rows -> response model validation ->
+jsonable_encoder -> json.dumps) with the fast paths in app.core.responses:
+cached TypeAdapter serialization of ORM-style rows, and direct Row tuple
+encoding with orjson used by bulk list endpoints.
+
+Usage:
+    python scripts/bench_serialization.py [--rows 5000] [--repeat 20]
+"""
+
+import argparse
+import json
+import sys
+import timeit
+from datetime import datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import Column, DateTime, Integer, MetaData, Numeric, String, Table, create_engine, insert, select
+
+from app.core.responses import dump_json, dump_rows
+from app.schemas.activity import PointActivityResponse
+
+
+def build_rows(count: int):
+    """Materialize real SQLAlchemy Row objects from an in-memory SQLite table."""
+    metadata = MetaData()
+    table = Table(
+        "point_activities", metadata,
+        Column("id", Integer, primary_key=True),
+        Column("establishment_id", Integer),
+        Column("program_id", Integer),
+        Column("activity_type", String),
+        Column("points_change", Integer),
+        Column("description", String),
+        Column("qr_code_id", Integer),
+        Column("amount_spent", Numeric(10, 2)),
+        Column("created_at", DateTime),
+    )
+    engine = create_engine("sqlite://")
+    metadata.create_all(engine)
+    now = datetime(2025, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(insert(table), [
+            {
+                "id": i,
+                "establishment_id": i % 50,
+                "program_id": i % 7 or None,
+                "activity_type": "earned" if i % 3 else "redeemed",
+                "points_change": 40 if i % 3 else -100,
+                "description": f"Purchased {i % 90}€",
+                "qr_code_id": i,
+                "amount_spent": Decimal("12.50"),
+                "created_at": now + timedelta(minutes=i),
+            }
+            for i in range(1, count + 1)
+        ])
+        return conn.execute(select(table)).all()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rows = build_rows(args.rows)
+    schema = List[PointActivityResponse]
+
+    def generic_path() -> bytes:
+        # What FastAPI does for a response_model route returning dicts
+        models = [PointActivityResponse.model_validate(dict(row._mapping)) for row in rows]
+        return json.dumps(jsonable_encoder(models)).encode("utf-8")
+
+    def adapter_path() -> bytes:
+        return dump_json(schema, rows, from_attributes=True)
+
+    def rows_path() -> bytes:
+        return dump_rows(PointActivityResponse, rows)
+
+    expected = json.loads(generic_path())
+    assert json.loads(adapter_path()) == expected
+    assert json.loads(rows_path()) == expected
+
+    results = {}
+    for name, func in (("generic", generic_path), ("typeadapter", adapter_path), ("rows", rows_path)):
+        func()  # warm up
+        best = min(timeit.repeat(func, number=1, repeat=args.repeat))
+        results[name] = best
+        print(f"{name:>14}: {best * 1000:8.2f} ms  ({args.rows / best:,.0f} rows/s)")
+
+    print(f"speed-up vs generic: typeadapter {results['generic'] / results['typeadapter']:.1f}x, "
+          f"rows {results['generic'] / results['rows']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Per-scan overhead of the velocity checks.
+
+Fills the in-memory counters with an hour of synthetic point activity, then
+times VelocityChecks.check for single scans and for offline-sync sized
+batches, and VelocityChecks.record (the event hub listener path). No database
+is needed.
+
+Usage:
+    python scripts/bench_velocity.py [--activities 200000] [--users 20000] [--workers 500] [--batch 300]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def report(label: str, scans: int, seconds: float) -> None:
+    print(f"{label:<28} {seconds / scans * 1e6:>8.2f} us/scan  ({scans / seconds:>12,.0f} scans/s)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--activities", type=int, default=200000)
+    parser.add_argument("--users", type=int, default=20000)
+    parser.add_argument("--workers", type=int, default=500)
+    parser.add_argument("--establishments", type=int, default=200)
+    parser.add_argument("--batch", type=int, default=300)
+    parser.add_argument("--repeat", type=int, default=20000)
+    args = parser.parse_args()
+
+    # Never block, so every scan is evaluated against every rule
+    os.environ["VELOCITY_ENFORCE"] = "false"
+    from app.services.velocity import ScanEvent, VelocityChecks
+
+    rng = random.Random(42)
+    now = datetime.utcnow()
+
+    def event(at: datetime) -> ScanEvent:
+        return ScanEvent(
+            rng.randrange(args.users),
+            rng.randrange(args.workers),
+            rng.randrange(args.establishments),
+            "earned" if rng.random() < 0.8 else "redeemed",
+            at,
+        )
+
+    checks = VelocityChecks()
+    print("rules:", ", ".join(f"{rule.name} ({rule.limit}/{rule.window_seconds}s)" for rule in checks.rules))
+    history = [event(now - timedelta(seconds=rng.uniform(0, 3600))) for _ in range(args.activities)]
+    start = time.perf_counter()
+    checks.record(history)
+    report("record (warm-up)", len(history), time.perf_counter() - start)
+
+    singles = [[event(now)] for _ in range(args.repeat)]
+    start = time.perf_counter()
+    for batch in singles:
+        checks.check(batch)
+    report("check, single scan", len(singles), time.perf_counter() - start)
+
+    batches = [[event(now) for _ in range(args.batch)] for _ in range(max(1, args.repeat // args.batch))]
+    start = time.perf_counter()
+    for batch in batches:
+        checks.check(batch)
+    report(f"check, batch of {args.batch}", len(batches) * args.batch, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for batch in singles:
+        checks.record(batch)
+    report("record, single scan", len(singles), time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the customer wallet (GET /api/v1/wallet).
+
+Seeds a customer with balances at N establishments (M active programs each)
+in the configured database and compares:
+
+    naive   - ORM lazy loading: 1 + N + N queries
+    query   - WalletService.build_wallet: one query, programs from the in-memory schedule
+    cached  - WalletService.get_wallet with a warm per-user cache
+
+The seeded rows are deleted afterwards.
+
+Usage:
+    python scripts/bench_wallet.py [--establishments 50] [--programs 3] [--repeat 50]
+"""
+
+import argparse
+import sys
+import timeit
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import event
+
+from app.core.database import SessionLocal, get_engine
+from app.models import BusinessOwner, Establishment, LoyaltyProgram, User, UserLoyaltyPoints
+from app.services.wallet_service import WalletService, wallet_cache
+
+
+def seed(db, establishments: int, programs: int) -> tuple:
+    """Create an owner, establishments with programs, and a customer with a balance at each."""
+    tag = uuid.uuid4().hex[:10]
+    owner = BusinessOwner(owner_name=f"bench {tag}", email=f"bench-{tag}@example.com")
+    user = User(phone_number=f"+999{tag}", role="customer")
+    db.add_all([owner, user])
+    db.flush()
+
+    now = datetime.utcnow()
+    for i in range(establishments):
+        establishment = Establishment(business_owner_id=owner.id, business_name=f"Bench shop {i}")
+        db.add(establishment)
+        db.flush()
+        db.add_all([
+            LoyaltyProgram(
+                establishment_id=establishment.id,
+                program_name=f"Program {j}",
+                reward_description="Free coffee",
+                points_required=100 * (j + 1),
+            )
+            for j in range(programs)
+        ])
+        db.add(UserLoyaltyPoints(
+            user_id=user.id,
+            establishment_id=establishment.id,
+            total_points_earned=50 * i,
+            current_balance=25 * i,
+            total_visits=i,
+            last_activity_date=now - timedelta(hours=i),
+        ))
+    db.commit()
+    return owner.id, user.id
+
+
+def naive_wallet(db, user_id: int) -> list:
+    """What the home screen costs without a dedicated query: lazy loads per establishment."""
+    db.expire_all()
+    user = db.get(User, user_id)
+    result = []
+    for points in user.loyalty_points:
+        establishment = points.establishment
+        result.append((
+            establishment.business_name,
+            points.current_balance,
+            [(p.program_name, p.points_required) for p in establishment.loyalty_programs if p.is_active],
+        ))
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--establishments", type=int, default=50)
+    parser.add_argument("--programs", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    engine = get_engine()
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *a, **k: statements.append(1))
+
+    db = SessionLocal()
+    owner_id, user_id = seed(db, args.establishments, args.programs)
+    try:
+        def naive():
+            naive_wallet(db, user_id)
+
+        def query():
+            WalletService.build_wallet(db, user_id)
+
+        def cached():
+            WalletService.get_wallet(db, user_id)
+
+        print(f"user with {args.establishments} establishments x {args.programs} programs")
+        for name, func in (("naive", naive), ("query", query), ("cached", cached)):
+            func()  # warm up (fills the wallet cache for "cached")
+            statements.clear()
+            func()
+            queries = len(statements)
+            best = min(timeit.repeat(func, number=1, repeat=args.repeat))
+            print(f"{name:>8}: {best * 1000:8.3f} ms  {queries:4d} queries")
+    finally:
+        db.rollback()
+        db.query(UserLoyaltyPoints).filter(UserLoyaltyPoints.user_id == user_id).delete()
+        db.query(User).filter(User.id == user_id).delete()
+        db.query(BusinessOwner).filter(BusinessOwner.id == owner_id).delete()
+        db.commit()
+        db.close()
+        wallet_cache.invalidate(user_id)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Pick the password hashing cost for this host.
+
+Times a hash at increasing cost (bcrypt rounds, or argon2 time cost at
+PASSWORD_ARGON2_MEMORY_KIB / PASSWORD_ARGON2_PARALLELISM) and prints the
+setting that stays within the target time. Run it on the production host
+type; existing hashes are upgraded on the users' next login.
+
+Usage:
+    python scripts/calibrate_password_hash.py [--target-ms 250] [--scheme bcrypt|argon2] [--samples 3]
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.core.passwords import SCHEME_BCRYPT, SCHEMES, calibrate
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target-ms", type=float, default=None, help="Default: PASSWORD_HASH_TARGET_MS")
+    parser.add_argument("--scheme", choices=SCHEMES, default=None, help="Default: PASSWORD_HASH_SCHEME")
+    parser.add_argument("--samples", type=int, default=3, help="Hashes timed per cost (median)")
+    args = parser.parse_args()
+
+    result = calibrate(args.target_ms, args.scheme, args.samples)
+    for step in result["measured"]:
+        marker = "  <-" if step["cost"] == result["cost"] else ""
+        print(f"cost {step['cost']:>3}  {step['ms']:>10.1f} ms{marker}")
+
+    chosen = next(step for step in result["measured"] if step["cost"] == result["cost"])
+    if chosen["ms"] > result["target_ms"]:
+        print(f"warning: the minimum cost already takes longer than {result['target_ms']:.0f} ms")
+    print()
+    print(f"PASSWORD_HASH_SCHEME={result['scheme']}")
+    print(f"PASSWORD_HASH_TARGET_MS={result['target_ms']:g}")
+    if result["scheme"] == SCHEME_BCRYPT:
+        print(f"PASSWORD_BCRYPT_ROUNDS={result['cost']}")
+    else:
+        print(f"PASSWORD_ARGON2_TIME_COST={result['cost']}")
+
+
+if __name__ == "__main__":
+    main()
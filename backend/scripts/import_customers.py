@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Import customers and their balances into an establishment from a CSV file.
+
+Phone numbers are normalized to E.164 and matched against existing users;
+new ones become customer accounts. Customers that already have a balance at
+the establishment keep it, so an interrupted import can simply be re-run.
+See app.services.customer_import for the columns.
+
+Usage:
+    python scripts/import_customers.py --establishment-id 1 --file customers.csv \\
+        [--default-country-code 33] [--batch-size 5000]
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.core.database import init_engine, dispose_engine
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--establishment-id", type=int, required=True)
+    parser.add_argument("--file", type=Path, required=True)
+    parser.add_argument("--default-country-code", default=None,
+                        help="Country calling code for national numbers (leading 0), e.g. 33")
+    parser.add_argument("--batch-size", type=int, default=None,
+                        help="Rows per batch (default: CUSTOMER_IMPORT_BATCH_SIZE)")
+    args = parser.parse_args()
+
+    from app.services.customer_import import CustomerImporter, ImportProgress
+
+    def progress(stats: ImportProgress) -> None:
+        print(f"{stats.rows_read:>12,} rows  {stats.users_created:>10,} new users  "
+              f"{stats.balances_created:>10,} new balances  {stats.rows_per_second:>10,.0f} rows/s")
+
+    init_engine()
+    try:
+        importer = CustomerImporter(
+            args.establishment_id,
+            default_country_code=args.default_country_code,
+            batch_size=args.batch_size,
+            progress=progress,
+        )
+        with args.file.open(encoding="utf-8-sig", newline="") as stream:
+            report = importer.run(stream)
+    except ValueError as exc:
+        sys.exit(f"error: {exc}")
+    finally:
+        dispose_engine()
+
+    print(f"read {report.rows_read:,} rows in {report.seconds:.1f}s ({report.rows_per_second:,.0f} rows/s)")
+    for name in ("users_created", "users_matched", "balances_created", "balances_existing",
+                 "duplicates_in_file", "emails_dropped", "rows_invalid"):
+        print(f"  {name:<20} {getattr(report, name):>12,}")
+    for error in report.errors:
+        print(f"  line {error.line}: {error.reason}")
+
+
+if __name__ == "__main__":
+    main()
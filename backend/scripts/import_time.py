@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Cold-start import profiling and startup budget check for the API.
+
+Each measurement runs in a fresh interpreter so nothing is cached in
+sys.modules.
+
+Usage:
+    python scripts/import_time.py profile [--top 25]
+        Show the slowest modules imported by `main` (python -X importtime).
+
+    python scripts/import_time.py check [--budget-ms N] [--runs 5]
+        Exit with status 1 if the median cold import of main:app exceeds the
+        budget (defaults to STARTUP_IMPORT_BUDGET_MS). Meant to run in CI.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+TIMED_IMPORT = (
+    "import time; start = time.perf_counter(); "
+    "from main import app; "
+    "print((time.perf_counter() - start) * 1000)"
+)
+
+
+def run_python(*args: str) -> subprocess.CompletedProcess:
+    """Run a fresh interpreter from the backend directory."""
+    return subprocess.run(
+        [sys.executable, *args],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def profile(top: int) -> None:
+    """Print the modules with the highest cumulative and self import time."""
+    result = run_python("-X", "importtime", "-c", "import main")
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        entries.append((int(self_us), int(cumulative_us), name.rstrip()))
+
+    total_us = max(cumulative for _, cumulative, _ in entries)
+    print(f"total: {total_us / 1000:.1f} ms across {len(entries)} modules\n")
+
+    print(f"top {top} by cumulative time:")
+    for self_us, cumulative_us, name in sorted(entries, key=lambda e: e[1], reverse=True)[:top]:
+        print(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+
+    print(f"\ntop {top} by self time:")
+    for self_us, cumulative_us, name in sorted(entries, key=lambda e: e[0], reverse=True)[:top]:
+        print(f"  {self_us / 1000:8.1f} ms  {name.strip()}")
+
+
+def check(budget_ms: float, runs: int) -> int:
+    """Measure cold import of main:app and compare the median to the budget."""
+    samples = [float(run_python("-c", TIMED_IMPORT).stdout.strip()) for _ in range(runs)]
+    median = statistics.median(samples)
+    print(f"cold import of main:app: median {median:.1f} ms "
+          f"(min {min(samples):.1f}, max {max(samples):.1f}, runs {runs}), budget {budget_ms:.0f} ms")
+
+    if median > budget_ms:
+        print("FAIL: startup import budget exceeded; run `python scripts/import_time.py profile`")
+        return 1
+    print("OK")
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    profile_parser = subparsers.add_parser("profile", help="show slowest imports")
+    profile_parser.add_argument("--top", type=int, default=25)
+
+    check_parser = subparsers.add_parser("check", help="fail if cold import exceeds the budget")
+    check_parser.add_argument("--budget-ms", type=float, default=None)
+    check_parser.add_argument("--runs", type=int, default=5)
+
+    args = parser.parse_args()
+
+    if args.command == "profile":
+        profile(args.top)
+        return 0
+
+    budget_ms = args.budget_ms
+    if budget_ms is None:
+        # Only the budget: CI may not have the rest of the settings (SECRET_KEY...)
+        from dotenv import load_dotenv
+        from app.core.config import DEFAULT_STARTUP_IMPORT_BUDGET_MS
+
+        load_dotenv(BACKEND_DIR / ".env")
+        budget_ms = float(os.getenv("STARTUP_IMPORT_BUDGET_MS", DEFAULT_STARTUP_IMPORT_BUDGET_MS))
+    return check(budget_ms, args.runs)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Load test for the live establishment event feed (SSE).
+
+Opens many idle SSE connections to a running server, then publishes ping
+events straight through Postgres NOTIFY and measures how long the fan-out
+takes to reach every client. Tokens are minted locally, so SECRET_KEY and
+DATABASE_URL must match the server's.
+
+Usage:
+    python scripts/load_sse.py --user-id 1 --establishment-id 1 \
+        [--base-url http://127.0.0.1:8000] [--connections 2000] [--events 20] [--interval 0.5]
+
+The user must be a worker or admin of the establishment. Raise the open-file
+limit (ulimit -n) on both ends for large connection counts.
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+from urllib.parse import urlsplit
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.core.auth import create_access_token
+from app.core.database import get_engine
+from app.core.events import EVENTS_CHANNEL
+
+
+class Client:
+    """One raw-socket SSE connection recording when each ping arrives."""
+
+    def __init__(self):
+        self.received = {}
+        self.reader = None
+        self.writer = None
+
+    async def connect(self, host: str, port: int, path: str, token: str) -> None:
+        self.reader, self.writer = await asyncio.open_connection(host, port)
+        self.writer.write((
+            f"GET {path} HTTP/1.1\r\nHost: {host}\r\nAccept: text/event-stream\r\n"
+            f"Authorization: Bearer {token}\r\n\r\n"
+        ).encode())
+        await self.writer.drain()
+        status_line = await self.reader.readline()
+        if b" 200 " not in status_line:
+            raise RuntimeError(f"unexpected response: {status_line!r}")
+
+    async def read(self) -> None:
+        while True:
+            line = await self.reader.readline()
+            if not line:
+                return
+            if line.startswith(b"data: "):
+                event = json.loads(line[6:])
+                if event.get("type") == "ping":
+                    self.received[event["seq"]] = time.time()
+
+
+def publish(establishment_id: int, seq: int) -> float:
+    sent_at = time.time()
+    payload = json.dumps({"type": "ping", "establishment_id": establishment_id, "seq": seq, "sent_at": sent_at})
+    with get_engine().begin() as connection:
+        connection.exec_driver_sql("SELECT pg_notify(%s, %s)", (EVENTS_CHANNEL, payload))
+    return sent_at
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--user-id", type=int, required=True)
+    parser.add_argument("--establishment-id", type=int, required=True)
+    parser.add_argument("--role", default="admin")
+    parser.add_argument("--connections", type=int, default=2000)
+    parser.add_argument("--events", type=int, default=20)
+    parser.add_argument("--interval", type=float, default=0.5)
+    args = parser.parse_args()
+
+    url = urlsplit(args.base_url)
+    path = f"/api/v1/establishments/{args.establishment_id}/events"
+    token = create_access_token({"sub": str(args.user_id), "role": args.role, "est": args.establishment_id})
+
+    clients = [Client() for _ in range(args.connections)]
+    start = time.perf_counter()
+    for batch in range(0, len(clients), 200):
+        await asyncio.gather(*(
+            client.connect(url.hostname, url.port or 80, path, token) for client in clients[batch:batch + 200]
+        ))
+    print(f"opened {len(clients)} connections in {time.perf_counter() - start:.2f} s")
+    readers = [asyncio.create_task(client.read()) for client in clients]
+
+    await asyncio.sleep(1)
+    sent = {}
+    for seq in range(args.events):
+        sent[seq] = publish(args.establishment_id, seq)
+        await asyncio.sleep(args.interval)
+    await asyncio.sleep(2)
+
+    latencies, fanout, delivered = [], [], 0
+    for seq, sent_at in sent.items():
+        arrivals = [client.received[seq] for client in clients if seq in client.received]
+        delivered += len(arrivals)
+        latencies.extend(arrival - sent_at for arrival in arrivals)
+        if arrivals:
+            fanout.append(max(arrivals) - sent_at)
+
+    expected = len(sent) * len(clients)
+    print(f"delivered {delivered}/{expected} events ({delivered / expected:.1%})")
+    if latencies:
+        latencies.sort()
+        print(f"latency p50 {statistics.median(latencies) * 1000:.1f} ms, "
+              f"p99 {latencies[int(len(latencies) * 0.99) - 1] * 1000:.1f} ms, "
+              f"max {latencies[-1] * 1000:.1f} ms")
+        print(f"time to reach all clients: median {statistics.median(fanout) * 1000:.1f} ms, "
+              f"max {max(fanout) * 1000:.1f} ms")
+
+    for task in readers:
+        task.cancel()
+    for client in clients:
+        client.writer.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
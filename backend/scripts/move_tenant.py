@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Move a tenant (business owner and all of its establishments) to another shard.
+
+Shards are configured with DATABASE_SHARD_URLS (name=url pairs); "default" is
+the primary. The tenant's writes are refused (503) while it moves. A shard
+must be prepared once (tables, NOTIFY triggers, id block) before tenants move
+to it.
+
+Usage:
+    python scripts/move_tenant.py --prepare shard_a
+    python scripts/move_tenant.py --business-owner-id 1 --to shard_a [--wait-seconds 30]
+    python scripts/move_tenant.py --list
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.core.database import shard_registry, init_engine, dispose_engine
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--business-owner-id", type=int)
+    parser.add_argument("--to", dest="target")
+    parser.add_argument("--wait-seconds", type=float, default=None,
+                        help="How long to wait for workers to see the move (default: directory TTL)")
+    parser.add_argument("--list", action="store_true", help="List configured shards and exit")
+    parser.add_argument("--prepare", metavar="SHARD", help="Create a shard's tables, NOTIFY triggers and id block and exit")
+    args = parser.parse_args()
+
+    init_engine()
+    try:
+        if args.list:
+            print("\n".join(shard_registry.names))
+            return
+        if args.prepare is not None:
+            if args.prepare not in shard_registry.names:
+                parser.error(f"unknown shard {args.prepare!r}; configured: {', '.join(shard_registry.names)}")
+            from app.services.shard_schema import prepare_shard
+
+            prepare_shard(args.prepare)
+            print(f"prepared shard {args.prepare}")
+            return
+        if args.business_owner_id is None or args.target is None:
+            parser.error("--business-owner-id and --to are required")
+        if args.target not in shard_registry.names:
+            parser.error(f"unknown shard {args.target!r}; configured: {', '.join(shard_registry.names)}")
+
+        from app.services.tenant_mover import TenantMover
+
+        mover = TenantMover(args.business_owner_id)
+        source = mover.current_shard()
+        copied = mover.move(args.target, wait_seconds=args.wait_seconds)
+        if not copied:
+            print(f"tenant {args.business_owner_id} is already on {args.target}")
+            return
+        print(f"moved tenant {args.business_owner_id} from {source} to {args.target}")
+        for table, rows in copied.items():
+            print(f"  {table:<24} {rows:>10,} rows")
+    finally:
+        dispose_engine()
+
+
+if __name__ == "__main__":
+    main()